@@ -1,2 +1,10 @@
 from .file_scanner import *
 from .labelme import *
+from .scan_cache import *
+from .progress import *
+from .scan_watch import *
+from .cancellation import *
+from .annotation_index import *
+from .pipeline import *
+from .manifest import *
+from .label_dictionary import *
@@ -0,0 +1,685 @@
+"""
+标注索引模块
+
+将数据集中所有 Labelme JSON 的标签、形状类型与多边形坐标整理为列式 NumPy 数组并持久化，
+按文件 (size, mtime_ns) 增量更新。标签统计、标签校验、抽样与重叠检查可以直接查询索引，
+无需逐个重新解析 JSON。
+
+存储结构:
+    文件表: 相对路径、size、mtime_ns、读取错误、图片宽高，以及每个文件在形状表中的起止偏移
+    形状表: 所属文件 id、标签 id、形状类型 id、标志位，以及每个形状在坐标数组中的起止偏移
+    坐标数组: 全部形状的点坐标依次拼接，float64 (N, 2)
+    字符串表: 路径、标签、形状类型、错误信息各自以 UTF-8 拼接存储，另存偏移
+"""
+
+import hashlib
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from .cancellation import CancelToken, is_cancelled
+from .labelme import PrefetchedAnnotation, prefetch_labelme_shapes, read_labelme_shapes
+from .pipeline import get_parse_processes, iter_process_chunks, iter_read_ahead
+from .progress import ProgressCallback, ProgressReporter
+from .scan_cache import RACY_MTIME_WINDOW_NS, get_user_cache_dir
+
+
+# 存储格式变化时递增，旧版本索引在加载时整体丢弃
+INDEX_FORMAT_VERSION = 1
+
+INDEX_DIR_NAME = "annotation_index"
+
+# 形状标志位：points 无法转换为 (N, 2) 坐标
+SHAPE_FLAG_INVALID_POINTS = 1
+
+_NO_ERROR = -1
+_UNKNOWN_SIZE = -1
+_UNTRUSTED_MTIME = -1
+
+_STRING_TABLES = ("paths", "labels", "shape_types", "errors")
+
+
+def _pack_strings(values: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """将字符串列表编码为 (UTF-8 字节数组, 偏移数组)。"""
+    encoded = [value.encode("utf-8", "surrogatepass") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    if encoded:
+        np.cumsum([len(item) for item in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8).copy(), offsets
+
+
+def _unpack_strings(blob: np.ndarray, offsets: np.ndarray) -> list[str]:
+    data = blob.tobytes()
+    bounds = offsets.tolist()
+    return [data[bounds[i]:bounds[i + 1]].decode("utf-8", "surrogatepass") for i in range(len(bounds) - 1)]
+
+
+def _gather_ranges(offsets: np.ndarray, ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """按 ids 顺序取出 offsets 描述的多段连续区间。
+
+    返回:
+        (拼接后的元素下标, 新的偏移数组)
+    """
+    starts = offsets[ids]
+    counts = offsets[ids + 1] - starts
+    new_offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+    np.cumsum(counts, out=new_offsets[1:])
+    element_ids = np.repeat(starts - new_offsets[:-1], counts) + np.arange(new_offsets[-1], dtype=np.int64)
+    return element_ids, new_offsets
+
+
+def _compact_vocabulary(values: list[str], ids: np.ndarray, keep_missing: bool = False) -> tuple[list[str], np.ndarray]:
+    """去掉未被引用的词表项并重新编号，keep_missing 为 True 时保留 -1 表示缺失。"""
+    if keep_missing:
+        used = np.unique(ids[ids >= 0])
+    else:
+        used = np.unique(ids)
+    remap = np.full(len(values) + 1, -1, dtype=np.int32)
+    remap[used] = np.arange(len(used), dtype=np.int32)
+    return [values[i] for i in used.tolist()], remap[ids]
+
+
+def _to_int(value, default: int = -1) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _extract_columns(data: dict) -> tuple:
+    """从解析后的标注字典中取出索引所需的列，shape 结构错误时抛出异常。
+
+    返回:
+        (标签列表, 形状类型列表, 标志位列表, 各形状点数列表, 坐标数组 float64 (N, 2), 图片宽, 图片高)
+    """
+    labels = []
+    shape_types = []
+    flags = []
+    points_list = []
+    for shape in data.get('shapes', []):
+        labels.append(str(shape.get('label', '')))
+        shape_type = shape.get('shape_type')
+        shape_types.append("" if shape_type is None else str(shape_type))
+
+        try:
+            points = np.asarray(shape.get('points', []), dtype=np.float64)
+            if points.size == 0:
+                points = points.reshape(0, 2)
+            valid = points.ndim == 2 and points.shape[1] == 2
+        except (TypeError, ValueError):
+            valid = False
+        if not valid:
+            points = np.empty((0, 2), dtype=np.float64)
+        flags.append(0 if valid else SHAPE_FLAG_INVALID_POINTS)
+        points_list.append(points)
+
+    coords = np.concatenate(points_list) if points_list else np.empty((0, 2), dtype=np.float64)
+    return (
+        labels, shape_types, flags, [len(points) for points in points_list], coords,
+        _to_int(data.get('imageWidth')), _to_int(data.get('imageHeight')),
+    )
+
+
+def _parse_file_chunk(json_paths: list[str]) -> list[tuple[str | None, tuple | None]]:
+    """在子进程中逐个读取并解析一块 JSON，返回 [(读取错误信息或 None, _extract_columns 的结果或 None)]。"""
+    outcomes = []
+    for json_path in json_paths:
+        try:
+            outcomes.append((None, _extract_columns(read_labelme_shapes(json_path))))
+        except Exception as e:
+            outcomes.append((str(e), None))
+    return outcomes
+
+
+class _ParsedFiles:
+    """增量更新时新解析文件的临时列式缓冲。"""
+
+    def __init__(self, labels: list[str], shape_types: list[str], errors: list[str]):
+        self.labels = labels
+        self.label_ids = {label: i for i, label in enumerate(labels)}
+        self.shape_types = shape_types
+        self.type_ids = {shape_type: i for i, shape_type in enumerate(shape_types)}
+        self.errors = errors
+        self.error_ids = {error: i for i, error in enumerate(errors)}
+
+        self.sizes = []
+        self.mtimes = []
+        self.error_refs = []
+        self.widths = []
+        self.heights = []
+        self.shape_counts = []
+        self.shape_labels = []
+        self.shape_type_refs = []
+        self.shape_flags = []
+        self.point_counts = []
+        self.coords = []
+
+    def _intern(self, table: list[str], ids: dict[str, int], value: str) -> int:
+        ref = ids.get(value)
+        if ref is None:
+            ref = ids[value] = len(table)
+            table.append(value)
+        return ref
+
+    def add(self, prefetched: PrefetchedAnnotation, size: int, mtime_ns: int) -> None:
+        """解析预读的文件并追加到缓冲，失败时只记录错误信息。"""
+        try:
+            columns = _extract_columns(prefetched.parse())
+        except Exception as e:
+            self.add_columns(size, mtime_ns, str(e), None)
+            return
+        self.add_columns(size, mtime_ns, None, columns)
+
+    def add_columns(self, size: int, mtime_ns: int, error: str | None, columns: tuple | None) -> None:
+        """追加一个文件的解析结果，error 不为空时只记录错误信息。"""
+        self.sizes.append(size)
+        self.mtimes.append(mtime_ns)
+        if error is not None:
+            self.error_refs.append(self._intern(self.errors, self.error_ids, error))
+            self.widths.append(-1)
+            self.heights.append(-1)
+            self.shape_counts.append(0)
+            return
+
+        labels, shape_types, flags, point_counts, coords, width, height = columns
+        self.error_refs.append(_NO_ERROR)
+        self.widths.append(width)
+        self.heights.append(height)
+        self.shape_counts.append(len(labels))
+        self.shape_labels.extend(self._intern(self.labels, self.label_ids, label) for label in labels)
+        self.shape_type_refs.extend(
+            self._intern(self.shape_types, self.type_ids, shape_type) for shape_type in shape_types
+        )
+        self.shape_flags.extend(flags)
+        self.point_counts.extend(point_counts)
+        if len(coords):
+            self.coords.append(coords)
+
+
+class AnnotationIndex:
+    """数据集的列式标注索引。
+
+    文件以相对根目录的路径标识。查询方法均基于整列数组计算，十万级文件也只需毫秒级。
+    索引只反映最近一次 update() 时的文件内容，查询前需由调用方按当前文件列表更新。
+    """
+
+    def __init__(self, root_path: str):
+        self.root_path = os.path.abspath(root_path)
+        self.paths: list[str] = []
+        self.labels: list[str] = []
+        self.shape_types: list[str] = []
+        self.errors: list[str] = []
+
+        self.file_sizes = np.zeros(0, dtype=np.int64)
+        self.file_mtimes = np.zeros(0, dtype=np.int64)
+        self.file_errors = np.zeros(0, dtype=np.int32)
+        self.image_widths = np.zeros(0, dtype=np.int32)
+        self.image_heights = np.zeros(0, dtype=np.int32)
+        self.shape_offsets = np.zeros(1, dtype=np.int64)
+
+        self.shape_files = np.zeros(0, dtype=np.int32)
+        self.shape_labels = np.zeros(0, dtype=np.int32)
+        self.shape_type_ids = np.zeros(0, dtype=np.int32)
+        self.shape_flags = np.zeros(0, dtype=np.uint8)
+        self.point_offsets = np.zeros(1, dtype=np.int64)
+        self.coords = np.zeros((0, 2), dtype=np.float64)
+
+        self._path_ids: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    @classmethod
+    def load(cls, index_path: str, root_path: str) -> "AnnotationIndex":
+        """从 .npz 文件加载索引，文件不存在、损坏、版本或根目录不一致时返回空索引。"""
+        index = cls(root_path)
+        try:
+            with np.load(index_path, allow_pickle=False) as archive:
+                if int(archive["version"]) != INDEX_FORMAT_VERSION:
+                    return index
+                tables = {
+                    name: _unpack_strings(archive[f"{name}_blob"], archive[f"{name}_offsets"])
+                    for name in _STRING_TABLES
+                }
+                root_blob = archive["root"].tobytes().decode("utf-8", "surrogatepass")
+                if os.path.normcase(root_blob) != os.path.normcase(index.root_path):
+                    return index
+
+                index.paths = tables["paths"]
+                index.labels = tables["labels"]
+                index.shape_types = tables["shape_types"]
+                index.errors = tables["errors"]
+                for name in (
+                    "file_sizes", "file_mtimes", "file_errors", "image_widths", "image_heights",
+                    "shape_offsets", "shape_files", "shape_labels", "shape_type_ids", "shape_flags",
+                    "point_offsets", "coords",
+                ):
+                    setattr(index, name, archive[name])
+        except (OSError, KeyError, ValueError, UnicodeDecodeError):
+            return cls(root_path)
+
+        index._path_ids = {path: i for i, path in enumerate(index.paths)}
+        return index
+
+    def save(self, index_path: str) -> bool:
+        """写入 .npz 文件，先写临时文件再替换，失败时返回 False。"""
+        arrays = {
+            "version": np.array(INDEX_FORMAT_VERSION),
+            "root": np.frombuffer(self.root_path.encode("utf-8", "surrogatepass"), dtype=np.uint8),
+            "file_sizes": self.file_sizes,
+            "file_mtimes": self.file_mtimes,
+            "file_errors": self.file_errors,
+            "image_widths": self.image_widths,
+            "image_heights": self.image_heights,
+            "shape_offsets": self.shape_offsets,
+            "shape_files": self.shape_files,
+            "shape_labels": self.shape_labels,
+            "shape_type_ids": self.shape_type_ids,
+            "shape_flags": self.shape_flags,
+            "point_offsets": self.point_offsets,
+            "coords": self.coords,
+        }
+        for name in _STRING_TABLES:
+            arrays[f"{name}_blob"], arrays[f"{name}_offsets"] = _pack_strings(getattr(self, name))
+
+        temp_path = None
+        try:
+            index_dir = os.path.dirname(index_path)
+            os.makedirs(index_dir, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(prefix=".tmp_", suffix=".npz", dir=index_dir)
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(temp_path, index_path)
+            return True
+        except OSError:
+            if temp_path is not None:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+            return False
+
+    def update(
+        self,
+        json_paths: list[str],
+        progress: ProgressCallback | None = None,
+        cancel: CancelToken | None = None,
+        prune: bool = True,
+        processes: int | None = None,
+        chunk_size: int | None = None,
+    ) -> dict:
+        """按当前文件列表增量更新索引。
+
+        (size, mtime_ns) 未变化的文件直接复用原有记录，其余文件重新解析，不在列表中的文件移除。
+        更新后文件顺序与 json_paths 一致。
+        processes 大于 1 时先 stat 全部文件，再将需要重新解析的文件分块交给进程池解析。
+
+        参数:
+            json_paths: 当前数据集中全部 JSON 文件路径
+            progress: 进度回调，每处理一个文件累计一次
+            cancel: 取消令牌，取消后索引只包含已处理的文件
+            prune: 是否移除不在列表中的文件；只处理部分文件（如按清单增量运行）时传 False，
+                其余文件的记录原样保留在列表之后
+            processes: 解析用的进程数，为空时使用 set_parse_processes 设置的默认值
+            chunk_size: 每个进程每次处理的文件数，为空时使用默认块大小
+
+        返回:
+            {'reused': int, 'parsed': int, 'removed': int}
+        """
+        old_count = len(self.paths)
+        parsed = _ParsedFiles(list(self.labels), list(self.shape_types), list(self.errors))
+        sources = []
+        new_paths = []
+        reporter = ProgressReporter(progress, "更新标注索引", total_files=len(json_paths))
+
+        if (get_parse_processes() if processes is None else processes) > 1:
+            self._update_parallel(json_paths, parsed, sources, new_paths, reporter, cancel, processes, chunk_size)
+        else:
+            for _json_path, (rel_path, old_id, size, mtime_ns, prefetched), _error in iter_read_ahead(
+                json_paths, self._stat_or_prefetch, cancel=cancel,
+            ):
+                if is_cancelled(cancel):
+                    break
+                reporter.advance(files=1)
+                if prefetched is None:
+                    sources.append(old_id)
+                else:
+                    sources.append(old_count + len(parsed.sizes))
+                    parsed.add(prefetched, size, mtime_ns)
+                new_paths.append(rel_path)
+        reporter.finish()
+
+        if not prune and not is_cancelled(cancel):
+            visited = set(new_paths)
+            for old_id, path in enumerate(self.paths):
+                if path not in visited:
+                    sources.append(old_id)
+                    new_paths.append(path)
+
+        reused = sum(1 for source in sources if source < old_count)
+        removed = old_count - reused
+        self._merge(parsed, np.asarray(sources, dtype=np.int64), new_paths)
+        return {'reused': reused, 'parsed': len(sources) - reused, 'removed': removed}
+
+    def _update_parallel(
+        self,
+        json_paths: list[str],
+        parsed: _ParsedFiles,
+        sources: list[int],
+        new_paths: list[str],
+        reporter: ProgressReporter,
+        cancel: CancelToken | None,
+        processes: int | None,
+        chunk_size: int | None,
+    ) -> None:
+        """update 的多进程路径：先 stat 全部文件，再由进程池解析有变化的文件，结果按顺序写入 parsed。"""
+        old_count = len(self.paths)
+        stale_paths = []
+        stale_stats = []
+        for json_path, (rel_path, old_id, size, mtime_ns), _error in iter_read_ahead(
+            json_paths, self._stat_file, cancel=cancel,
+        ):
+            if is_cancelled(cancel):
+                break
+            if old_id is None:
+                sources.append(old_count + len(stale_paths))
+                stale_paths.append(json_path)
+                stale_stats.append((size, mtime_ns))
+            else:
+                sources.append(old_id)
+                reporter.advance(files=1)
+            new_paths.append(rel_path)
+
+        if stale_paths:
+            outcomes = iter_process_chunks(
+                stale_paths, _parse_file_chunk, processes=processes, chunk_size=chunk_size, cancel=cancel,
+            )
+            for (size, mtime_ns), (_json_path, outcome, chunk_error) in zip(stale_stats, outcomes):
+                if chunk_error is not None:
+                    parsed.add_columns(size, mtime_ns, str(chunk_error), None)
+                else:
+                    parsed.add_columns(size, mtime_ns, *outcome)
+                reporter.advance(files=1)
+
+        # 取消后进程池可能没有解析完全部文件，只保留已有记录的文件
+        if len(parsed.sizes) < len(stale_paths):
+            limit = old_count + len(parsed.sizes)
+            kept = [i for i, source in enumerate(sources) if source < limit]
+            sources[:] = [sources[i] for i in kept]
+            new_paths[:] = [new_paths[i] for i in kept]
+
+    def _stat_file(self, json_path: str) -> tuple[str, int | None, int, int]:
+        """stat 文件，未变化时返回原记录 id，否则返回 None 表示需要重新解析。
+
+        返回:
+            (相对路径, 可复用的原记录 id 或 None, size, mtime_ns)
+        """
+        rel_path = os.path.relpath(json_path, self.root_path)
+        try:
+            stat = os.stat(json_path)
+            size, mtime_ns = stat.st_size, stat.st_mtime_ns
+        except OSError:
+            size, mtime_ns = _UNKNOWN_SIZE, _UNTRUSTED_MTIME
+
+        old_id = self._path_ids.get(rel_path)
+        if (
+            old_id is not None
+            and mtime_ns != _UNTRUSTED_MTIME
+            and self.file_mtimes[old_id] == mtime_ns
+            and self.file_sizes[old_id] == size
+        ):
+            return rel_path, old_id, size, mtime_ns
+
+        # mtime 距当前时间过近时记为不可信，下次更新必定重新解析
+        if time.time_ns() - mtime_ns < RACY_MTIME_WINDOW_NS:
+            mtime_ns = _UNTRUSTED_MTIME
+        return rel_path, None, size, mtime_ns
+
+    def _stat_or_prefetch(self, json_path: str) -> tuple[str, int | None, int, int, PrefetchedAnnotation | None]:
+        """读取阶段：stat 文件，未变化时返回原记录 id，否则预读文件内容。
+
+        返回:
+            (相对路径, 可复用的原记录 id, size, mtime_ns, 预读结果或 None)
+        """
+        rel_path, old_id, size, mtime_ns = self._stat_file(json_path)
+        prefetched = None if old_id is not None else prefetch_labelme_shapes(json_path)
+        return rel_path, old_id, size, mtime_ns, prefetched
+
+    def _merge(self, parsed: _ParsedFiles, sources: np.ndarray, new_paths: list[str]) -> None:
+        """将原有记录与新解析的记录拼为一个池，再按 sources 顺序取出。"""
+        new_shape_offsets = np.zeros(len(parsed.shape_counts) + 1, dtype=np.int64)
+        np.cumsum(parsed.shape_counts, out=new_shape_offsets[1:])
+        new_point_offsets = np.zeros(len(parsed.point_counts) + 1, dtype=np.int64)
+        np.cumsum(parsed.point_counts, out=new_point_offsets[1:])
+
+        shape_offsets = np.concatenate([self.shape_offsets[:-1], new_shape_offsets + self.shape_offsets[-1]])
+        point_offsets = np.concatenate([self.point_offsets[:-1], new_point_offsets + self.point_offsets[-1]])
+        coords = np.concatenate([self.coords, *parsed.coords]) if parsed.coords else self.coords
+
+        pool = {
+            "file_sizes": np.concatenate([self.file_sizes, np.asarray(parsed.sizes, dtype=np.int64)]),
+            "file_mtimes": np.concatenate([self.file_mtimes, np.asarray(parsed.mtimes, dtype=np.int64)]),
+            "file_errors": np.concatenate([self.file_errors, np.asarray(parsed.error_refs, dtype=np.int32)]),
+            "image_widths": np.concatenate([self.image_widths, np.asarray(parsed.widths, dtype=np.int32)]),
+            "image_heights": np.concatenate([self.image_heights, np.asarray(parsed.heights, dtype=np.int32)]),
+        }
+        shape_pool = {
+            "shape_labels": np.concatenate([self.shape_labels, np.asarray(parsed.shape_labels, dtype=np.int32)]),
+            "shape_type_ids": np.concatenate([
+                self.shape_type_ids, np.asarray(parsed.shape_type_refs, dtype=np.int32),
+            ]),
+            "shape_flags": np.concatenate([self.shape_flags, np.asarray(parsed.shape_flags, dtype=np.uint8)]),
+        }
+
+        shape_ids, self.shape_offsets = _gather_ranges(shape_offsets, sources)
+        point_ids, self.point_offsets = _gather_ranges(point_offsets, shape_ids)
+        for name, values in pool.items():
+            setattr(self, name, values[sources])
+        for name, values in shape_pool.items():
+            setattr(self, name, values[shape_ids])
+        self.coords = coords[point_ids]
+        self.shape_files = np.repeat(
+            np.arange(len(sources), dtype=np.int32), np.diff(self.shape_offsets),
+        )
+
+        self.labels, self.shape_labels = _compact_vocabulary(parsed.labels, self.shape_labels)
+        self.shape_types, self.shape_type_ids = _compact_vocabulary(parsed.shape_types, self.shape_type_ids)
+        self.errors, self.file_errors = _compact_vocabulary(parsed.errors, self.file_errors, keep_missing=True)
+        self.paths = new_paths
+        self._path_ids = {path: i for i, path in enumerate(new_paths)}
+
+    def file_id(self, json_path: str) -> int | None:
+        """按路径查找文件 id，不在索引中时返回 None。"""
+        return self._path_ids.get(os.path.relpath(json_path, self.root_path))
+
+    def current_file_id(self, json_path: str) -> int | None:
+        """查找文件 id，并确认文件 (size, mtime_ns) 与索引记录一致，否则返回 None。"""
+        file_id = self.file_id(json_path)
+        if file_id is None:
+            return None
+        try:
+            stat = os.stat(json_path)
+        except OSError:
+            return None
+        if self.file_mtimes[file_id] != stat.st_mtime_ns or self.file_sizes[file_id] != stat.st_size:
+            return None
+        return file_id
+
+    def file_error(self, file_id: int) -> str | None:
+        """返回文件的读取/解析错误信息，读取成功时返回 None。"""
+        error_ref = int(self.file_errors[file_id])
+        return self.errors[error_ref] if error_ref != _NO_ERROR else None
+
+    def shape_counts(self) -> np.ndarray:
+        """每个文件的形状数，读取失败的文件为 0。"""
+        return np.diff(self.shape_offsets)
+
+    def shape_points(self, shape_id: int) -> np.ndarray:
+        """返回单个形状的点坐标，float64 (N, 2)，为坐标数组的视图。"""
+        return self.coords[self.point_offsets[shape_id]:self.point_offsets[shape_id + 1]]
+
+    def _stripped_label_lookup(self, labels) -> np.ndarray:
+        """将词表中的标签去除首尾空白后映射为 labels 中的位置，不在其中的为 -1。"""
+        positions = {label: i for i, label in enumerate(labels)}
+        return np.array([positions.get(label.strip(), -1) for label in self.labels], dtype=np.int64)
+
+    def label_count_matrix(self, ordered_labels: list[str]) -> np.ndarray:
+        """统计每个文件中各标签的出现次数。
+
+        标签按去除首尾空白后的文本匹配。
+
+        返回:
+            int64 矩阵 (文件数, 标签数)，列顺序与 ordered_labels 一致
+        """
+        columns = self._stripped_label_lookup(ordered_labels)[self.shape_labels]
+        matched = columns >= 0
+        flat = self.shape_files[matched].astype(np.int64) * len(ordered_labels) + columns[matched]
+        counts = np.bincount(flat, minlength=len(self.paths) * len(ordered_labels))
+        return counts.reshape(len(self.paths), len(ordered_labels))
+
+    def label_count_rows(self, ordered_labels: list[str]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """以稀疏行（CSR）形式统计每个文件中各标签的出现次数，只记录非零项。
+
+        标签按去除首尾空白后的文本匹配。
+
+        返回:
+            (offsets, columns, counts) - 文件 i 的非零项为 columns/counts[offsets[i]:offsets[i + 1]]，
+            offsets 为 int64 (文件数 + 1,)，columns 为 ordered_labels 中的位置 (int32)，counts 为 int32
+        """
+        columns = self._stripped_label_lookup(ordered_labels)[self.shape_labels]
+        matched = columns >= 0
+        label_total = max(len(ordered_labels), 1)
+        flat = self.shape_files[matched].astype(np.int64) * label_total + columns[matched]
+        keys, counts = np.unique(flat, return_counts=True)
+        file_ids, columns = np.divmod(keys, label_total)
+        offsets = np.searchsorted(file_ids, np.arange(len(self.paths) + 1))
+        return offsets.astype(np.int64), columns.astype(np.int32), counts.astype(np.int32)
+
+    def invalid_labels(self, valid_labels: set[str]) -> dict[int, list[str]]:
+        """找出每个文件中不在 valid_labels 内的非空标签（去除首尾空白后比较）。
+
+        返回:
+            {文件 id: 无效标签列表}，标签去重后按在文件中首次出现的顺序排列，与逐个解析文件的结果一致；
+            没有无效标签的文件不出现
+        """
+        if not len(self.labels):
+            return {}
+        stripped = [label.strip() for label in self.labels]
+        # 多个原始标签可能去除空白后相同，按去除空白后的标签去重
+        stripped_names, stripped_ids = np.unique(np.array(stripped, dtype=object), return_inverse=True)
+        invalid_names = np.array([bool(label) and label not in valid_labels for label in stripped_names], dtype=bool)
+        shape_ids = np.flatnonzero(invalid_names[stripped_ids[self.shape_labels]])
+        keys = self.shape_files[shape_ids].astype(np.int64) * len(stripped_names) + stripped_ids[self.shape_labels[shape_ids]]
+        pairs, first_shapes = np.unique(keys, return_index=True)
+
+        result: dict[int, list[str]] = {}
+        for key in pairs[np.argsort(shape_ids[first_shapes], kind='stable')]:
+            file_id, name_id = divmod(int(key), len(stripped_names))
+            result.setdefault(file_id, []).append(stripped_names[name_id])
+        return result
+
+    def label_shape_stats(self, file_ids: np.ndarray | None = None) -> dict[tuple[str, str], list[int]]:
+        """按 (去除首尾空白的标签, 形状类型) 汇总形状数与顶点数。
+
+        参数:
+            file_ids: 只统计这些文件中的形状，为空时统计全部文件
+
+        返回:
+            {(标签, 形状类型): [形状数, 顶点总数, 最少顶点数, 最多顶点数]}，坐标无法解析的形状顶点数记为 0
+        """
+        if file_ids is None:
+            mask = np.ones(len(self.shape_files), dtype=bool)
+        else:
+            mask = np.isin(self.shape_files, np.asarray(file_ids, dtype=np.int64))
+        if not mask.any():
+            return {}
+
+        stripped = [label.strip() for label in self.labels]
+        label_names, label_map = np.unique(np.array(stripped, dtype=object), return_inverse=True)
+        type_count = max(len(self.shape_types), 1)
+        keys = label_map[self.shape_labels[mask]].astype(np.int64) * type_count + self.shape_type_ids[mask]
+        vertices = np.diff(self.point_offsets)[mask]
+
+        unique_keys, groups = np.unique(keys, return_inverse=True)
+        counts = np.bincount(groups)
+        totals = np.bincount(groups, weights=vertices).astype(np.int64)
+        minimums = np.full(len(unique_keys), np.iinfo(np.int64).max, dtype=np.int64)
+        maximums = np.zeros(len(unique_keys), dtype=np.int64)
+        np.minimum.at(minimums, groups, vertices)
+        np.maximum.at(maximums, groups, vertices)
+
+        stats = {}
+        for key, count, total, minimum, maximum in zip(
+            unique_keys.tolist(), counts.tolist(), totals.tolist(), minimums.tolist(), maximums.tolist(),
+        ):
+            label_id, type_id = divmod(key, type_count)
+            stats[(label_names[label_id], self.shape_types[type_id])] = [count, total, minimum, maximum]
+        return stats
+
+    def polygon_candidates(self) -> np.ndarray:
+        """每个文件是否含有需要几何计算的 polygon（至少 3 个点或坐标无法解析）。
+
+        读取失败的文件也标记为 True，由调用方按原方式处理并报告错误。
+        """
+        if "polygon" in self.shape_types:
+            is_polygon = self.shape_type_ids == self.shape_types.index("polygon")
+        else:
+            is_polygon = np.zeros(len(self.shape_type_ids), dtype=bool)
+        point_counts = np.diff(self.point_offsets)
+        needs_check = is_polygon & ((point_counts >= 3) | (self.shape_flags & SHAPE_FLAG_INVALID_POINTS != 0))
+
+        candidates = np.bincount(self.shape_files[needs_check], minlength=len(self.paths)) > 0
+        return candidates | (self.file_errors != _NO_ERROR)
+
+
+def get_annotation_index_path(root_path: str) -> str:
+    """获取根目录对应的索引文件路径，位于用户缓存目录下。"""
+    root_key = os.path.normcase(os.path.abspath(root_path)).encode("utf-8", "surrogatepass")
+    file_name = hashlib.sha1(root_key).hexdigest() + ".npz"
+    return os.path.join(get_user_cache_dir(), INDEX_DIR_NAME, file_name)
+
+
+def open_annotation_index(
+    root_path: str,
+    json_paths: list[str],
+    progress: ProgressCallback | None = None,
+    cancel: CancelToken | None = None,
+    index_path: str | None = None,
+    prune: bool = True,
+    processes: int | None = None,
+    chunk_size: int | None = None,
+) -> AnnotationIndex:
+    """加载根目录的标注索引，按当前文件列表增量更新后写回。
+
+    参数:
+        root_path: 数据集根目录
+        json_paths: 当前全部 JSON 文件路径
+        progress: 进度回调
+        cancel: 取消令牌，取消后返回只包含已处理文件的索引，且不写回
+        index_path: 索引文件路径，为空时使用用户缓存目录
+        prune: 是否移除不在 json_paths 中的文件，json_paths 只是数据集的一部分时传 False
+        processes: 解析有变化的文件所用的进程数，为空时使用 set_parse_processes 设置的默认值
+        chunk_size: 每个进程每次处理的文件数，为空时使用默认块大小
+
+    返回:
+        AnnotationIndex 实例；索引文件无法写入时仍返回内存中的索引
+    """
+    if index_path is None:
+        index_path = get_annotation_index_path(root_path)
+
+    index = AnnotationIndex.load(index_path, root_path)
+    update_stats = index.update(
+        json_paths, progress=progress, cancel=cancel, prune=prune, processes=processes, chunk_size=chunk_size,
+    )
+    if not is_cancelled(cancel) and (update_stats['parsed'] or update_stats['removed']):
+        index.save(index_path)
+    return index
+
+
+def load_annotation_index(root_path: str, index_path: str | None = None) -> AnnotationIndex:
+    """只加载已有的标注索引，不更新。查询前应使用 current_file_id 确认文件未被修改。"""
+    if index_path is None:
+        index_path = get_annotation_index_path(root_path)
+    return AnnotationIndex.load(index_path, root_path)
@@ -0,0 +1,71 @@
+"""
+任务取消模块
+
+提供协作式取消令牌：扫描与批处理在目录之间、文件之间检查令牌，
+被取消或超过截止时间后尽快停止，并返回已处理部分的统计与报告。
+"""
+
+import threading
+import time
+
+
+CANCEL_REASON_USER = "用户取消"
+CANCEL_REASON_DEADLINE = "超过截止时间"
+
+
+class CancelToken:
+    """协作式取消令牌，可附带截止时间。
+
+    cancel() 可在任意线程调用；cancelled 在被取消或到达截止时间后返回 True。
+    提供与 threading.Event 相同的 set()/wait() 接口，可直接作为监视模式的停止信号。
+    """
+
+    def __init__(self, timeout: float | None = None):
+        """
+        参数:
+            timeout: 从创建起允许运行的秒数，为空时不设截止时间
+        """
+        self._event = threading.Event()
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        self.reason: str | None = None
+
+    def cancel(self) -> None:
+        """请求取消。"""
+        if self.reason is None:
+            self.reason = CANCEL_REASON_USER
+        self._event.set()
+
+    set = cancel
+
+    @property
+    def cancelled(self) -> bool:
+        if self._event.is_set():
+            return True
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            if self.reason is None:
+                self.reason = CANCEL_REASON_DEADLINE
+            self._event.set()
+            return True
+        return False
+
+    def is_set(self) -> bool:
+        return self.cancelled
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """等待取消或超时，返回是否已取消。截止时间早于 timeout 时提前返回。"""
+        if self.deadline is not None:
+            remaining = max(self.deadline - time.monotonic(), 0.0)
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        self._event.wait(timeout)
+        return self.cancelled
+
+
+def is_cancelled(cancel: CancelToken | None) -> bool:
+    """判断可选的取消令牌是否已取消。"""
+    return cancel is not None and cancel.cancelled
+
+
+def format_cancel_note(cancel: CancelToken, done: int, total: int | None = None) -> str:
+    """生成写入部分报告的中文说明。"""
+    progress_text = f"{done}/{total}" if total is not None else str(done)
+    return f"任务已中止（{cancel.reason or CANCEL_REASON_USER}），仅处理了 {progress_text} 个，结果不完整"
@@ -4,41 +4,104 @@
 提供文件扫描的公共函数，支持统一的图片格式处理
 """
 
+import fnmatch
 import os
+import re
+import threading
+import time
+from array import array
+from collections.abc import Mapping, Sequence
+from concurrent.futures import FIRST_COMPLETED, CancelledError, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from pathlib import Path
 from typing import Generator
 
+from .cancellation import CancelToken, is_cancelled
+from .progress import ProgressCallback, ProgressReporter
+from .scan_cache import ScanCache, open_scan_cache
+
 
 IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.tif', '.tiff')
 
+# 各工具生成的结果目录，扫描输入时统一跳过
+TOOL_OUTPUT_EXCLUDES = ("重叠检查结果", "抽样结果*", "照片检查+")
+
+# 目录遍历默认并发线程数，1 表示串行遍历
+_scan_workers = 1
+
+# 整树统计默认进程数，1 表示不分片
+_scan_processes = 1
+
+
+class ExcludeMatcher:
+    """预编译的目录排除规则，在遍历时对子目录剪枝。
 
-def _should_exclude_path(path: Path, exclude_dirs: list[str] | None) -> bool:
-    """判断路径是否应被排除。
+    支持三类规则：
+    - 目录名，如 "抽样结果"，匹配任意层级的同名目录
+    - 路径，如绝对路径或相对当前目录的路径，匹配该目录及其子树
+    - glob 通配模式，如 "抽样结果*"；不含路径分隔符时按目录名匹配，否则按完整路径匹配
 
-    支持传入目录名、相对路径或绝对路径。
+    规则只在构建时解析一次路径，遍历过程中不再对每个文件调用 resolve。
+    根目录本身不参与匹配，规则只作用于其下的子目录。
     """
-    if not exclude_dirs:
-        return False
 
-    path_parts = set(path.parts)
-    resolved_path = path.resolve()
+    def __init__(self, exclude_dirs: list[str] | None = None):
+        self.names: set[str] = set()
+        self.paths: set[str] = set()
+        name_patterns = []
+        path_patterns = []
 
-    for exclude in exclude_dirs:
-        if not exclude:
-            continue
+        for exclude in exclude_dirs or []:
+            exclude = str(exclude).strip() if exclude else ""
+            if not exclude:
+                continue
 
-        exclude_path = Path(exclude)
-        exclude_name = exclude_path.name
-        if exclude_name and exclude_name in path_parts:
-            return True
+            has_separator = "/" in exclude or "\\" in exclude
+            is_pattern = any(char in exclude for char in "*?[")
 
-        try:
-            resolved_path.relative_to(exclude_path.resolve())
+            if is_pattern and has_separator:
+                path_patterns.append(fnmatch.translate(os.path.normcase(os.path.abspath(exclude))))
+            elif is_pattern:
+                name_patterns.append(fnmatch.translate(os.path.normcase(exclude)))
+            elif has_separator:
+                self.paths.add(os.path.normcase(os.path.abspath(exclude)))
+                self.paths.add(os.path.normcase(os.path.realpath(exclude)))
+            else:
+                self.names.add(os.path.normcase(exclude))
+
+        self._name_regex = re.compile("|".join(name_patterns)) if name_patterns else None
+        self._path_regex = re.compile("|".join(path_patterns)) if path_patterns else None
+
+    @classmethod
+    def compile(cls, exclude_dirs: "list[str] | ExcludeMatcher | None") -> "ExcludeMatcher":
+        """将排除列表编译为匹配器，已是匹配器时原样返回。"""
+        if isinstance(exclude_dirs, ExcludeMatcher):
+            return exclude_dirs
+        return cls(exclude_dirs)
+
+    def __bool__(self) -> bool:
+        return bool(self.names or self.paths or self._name_regex or self._path_regex)
+
+    def matches(self, dir_path: str, name: str) -> bool:
+        """判断子目录是否应被排除。
+
+        参数:
+            dir_path: 子目录完整路径
+            name: 子目录名
+        """
+        name_key = os.path.normcase(name)
+        if name_key in self.names:
+            return True
+        if self._name_regex is not None and self._name_regex.match(name_key):
             return True
-        except Exception:
-            continue
 
-    return False
+        if self.paths or self._path_regex is not None:
+            path_key = os.path.normcase(os.path.abspath(dir_path))
+            if path_key in self.paths:
+                return True
+            if self._path_regex is not None and self._path_regex.match(path_key):
+                return True
+
+        return False
 
 
 def is_image_file(filename: str) -> bool:
@@ -47,302 +110,1182 @@ def is_image_file(filename: str) -> bool:
     return ext.lower() in IMAGE_EXTENSIONS
 
 
-def get_leaf_folders(root_path: str) -> list[str]:
+_EXTENSION_SLOTS = {ext: slot for slot, ext in enumerate(IMAGE_EXTENSIONS)}
+
+
+class _Record:
+    """__slots__ 记录的字典式只读访问，兼容原先以 dict 返回的结果。"""
+
+    __slots__ = ()
+
+    def __getitem__(self, key: str):
+        if key in self.__slots__:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key: str, default=None):
+        if key in self.__slots__:
+            return getattr(self, key)
+        return default
+
+    def keys(self) -> tuple[str, ...]:
+        return self.__slots__
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{key}={getattr(self, key)!r}" for key in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class ImageCounts(Mapping):
+    """按 IMAGE_EXTENSIONS 顺序存放各格式图片数量的定长计数数组。
+
+    以只读映射方式访问，如 counts['.jpg']、counts.items()。
+    """
+
+    __slots__ = ("_counts",)
+
+    def __init__(self, counts=None):
+        self._counts = array("q", counts if counts is not None else bytes(8 * len(IMAGE_EXTENSIONS)))
+
+    def __getitem__(self, ext: str) -> int:
+        return self._counts[_EXTENSION_SLOTS[ext]]
+
+    def __iter__(self):
+        return iter(IMAGE_EXTENSIONS)
+
+    def __len__(self) -> int:
+        return len(IMAGE_EXTENSIONS)
+
+    def add_file(self, file_name: str) -> None:
+        """按文件扩展名累加一张图片。"""
+        self._counts[_EXTENSION_SLOTS[os.path.splitext(file_name)[1].lower()]] += 1
+
+    def merge(self, other: "ImageCounts") -> None:
+        """累加另一组计数。"""
+        counts = self._counts
+        for slot, count in enumerate(other._counts):
+            counts[slot] += count
+
+    def subtract(self, other: "ImageCounts") -> None:
+        """扣除另一组计数。"""
+        counts = self._counts
+        for slot, count in enumerate(other._counts):
+            counts[slot] -= count
+
+    def to_list(self) -> list[int]:
+        return self._counts.tolist()
+
+    def __repr__(self) -> str:
+        return f"ImageCounts({dict(self)!r})"
+
+
+class SpecialPair(_Record):
+    """特殊配对：同名多格式图片加一个 JSON。
+
+    folder 与所在目录的配对统计共享同一个路径字符串对象，不为每组配对单独保存。
+    """
+
+    __slots__ = ("folder", "name", "files")
+
+    def __init__(self, folder: str, name: str, files: tuple[str, ...]):
+        self.folder = folder
+        self.name = name
+        self.files = files
+
+
+class DirPairing(_Record):
+    """单个目录的配对统计，字段与原 scan_leaf_dir 返回的字典一致。"""
+
+    __slots__ = ("paired", "orphan_image", "orphan_json", "special_pairs", "image_counts", "json_count")
+
+    def __init__(
+        self,
+        paired: int,
+        orphan_image: int,
+        orphan_json: int,
+        special_pairs: tuple[SpecialPair, ...],
+        image_counts: ImageCounts,
+        json_count: int,
+    ):
+        self.paired = paired
+        self.orphan_image = orphan_image
+        self.orphan_json = orphan_json
+        self.special_pairs = special_pairs
+        self.image_counts = image_counts
+        self.json_count = json_count
+
+    def to_state(self) -> list:
+        """转换为可 JSON 序列化的紧凑列表，目录路径不重复保存。"""
+        return [
+            self.paired,
+            self.orphan_image,
+            self.orphan_json,
+            self.json_count,
+            self.image_counts.to_list(),
+            [[pair.name, list(pair.files)] for pair in self.special_pairs],
+        ]
+
+    @classmethod
+    def from_state(cls, folder: str, state: list) -> "DirPairing":
+        """从 to_state 的结果恢复。"""
+        paired, orphan_image, orphan_json, json_count, counts, special_pairs = state
+        return cls(
+            paired,
+            orphan_image,
+            orphan_json,
+            tuple(SpecialPair(folder, name, tuple(files)) for name, files in special_pairs),
+            ImageCounts(counts),
+            json_count,
+        )
+
+
+class FolderTable:
+    """目录路径驻留表，为每个目录分配整数编号，同一路径只保存一份。"""
+
+    __slots__ = ("_paths", "_ids")
+
+    def __init__(self):
+        self._paths: list[str] = []
+        self._ids: dict[str, int] = {}
+
+    def intern(self, folder: str) -> int:
+        """返回目录编号，首次出现时登记。"""
+        folder_id = self._ids.get(folder)
+        if folder_id is None:
+            folder_id = len(self._paths)
+            self._ids[folder] = folder_id
+            self._paths.append(folder)
+        return folder_id
+
+    def __getitem__(self, folder_id: int) -> str:
+        return self._paths[folder_id]
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+
+class PathList(Sequence):
+    """按 (目录编号, 文件名) 保存的文件路径序列，访问时才拼接完整路径。
+
+    大量孤立文件分布在少量目录中时，避免为每个文件保存一份完整路径字符串。
+    """
+
+    __slots__ = ("_folders", "_folder_ids", "_names")
+
+    def __init__(self, folders: FolderTable | None = None):
+        self._folders = folders if folders is not None else FolderTable()
+        self._folder_ids = array("I")
+        self._names: list[str] = []
+
+    def add_dir(self, folder: str, file_names: list[str]) -> None:
+        """登记同一目录下的多个文件。"""
+        if not file_names:
+            return
+        folder_id = self._folders.intern(folder)
+        self._folder_ids.extend([folder_id] * len(file_names))
+        self._names.extend(file_names)
+
+    def extend(self, other: "PathList") -> None:
+        """追加另一个序列中的全部路径。"""
+        folders = other._folders
+        last_id = None
+        local_id = None
+        for folder_id in other._folder_ids:
+            if folder_id != last_id:
+                last_id = folder_id
+                local_id = self._folders.intern(folders[folder_id])
+            self._folder_ids.append(local_id)
+        self._names.extend(other._names)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self._names)))]
+        return os.path.join(self._folders[self._folder_ids[position]], self._names[position])
+
+    def __iter__(self):
+        folders = self._folders
+        join = os.path.join
+        for folder_id, file_name in zip(self._folder_ids, self._names):
+            yield join(folders[folder_id], file_name)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (PathList, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"PathList({len(self)} 个文件)"
+
+
+class DirectoryIndex:
+    """目录索引，使用 os.scandir 单次遍历构建。
+
+    按目录记录图片与 JSON 文件名，各扫描函数共享同一份索引，
+    避免对同一目录树重复 walk 和 listdir。遍历顺序与 os.walk 一致。
+    """
+
+    def __init__(self, root_path: str):
+        self.root_path = root_path
+        self.dirs: list[str] = []
+        self.subdirs: dict[str, list[str]] = {}
+        self.image_files: dict[str, list[str]] = {}
+        self.json_files: dict[str, list[str]] = {}
+        self.pairings: dict[str, DirPairing] = {}
+        self.relisted_count = 0
+
+    @classmethod
+    def build(
+        cls,
+        root_path: str,
+        exclude_dirs: "list[str] | ExcludeMatcher | None" = None,
+        cache: ScanCache | None = None,
+        workers: int | None = None,
+        progress: ProgressCallback | ProgressReporter | None = None,
+        cancel: CancelToken | None = None,
+    ) -> "DirectoryIndex":
+        """遍历根目录并构建索引。
+
+        参数:
+            root_path: 根目录路径
+            exclude_dirs: 要排除的目录名、路径或通配模式，遍历时直接剪枝
+            cache: 扫描缓存，提供时仅重新列出 mtime 发生变化的目录
+            workers: 并发列目录的线程数，为空时使用 set_scan_workers 设置的默认值，
+                大于 1 时使用线程池并行遍历，适合高延迟的网络共享目录
+            progress: 进度回调，遍历过程中定期接收 ScanProgress 事件
+            cancel: 取消令牌，取消后停止遍历，索引只包含已列出的目录
+
+        返回:
+            DirectoryIndex 实例，目录顺序与串行遍历一致
+        """
+        index = cls(root_path)
+        for dir_path, listing in walk_directories(root_path, exclude_dirs, cache, workers, progress, cancel):
+            subdir_names, _walk_names, image_names, json_names, pairing, relisted = listing
+            index._add_dir(dir_path, subdir_names, image_names, json_names, pairing)
+            index.relisted_count += relisted
+        return index
+
+    def _add_dir(
+        self,
+        dir_path: str,
+        subdir_names: list[str],
+        image_names: list[str],
+        json_names: list[str],
+        pairing: DirPairing | None = None,
+    ) -> None:
+        """登记单个目录的列表结果。"""
+        self.dirs.append(dir_path)
+        self.subdirs[dir_path] = subdir_names
+        self.image_files[dir_path] = image_names
+        self.json_files[dir_path] = json_names
+        if pairing is not None:
+            self.pairings[dir_path] = pairing
+
+    def __contains__(self, dir_path: str) -> bool:
+        return dir_path in self.subdirs
+
+    def get_files(self, dir_path: str) -> tuple[list[str], list[str]]:
+        """返回目录内的 (图片文件名列表, JSON 文件名列表)。"""
+        return self.image_files.get(dir_path, []), self.json_files.get(dir_path, [])
+
+    def leaf_dirs(self) -> list[str]:
+        """返回所有无子目录的目录。"""
+        return [dir_path for dir_path in self.dirs if not self.subdirs[dir_path]]
+
+    def pairable_dirs(self) -> list[str]:
+        """返回所有包含图片或 JSON 的目录。"""
+        return [dir_path for dir_path in self.dirs if self.image_files[dir_path] or self.json_files[dir_path]]
+
+
+def _scandir_listing(dir_path: str) -> tuple[list[str], list[str], list[str]]:
+    """使用 os.scandir 列出单个目录。
+
+    返回:
+        (子目录名列表, 需要继续遍历的子目录名列表, 文件名列表)
+        与 os.walk 一致，符号链接目录计入子目录但不继续遍历。
+    """
+    subdir_names = []
+    walk_names = []
+    file_names = []
+
+    with os.scandir(dir_path) as entries:
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+
+            if not is_dir:
+                file_names.append(entry.name)
+                continue
+
+            subdir_names.append(entry.name)
+            try:
+                is_symlink = entry.is_symlink()
+            except OSError:
+                is_symlink = False
+            if not is_symlink:
+                walk_names.append(entry.name)
+
+    return subdir_names, walk_names, file_names
+
+
+def walk_directories(
+    root_path: str,
+    exclude_dirs: "list[str] | ExcludeMatcher | None" = None,
+    cache: ScanCache | None = None,
+    workers: int | None = None,
+    progress: ProgressCallback | ProgressReporter | None = None,
+    cancel: CancelToken | None = None,
+) -> Generator[tuple[str, tuple], None, None]:
+    """按 os.walk 自顶向下的顺序遍历目录树。
+
+    参数:
+        root_path: 根目录路径
+        exclude_dirs: 要排除的目录名、路径或通配模式，命中的子目录整棵跳过
+        cache: 扫描缓存，提供时仅重新列出 mtime 发生变化的目录
+        workers: 并发列目录的线程数，为空时使用默认值；并发时目录一旦列出即按遍历顺序产出，不等整棵树列完
+        progress: 进度回调，按目录累计文件数并估算剩余时间
+        cancel: 取消令牌，每列出一个目录前检查一次，取消后提前结束
+
+    返回:
+        (目录路径, (子目录名, 可遍历子目录名, 图片文件名, JSON 文件名, 配对统计或 None, 是否重新列出)) 生成器
+    """
+    matcher = ExcludeMatcher.compile(exclude_dirs)
+    if workers is None:
+        workers = _scan_workers
+    cached_rows = cache.load_tree(root_path) if cache is not None else {}
+
+    def read_dir(dir_path: str) -> tuple | None:
+        try:
+            listing = _read_dir_listing(dir_path, cache, cached_rows)
+        except OSError:
+            return None
+        return _apply_exclusion(dir_path, listing, matcher)
+
+    reporter = _as_reporter(progress, "扫描目录")
+    lister = _ParallelTreeLister(root_path, read_dir, workers, cancel) if workers > 1 else None
+    if lister is not None:
+        read_dir = lister.get
+
+    stack = [root_path]
+    try:
+        while stack:
+            if is_cancelled(cancel):
+                break
+
+            current_dir = stack.pop()
+            listing = read_dir(current_dir)
+            if listing is None:
+                continue
+
+            for name in reversed(listing[1]):
+                stack.append(os.path.join(current_dir, name))
+            if reporter is not None:
+                reporter.advance(dirs=1, files=len(listing[2]) + len(listing[3]), pending_dirs=len(stack))
+
+            yield current_dir, listing
+    finally:
+        if lister is not None:
+            lister.close()
+
+    if cache is not None:
+        cache.commit()
+    if reporter is not None:
+        reporter.finish()
+
+
+def _as_reporter(
+    progress: ProgressCallback | ProgressReporter | None,
+    stage: str,
+) -> ProgressReporter | None:
+    """将进度回调包装为 ProgressReporter，已是 reporter 或为空时原样返回。"""
+    if progress is None or isinstance(progress, ProgressReporter):
+        return progress
+    return ProgressReporter(progress, stage)
+
+
+def _apply_exclusion(dir_path: str, listing: tuple, matcher: ExcludeMatcher) -> tuple:
+    """从列表结果中剔除需要排除的子目录。"""
+    if not matcher:
+        return listing
+
+    subdir_names, walk_names, image_names, json_names, pairing, relisted = listing
+    excluded = {name for name in subdir_names if matcher.matches(os.path.join(dir_path, name), name)}
+    if not excluded:
+        return listing
+
+    subdir_names = [name for name in subdir_names if name not in excluded]
+    walk_names = [name for name in walk_names if name not in excluded]
+    return subdir_names, walk_names, image_names, json_names, pairing, relisted
+
+
+class _ParallelTreeLister:
+    """使用线程池并发列出目录树，调用方按自己的顺序逐个取得列表结果。
+
+    每个目录列出后立即在同一任务中提交其子目录，使多个 listdir 请求同时在途；
+    get() 只等待所请求目录自身的结果，先完成的目录可以立即交给调用方，不必等整棵树列完。
+    取消或关闭后不再提交新目录，尚未开始的列表请求直接丢弃。
+    """
+
+    def __init__(self, root_path: str, read_dir, workers: int, cancel: CancelToken | None = None):
+        self._read_dir = read_dir
+        self._cancel = cancel
+        self._lock = threading.Lock()
+        self._futures = {}
+        self._closed = False
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._submit(root_path)
+
+    def _submit(self, dir_path: str) -> None:
+        with self._lock:
+            if self._closed or is_cancelled(self._cancel):
+                return
+            self._futures[dir_path] = self._executor.submit(self._list, dir_path)
+
+    def _list(self, dir_path: str) -> tuple | None:
+        listing = self._read_dir(dir_path)
+        if listing is not None:
+            # 子目录在本任务结束前提交，调用方取得父目录结果时子目录一定已经登记
+            for name in listing[1]:
+                self._submit(os.path.join(dir_path, name))
+        return listing
+
+    def get(self, dir_path: str) -> tuple | None:
+        """等待并取出目录的列表结果，目录未提交、已被取消或无法列出时返回 None。"""
+        with self._lock:
+            future = self._futures.pop(dir_path, None)
+        if future is None:
+            return None
+        try:
+            return future.result()
+        except CancelledError:
+            return None
+
+    def close(self) -> None:
+        """停止提交新目录，丢弃尚未开始的请求，并等待正在进行的列表完成。"""
+        with self._lock:
+            self._closed = True
+            self._futures.clear()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def set_scan_workers(workers: int) -> None:
+    """设置目录遍历的默认并发线程数，对所有工具构建的目录索引生效。
+
+    参数:
+        workers: 线程数，1 表示串行遍历；网络共享目录建议 8~32
+    """
+    global _scan_workers
+    _scan_workers = max(1, int(workers))
+
+
+def get_scan_workers() -> int:
+    """获取当前目录遍历的默认并发线程数。"""
+    return _scan_workers
+
+
+def _split_candidate_files(file_names: list[str]) -> tuple[list[str], list[str]]:
+    """将文件名拆分为图片与 JSON 两组，其他文件忽略。"""
+    image_names = []
+    json_names = []
+    for file_name in file_names:
+        if is_image_file(file_name):
+            image_names.append(file_name)
+        elif file_name.lower().endswith('.json'):
+            json_names.append(file_name)
+    return image_names, json_names
+
+
+def _count_entries(dir_path: str) -> int:
+    """统计目录中的条目数，只读取名称，不判断条目类型。"""
+    with os.scandir(dir_path) as entries:
+        return sum(1 for _entry in entries)
+
+
+def _read_dir_listing(dir_path: str, cache: ScanCache | None, cached_rows: dict[str, tuple]) -> tuple:
+    """读取单个目录的列表结果，目录 mtime 与条目数均未变化时直接使用缓存。
+
+    网络共享目录的 mtime 可能被客户端缓存而未及时更新，复用缓存前再核对一次条目数，
+    只省去逐个条目的类型判断与配对统计。
+
+    返回:
+        (子目录名, 可遍历子目录名, 图片文件名, JSON 文件名, 配对统计或 None, 是否重新列出)
+    """
+    if cache is None:
+        subdir_names, walk_names, file_names = _scandir_listing(dir_path)
+        image_names, json_names = _split_candidate_files(file_names)
+        return subdir_names, walk_names, image_names, json_names, None, 1
+
+    mtime_ns = os.stat(dir_path).st_mtime_ns
+    cached_row = cached_rows.get(dir_path)
+    if cached_row is not None and cached_row[0] == mtime_ns and cached_row[1] == _count_entries(dir_path):
+        _mtime, _count, subdir_names, walk_names, image_names, json_names, pairing_state = cached_row
+        pairing = DirPairing.from_state(dir_path, pairing_state) if pairing_state is not None else None
+        return subdir_names, walk_names, image_names, json_names, pairing, 0
+
+    listed_at_ns = time.time_ns()
+    subdir_names, walk_names, file_names = _scandir_listing(dir_path)
+    image_names, json_names = _split_candidate_files(file_names)
+    pairing = None
+    if image_names or json_names:
+        pairing = _summarize_dir(dir_path, image_names, json_names)
+
+    if cached_row is not None:
+        for removed_name in set(cached_row[2]) - set(subdir_names):
+            cache.remove_tree(os.path.join(dir_path, removed_name))
+
+    cache.store(
+        dir_path, mtime_ns, listed_at_ns, len(subdir_names) + len(file_names),
+        subdir_names, walk_names, image_names, json_names,
+        pairing.to_state() if pairing is not None else None,
+    )
+    return subdir_names, walk_names, image_names, json_names, pairing, 1
+
+
+def build_directory_index(
+    root_path: str,
+    exclude_dirs: "list[str] | ExcludeMatcher | None" = None,
+    use_cache: bool = False,
+    workers: int | None = None,
+    progress: ProgressCallback | ProgressReporter | None = None,
+    cancel: CancelToken | None = None,
+) -> DirectoryIndex:
+    """构建目录索引。
+
+    参数:
+        root_path: 根目录路径
+        exclude_dirs: 要排除的目录名、路径或通配模式
+        use_cache: 是否使用用户缓存目录中的持久化扫描缓存，缓存不可用时自动退回全量扫描
+        workers: 并发列目录的线程数，为空时使用默认值
+        progress: 进度回调
+        cancel: 取消令牌
+
+    返回:
+        DirectoryIndex 实例
+    """
+    cache = open_scan_cache() if use_cache else None
+    try:
+        return DirectoryIndex.build(
+            root_path, exclude_dirs=exclude_dirs, cache=cache, workers=workers, progress=progress, cancel=cancel,
+        )
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def _list_dir_files(dir_path: str, index: DirectoryIndex | None) -> tuple[list[str], list[str]]:
+    """获取目录内的图片与 JSON 文件名，优先从索引读取。"""
+    if index is not None and dir_path in index:
+        return index.get_files(dir_path)
+
+    return _split_candidate_files(os.listdir(dir_path))
+
+
+def get_leaf_folders(root_path: str, index: DirectoryIndex | None = None) -> list[str]:
     """获取所有最内层文件夹（无子文件夹的目录）
     
     参数:
         root_path: 根目录路径
+        index: 已构建的目录索引，为空时自动构建
     
     返回:
         最内层文件夹路径列表
     """
-    leaf_folders = []
-    for root, dirs, files in os.walk(root_path):
-        if not dirs:
-            leaf_folders.append(root)
-    return leaf_folders
+    if index is None:
+        index = DirectoryIndex.build(root_path)
+    return index.leaf_dirs()
 
 
-def get_pairable_dirs(root_path: str) -> list[str]:
+def get_pairable_dirs(root_path: str, index: DirectoryIndex | None = None) -> list[str]:
     """获取所有包含图片或 JSON 的目录。
 
     参数:
         root_path: 根目录路径
+        index: 已构建的目录索引，为空时自动构建
 
     返回:
         可独立作为配对空间的目录路径列表
     """
-    pairable_dirs = []
-    for root, _dirs, files in os.walk(root_path):
-        has_candidate_files = any(is_image_file(file_name) or file_name.lower().endswith('.json') for file_name in files)
-        if has_candidate_files:
-            pairable_dirs.append(root)
-    return pairable_dirs
+    if index is None:
+        index = DirectoryIndex.build(root_path)
+    return index.pairable_dirs()
 
 
-def scan_leaf_dir(leaf_dir: str) -> dict:
+def scan_leaf_dir(leaf_dir: str, index: DirectoryIndex | None = None) -> DirPairing:
     """扫描单个目录内的文件配对情况。
     
     参数:
         leaf_dir: 目录路径
+        index: 目录索引，提供时直接读取索引中的文件列表
     
     返回:
+        DirPairing，可按字典方式读取以下字段:
         {
             'paired': int,              # 正常配对数（单格式图片+JSON）
-            'paired_names': set,        # 配对的文件名集合
             'orphan_image': int,        # 孤立图片数
             'orphan_json': int,         # 孤立JSON数
-            'special_pairs': list,      # 特殊配对列表
-            'image_counts': dict,        # 各格式图片数量
+            'special_pairs': tuple,     # 特殊配对 SpecialPair 元组
+            'image_counts': ImageCounts, # 各格式图片数量
             'json_count': int           # JSON数量
         }
     """
-    image_files = []  # [(name_lower, full_filename), ...]
-    json_files = []   # [(name_lower, full_filename), ...]
-    
-    image_counts = {ext: 0 for ext in IMAGE_EXTENSIONS}
-    
-    for file_name in os.listdir(leaf_dir):
-        name, ext = os.path.splitext(file_name)
-        name_lower = name.lower()
-        ext_lower = ext.lower()
-        
-        if is_image_file(file_name):
-            image_files.append((name_lower, file_name))
-            image_counts[ext_lower] += 1
-        elif ext_lower == '.json':
-            json_files.append((name_lower, file_name))
-    
-    image_names = {item[0] for item in image_files}
-    json_names = {item[0] for item in json_files}
-    
-    paired_names = image_names & json_names
-    normal_paired_names = set()
+    if index is not None and leaf_dir in index.pairings:
+        return index.pairings[leaf_dir]
+
+    image_names, json_names = _list_dir_files(leaf_dir, index)
+    return _summarize_dir(leaf_dir, image_names, json_names)
+
+
+def _group_by_stem(file_names: list[str]) -> dict[str, list[str]]:
+    """按小写主文件名分组，组内保留文件在目录中的出现顺序。"""
+    groups = {}
+    for file_name in file_names:
+        stem = os.path.splitext(file_name)[0].lower()
+        group = groups.get(stem)
+        if group is None:
+            groups[stem] = [file_name]
+        else:
+            group.append(file_name)
+    return groups
+
+
+def _pair_groups(
+    leaf_dir: str,
+    image_groups: dict[str, list[str]],
+    json_groups: dict[str, list[str]],
+) -> tuple[int, tuple[SpecialPair, ...]]:
+    """单次遍历分组结果，返回 (正常配对数, 特殊配对元组)。
+
+    同名仅一张图片时为正常配对，同名多格式图片加 JSON 时为特殊配对。
+    """
+    normal_paired_count = 0
     special_pairs = []
-    
-    for name in paired_names:
-        image_filenames = [fname for n, fname in image_files if n == name]
-        
+
+    for name, image_filenames in image_groups.items():
+        json_filenames = json_groups.get(name)
+        if json_filenames is None:
+            continue
+
         if len(image_filenames) == 1:
-            normal_paired_names.add(name)
+            normal_paired_count += 1
         else:
-            json_filename = [fname for n, fname in json_files if n == name][0]
-            special_pairs.append({
-                'folder': leaf_dir,
-                'name': name,
-                'files': image_filenames + [json_filename]
-            })
-    
-    orphan_image_names = image_names - json_names
-    orphan_json_names = json_names - image_names
+            special_pairs.append(SpecialPair(leaf_dir, name, (*image_filenames, json_filenames[0])))
+
+    return normal_paired_count, tuple(special_pairs)
+
+
+def _summarize_dir(leaf_dir: str, image_names: list[str], json_names: list[str]) -> DirPairing:
+    """根据目录内的图片与 JSON 文件名计算配对统计，返回结构同 scan_leaf_dir。"""
+    image_counts = ImageCounts()
+    for file_name in image_names:
+        image_counts.add_file(file_name)
+
+    image_groups = _group_by_stem(image_names)
+    json_groups = _group_by_stem(json_names)
+    normal_paired_count, special_pairs = _pair_groups(leaf_dir, image_groups, json_groups)
+
+    orphan_image_count = sum(1 for name in image_groups if name not in json_groups)
+    orphan_json_count = sum(1 for name in json_groups if name not in image_groups)
     
-    return {
-        'paired': len(normal_paired_names),
-        'paired_names': normal_paired_names,
-        'orphan_image': len(orphan_image_names),
-        'orphan_json': len(orphan_json_names),
-        'special_pairs': special_pairs,
-        'image_counts': image_counts,
-        'json_count': len(json_files)
-    }
+    return DirPairing(
+        paired=normal_paired_count,
+        orphan_image=orphan_image_count,
+        orphan_json=orphan_json_count,
+        special_pairs=special_pairs,
+        image_counts=image_counts,
+        json_count=len(json_names),
+    )
+
+
+def _iter_pairable_listings(
+    root_path: str,
+    index: DirectoryIndex | None,
+    use_cache: bool,
+    reporter: ProgressReporter | None,
+    cancel: CancelToken | None = None,
+) -> Generator[tuple[str, list[str], list[str], DirPairing | None], None, None]:
+    """逐个产出包含图片或 JSON 的目录及其文件列表，未提供索引时边遍历边产出。"""
+    if index is not None:
+        for dir_path in index.pairable_dirs():
+            if is_cancelled(cancel):
+                break
+            image_names, json_names = index.get_files(dir_path)
+            if reporter is not None:
+                reporter.advance(dirs=1, files=len(image_names) + len(json_names))
+            yield dir_path, image_names, json_names, index.pairings.get(dir_path)
+        if reporter is not None:
+            reporter.finish()
+        return
+
+    cache = open_scan_cache() if use_cache else None
+    try:
+        for dir_path, listing in walk_directories(root_path, cache=cache, progress=reporter, cancel=cancel):
+            _subdir_names, _walk_names, image_names, json_names, pairing, _relisted = listing
+            if image_names or json_names:
+                yield dir_path, image_names, json_names, pairing
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+class ScanTotals(_Record):
+    """可合并的配对汇总结果。
+
+    merge() 满足结合律：按目录遍历顺序把各部分结果依次合并，与串行扫描整棵树的结果一致，
+    因此可以把目录树拆分到多个进程或多台机器上分别统计后再合并。
+    不收集孤立文件路径时 orphan_image_paths / orphan_json_paths 为 None；
+    不收集文件列表时 file_paths 为 None，收集时按遍历顺序记录各目录的图片与 JSON 路径。
+    """
 
+    __slots__ = (
+        "paired", "orphan_image", "orphan_json", "special_pairs", "folder_count",
+        "image_counts", "total_json", "orphan_image_paths", "orphan_json_paths", "file_paths",
+    )
 
-def scan_all_leaf_dirs(root_path: str) -> dict:
+    def __init__(self, collect_orphans: bool = False, collect_files: bool = False):
+        self.paired = 0
+        self.orphan_image = 0
+        self.orphan_json = 0
+        self.special_pairs: list[SpecialPair] = []
+        self.folder_count = 0
+        self.image_counts = ImageCounts()
+        self.total_json = 0
+        self.orphan_image_paths = None
+        self.orphan_json_paths = None
+        self.file_paths = None
+        folders = FolderTable()
+        if collect_orphans:
+            self.orphan_image_paths = PathList(folders)
+            self.orphan_json_paths = PathList(folders)
+        if collect_files:
+            self.file_paths = PathList(folders)
+
+    def add_dir(
+        self,
+        pairing: DirPairing,
+        orphan_result: dict | None = None,
+        listing: tuple[str, list[str], list[str]] | None = None,
+    ) -> None:
+        """累加单个目录的配对统计、孤立文件及 (目录, 图片文件名, JSON 文件名) 文件列表。"""
+        self.paired += pairing.paired
+        self.orphan_image += pairing.orphan_image
+        self.orphan_json += pairing.orphan_json
+        self.special_pairs.extend(pairing.special_pairs)
+        self.folder_count += 1
+        self.total_json += pairing.json_count
+        self.image_counts.merge(pairing.image_counts)
+
+        if orphan_result is not None and self.orphan_image_paths is not None:
+            self.orphan_image_paths.extend(orphan_result['orphan_image_paths'])
+            self.orphan_json_paths.extend(orphan_result['orphan_json_paths'])
+
+        if listing is not None and self.file_paths is not None:
+            dir_path, image_names, json_names = listing
+            self.file_paths.add_dir(dir_path, [*image_names, *json_names])
+
+    def merge(self, other: "ScanTotals") -> "ScanTotals":
+        """将另一部分结果合并到末尾，返回自身。"""
+        self.paired += other.paired
+        self.orphan_image += other.orphan_image
+        self.orphan_json += other.orphan_json
+        self.special_pairs.extend(other.special_pairs)
+        self.folder_count += other.folder_count
+        self.total_json += other.total_json
+        self.image_counts.merge(other.image_counts)
+
+        if self.orphan_image_paths is not None and other.orphan_image_paths is not None:
+            self.orphan_image_paths.extend(other.orphan_image_paths)
+            self.orphan_json_paths.extend(other.orphan_json_paths)
+        if self.file_paths is not None and other.file_paths is not None:
+            self.file_paths.extend(other.file_paths)
+        return self
+
+    def snapshot(self) -> dict:
+        """生成用于进度事件的汇总快照，特殊配对只给出数量。"""
+        return {
+            'paired': self.paired,
+            'orphan_image': self.orphan_image,
+            'orphan_json': self.orphan_json,
+            'special_count': len(self.special_pairs),
+            'folder_count': self.folder_count,
+            'total_json': self.total_json,
+        }
+
+    def to_dict(self) -> dict:
+        """转换为 scan_all_leaf_dirs / find_all_orphans 返回的字典结构。"""
+        stats = {
+            'paired': self.paired,
+            'orphan_image': self.orphan_image,
+            'orphan_json': self.orphan_json,
+            'special_pairs': self.special_pairs,
+            'folder_count': self.folder_count,
+            'image_counts': self.image_counts,
+            'total_json': self.total_json
+        }
+        if self.orphan_image_paths is not None:
+            stats['orphan_image_paths'] = self.orphan_image_paths
+            stats['orphan_json_paths'] = self.orphan_json_paths
+        return stats
+
+
+def iter_scan_leaf_dirs(
+    root_path: str,
+    index: DirectoryIndex | None = None,
+    use_cache: bool = False,
+    progress: ProgressCallback | ProgressReporter | None = None,
+    cancel: CancelToken | None = None,
+) -> Generator[tuple[str, DirPairing], None, None]:
+    """逐目录产出配对统计，scan_all_leaf_dirs 的流式版本。
+
+    参数:
+        root_path: 根目录路径
+        index: 已构建的目录索引，为空时边遍历边产出
+        use_cache: 未提供索引时是否使用持久化扫描缓存
+        progress: 进度回调，定期接收 ScanProgress 事件
+        cancel: 取消令牌，取消后不再产出后续目录
+
+    返回:
+        (目录路径, scan_leaf_dir 结果) 生成器
+    """
+    reporter = _as_reporter(progress, "扫描目录")
+    for dir_path, image_names, json_names, pairing in _iter_pairable_listings(root_path, index, use_cache, reporter, cancel):
+        if pairing is None:
+            pairing = _summarize_dir(dir_path, image_names, json_names)
+        yield dir_path, pairing
+
+
+def scan_all_leaf_dirs(
+    root_path: str,
+    index: DirectoryIndex | None = None,
+    use_cache: bool = False,
+    progress: ProgressCallback | None = None,
+    processes: int | None = None,
+    cancel: CancelToken | None = None,
+) -> dict:
     """扫描所有包含图片或 JSON 的目录，返回汇总统计。
     
     参数:
         root_path: 根目录路径
+        index: 已构建的目录索引，为空时边遍历边统计
+        use_cache: 未提供索引时是否使用持久化扫描缓存
+        progress: 进度回调，事件的 partial 字段为当前累计的配对统计
+        processes: 进程数，未提供索引且大于 1 时按一级子目录分片并行统计，为空时使用默认值
+        cancel: 取消令牌，取消后返回已扫描部分的统计
     
     返回:
         {
             'paired': int,
             'orphan_image': int,
             'orphan_json': int,
-            'special_pairs': list,
+            'special_pairs': list,      # SpecialPair 列表
             'folder_count': int,
-            'image_counts': dict,
+            'image_counts': ImageCounts,
             'total_json': int
         }
     """
-    pairable_dirs = get_pairable_dirs(root_path)
-    
-    total_paired = 0
-    total_orphan_image = 0
-    total_orphan_json = 0
-    all_special_pairs = []
-    total_image_counts = {ext: 0 for ext in IMAGE_EXTENSIONS}
-    total_json = 0
+    if index is None and _resolve_processes(processes) > 1:
+        return run_sharded_scan(
+            root_path, processes=processes, use_cache=use_cache, progress=progress, cancel=cancel,
+        ).to_dict()
+
+    totals = ScanTotals()
+    reporter = None
+    if progress is not None:
+        reporter = ProgressReporter(progress, "扫描目录", partial=totals.snapshot)
+
+    for _dir_path, result in iter_scan_leaf_dirs(root_path, index, use_cache, reporter, cancel):
+        totals.add_dir(result)
     
-    for current_dir in pairable_dirs:
-        result = scan_leaf_dir(current_dir)
-        total_paired += result['paired']
-        total_orphan_image += result['orphan_image']
-        total_orphan_json += result['orphan_json']
-        all_special_pairs.extend(result['special_pairs'])
-        total_json += result['json_count']
-        
-        for ext, count in result['image_counts'].items():
-            total_image_counts[ext] += count
+    return totals.to_dict()
+
+
+def _find_dir_orphans(leaf_dir: str, image_names: list[str], json_names: list[str]) -> dict:
+    """根据目录内的图片与 JSON 文件名查找孤立文件，返回结构同 find_orphans_in_leaf。"""
+    image_groups = _group_by_stem(image_names)
+    json_groups = _group_by_stem(json_names)
+    _normal_paired_count, special_pairs = _pair_groups(leaf_dir, image_groups, json_groups)
+
+    orphan_image_names = {name for name in image_groups if name not in json_groups}
+    orphan_json_names = {name for name in json_groups if name not in image_groups}
+
+    orphan_image_paths = PathList()
+    orphan_image_paths.add_dir(leaf_dir, [
+        file_name
+        for file_name in image_names
+        if os.path.splitext(file_name)[0].lower() in orphan_image_names
+    ])
+    orphan_json_paths = PathList()
+    orphan_json_paths.add_dir(leaf_dir, [
+        file_name
+        for file_name in json_names
+        if os.path.splitext(file_name)[0].lower() in orphan_json_names
+    ])
     
     return {
-        'paired': total_paired,
-        'orphan_image': total_orphan_image,
-        'orphan_json': total_orphan_json,
-        'special_pairs': all_special_pairs,
-        'folder_count': len(pairable_dirs),
-        'image_counts': total_image_counts,
-        'total_json': total_json
+        'orphan_image_paths': orphan_image_paths,
+        'orphan_json_paths': orphan_json_paths,
+        'special_pairs': special_pairs,
+        'orphan_image_names': orphan_image_names,
+        'orphan_json_names': orphan_json_names
     }
 
 
-def find_orphans_in_leaf(leaf_dir: str) -> dict:
+def find_orphans_in_leaf(leaf_dir: str, index: DirectoryIndex | None = None) -> dict:
     """查找单个目录中的孤立文件和特殊配对。
     
     参数:
         leaf_dir: 目录路径
+        index: 目录索引，提供时直接读取索引中的文件列表
     
     返回:
         {
-            'orphan_image_paths': list,  # 孤立图片完整路径
-            'orphan_json_paths': list,    # 孤立JSON完整路径
-            'special_pairs': list,       # 特殊配对列表
+            'orphan_image_paths': PathList,  # 孤立图片完整路径，访问时拼接
+            'orphan_json_paths': PathList,    # 孤立JSON完整路径，访问时拼接
+            'special_pairs': tuple,       # 特殊配对 SpecialPair 元组
             'orphan_image_names': set,    # 孤立图片文件名（不含扩展名）
             'orphan_json_names': set      # 孤立JSON文件名（不含扩展名）
         }
     """
-    image_files = []
-    json_files = []
-    
-    for file_name in os.listdir(leaf_dir):
-        name, ext = os.path.splitext(file_name)
-        name_lower = name.lower()
-        full_path = os.path.join(leaf_dir, file_name)
-        
-        if is_image_file(file_name):
-            image_files.append((name_lower, file_name, full_path))
-        elif ext.lower() == '.json':
-            json_files.append((name_lower, file_name, full_path))
-    
-    image_names = {item[0] for item in image_files}
-    json_names = {item[0] for item in json_files}
-    
-    paired_names = image_names & json_names
-    special_pairs = []
-    
-    for name in paired_names:
-        image_filenames = [f for n, f, p in image_files if n == name]
-        if len(image_filenames) > 1:
-            json_filename = [f for n, f, p in json_files if n == name][0]
-            special_pairs.append({
-                'folder': leaf_dir,
-                'name': name,
-                'files': image_filenames + [json_filename]
-            })
-    
-    orphan_image_names = image_names - json_names
-    orphan_json_names = json_names - image_names
-    
-    orphan_image_paths = [p for n, f, p in image_files if n in orphan_image_names]
-    orphan_json_paths = [p for n, f, p in json_files if n in orphan_json_names]
-    
-    return {
-        'orphan_image_paths': orphan_image_paths,
-        'orphan_json_paths': orphan_json_paths,
-        'special_pairs': special_pairs,
-        'orphan_image_names': orphan_image_names,
-        'orphan_json_names': orphan_json_names
-    }
+    image_names, json_names = _list_dir_files(leaf_dir, index)
+    return _find_dir_orphans(leaf_dir, image_names, json_names)
+
+
+def iter_find_orphans(
+    root_path: str,
+    index: DirectoryIndex | None = None,
+    use_cache: bool = False,
+    progress: ProgressCallback | ProgressReporter | None = None,
+    cancel: CancelToken | None = None,
+) -> Generator[tuple[str, DirPairing, dict], None, None]:
+    """逐目录产出配对统计与孤立文件，find_all_orphans 的流式版本。
+
+    参数:
+        root_path: 根目录路径
+        index: 已构建的目录索引，为空时边遍历边产出
+        use_cache: 未提供索引时是否使用持久化扫描缓存
+        progress: 进度回调，定期接收 ScanProgress 事件
+        cancel: 取消令牌，取消后不再产出后续目录
+
+    返回:
+        (目录路径, scan_leaf_dir 结果, find_orphans_in_leaf 结果) 生成器
+    """
+    reporter = _as_reporter(progress, "扫描目录")
+    for dir_path, image_names, json_names, pairing in _iter_pairable_listings(root_path, index, use_cache, reporter, cancel):
+        if pairing is None:
+            pairing = _summarize_dir(dir_path, image_names, json_names)
+        yield dir_path, pairing, _find_dir_orphans(dir_path, image_names, json_names)
 
 
-def find_all_orphans(root_path: str) -> dict:
+def find_all_orphans(
+    root_path: str,
+    index: DirectoryIndex | None = None,
+    use_cache: bool = False,
+    progress: ProgressCallback | None = None,
+    processes: int | None = None,
+    cancel: CancelToken | None = None,
+) -> dict:
     """扫描所有包含图片或 JSON 的目录中的孤立文件。
     
     参数:
         root_path: 根目录路径
+        index: 已构建的目录索引，为空时边遍历边统计
+        use_cache: 未提供索引时是否使用持久化扫描缓存
+        progress: 进度回调，事件的 partial 字段为当前累计的配对统计
+        processes: 进程数，未提供索引且大于 1 时按一级子目录分片并行统计，为空时使用默认值
+        cancel: 取消令牌，取消后返回已扫描部分的统计
     
     返回:
         {
             'paired': int,
             'orphan_image': int,
             'orphan_json': int,
-            'special_pairs': list,
-            'orphan_image_paths': list,
-            'orphan_json_paths': list,
+            'special_pairs': list,      # SpecialPair 列表
+            'orphan_image_paths': PathList,
+            'orphan_json_paths': PathList,
             'folder_count': int,
-            'image_counts': dict,
+            'image_counts': ImageCounts,
             'total_json': int
         }
     """
-    scan_result = scan_all_leaf_dirs(root_path)
-    
-    all_orphan_image_paths = []
-    all_orphan_json_paths = []
-    
-    for current_dir in get_pairable_dirs(root_path):
-        orphan_result = find_orphans_in_leaf(current_dir)
-        all_orphan_image_paths.extend(orphan_result['orphan_image_paths'])
-        all_orphan_json_paths.extend(orphan_result['orphan_json_paths'])
+    if index is None and _resolve_processes(processes) > 1:
+        return run_sharded_scan(
+            root_path, collect_orphans=True, processes=processes, use_cache=use_cache, progress=progress,
+            cancel=cancel,
+        ).to_dict()
+
+    totals = ScanTotals(collect_orphans=True)
+    reporter = None
+    if progress is not None:
+        reporter = ProgressReporter(progress, "扫描目录", partial=totals.snapshot)
+
+    for _dir_path, scan_result, orphan_result in iter_find_orphans(root_path, index, use_cache, reporter, cancel):
+        totals.add_dir(scan_result, orphan_result)
     
-    return {
-        'paired': scan_result['paired'],
-        'orphan_image': scan_result['orphan_image'],
-        'orphan_json': scan_result['orphan_json'],
-        'special_pairs': scan_result['special_pairs'],
-        'orphan_image_paths': all_orphan_image_paths,
-        'orphan_json_paths': all_orphan_json_paths,
-        'folder_count': scan_result['folder_count'],
-        'image_counts': scan_result['image_counts'],
-        'total_json': scan_result['total_json']
-    }
+    return totals.to_dict()
+
 
+def _scan_shard(shard_path: str, collect_orphans: bool, use_cache: bool, collect_files: bool = False) -> ScanTotals:
+    """在子进程中统计单个分片子树。"""
+    totals = ScanTotals(collect_orphans, collect_files)
+    for dir_path, image_names, json_names, pairing in _iter_pairable_listings(shard_path, None, use_cache, None):
+        if pairing is None:
+            pairing = _summarize_dir(dir_path, image_names, json_names)
+        orphan_result = _find_dir_orphans(dir_path, image_names, json_names) if collect_orphans else None
+        totals.add_dir(pairing, orphan_result, (dir_path, image_names, json_names))
+    return totals
 
-def scan_json_files(root_path: str, exclude_dirs: list[str] = None) -> Generator[Path, None, None]:
+
+def run_sharded_scan(
+    root_path: str,
+    collect_orphans: bool = False,
+    processes: int | None = None,
+    use_cache: bool = False,
+    progress: ProgressCallback | None = None,
+    cancel: CancelToken | None = None,
+    collect_files: bool = False,
+) -> ScanTotals:
+    """按一级子目录分片，使用进程池并行统计后合并。
+
+    根目录自身的文件在主进程中统计，每个一级子目录（如各个 "第N次数据提交"）
+    作为一个分片交给子进程。分片结果按遍历顺序合并，与串行扫描结果一致。
+
+    参数:
+        root_path: 根目录路径
+        collect_orphans: 是否同时收集孤立文件路径
+        processes: 进程数，为空时使用 set_scan_processes 设置的默认值
+        use_cache: 各分片是否使用持久化扫描缓存
+        progress: 进度回调，每完成一个分片接收一次 ScanProgress 事件
+        cancel: 取消令牌，取消后丢弃未开始的分片，只合并已完成的分片
+        collect_files: 是否同时回传各目录的图片与 JSON 文件列表（ScanTotals.file_paths），
+            调用方需要文件清单时无需再遍历一次目录树
+
+    返回:
+        ScanTotals 实例
+    """
+    processes = _resolve_processes(processes)
+    totals = ScanTotals(collect_orphans, collect_files)
+
+    _subdir_names, walk_names, file_names = _scandir_listing(root_path)
+    image_names, json_names = _split_candidate_files(file_names)
+    if image_names or json_names:
+        orphan_result = _find_dir_orphans(root_path, image_names, json_names) if collect_orphans else None
+        totals.add_dir(
+            _summarize_dir(root_path, image_names, json_names), orphan_result, (root_path, image_names, json_names),
+        )
+
+    shard_paths = [os.path.join(root_path, name) for name in walk_names]
+    running = ScanTotals()
+    running.merge(totals)
+    reporter = None
+    if progress is not None:
+        reporter = ProgressReporter(progress, "扫描目录", partial=running.snapshot)
+
+    shard_results = {}
+    executor = ProcessPoolExecutor(max_workers=max(1, min(processes, len(shard_paths) or 1)))
+    try:
+        pending = {
+            executor.submit(_scan_shard, shard_path, collect_orphans, use_cache, collect_files): shard_path
+            for shard_path in shard_paths
+        }
+        while pending and not is_cancelled(cancel):
+            done, _not_done = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            for future in done:
+                shard_totals = future.result()
+                shard_results[pending.pop(future)] = shard_totals
+                if reporter is not None:
+                    running.merge(shard_totals)
+                    reporter.advance(
+                        dirs=shard_totals.folder_count,
+                        files=shard_totals.total_json + sum(shard_totals.image_counts.values()),
+                        pending_dirs=len(pending),
+                    )
+    finally:
+        executor.shutdown(wait=not is_cancelled(cancel), cancel_futures=True)
+
+    for shard_path in shard_paths:
+        if shard_path in shard_results:
+            totals.merge(shard_results[shard_path])
+
+    if reporter is not None:
+        reporter.finish()
+    return totals
+
+
+def set_scan_processes(processes: int) -> None:
+    """设置 scan_all_leaf_dirs / find_all_orphans 默认使用的进程数。
+
+    图形界面不提供此设置，始终使用默认值；需要分片并行扫描时在脚本中调用，或向工具函数传入 processes。
+
+    参数:
+        processes: 进程数，1 表示在当前进程中串行统计；大于 1 时按一级子目录分片并行
+    """
+    global _scan_processes
+    _scan_processes = max(1, int(processes))
+
+
+def get_scan_processes() -> int:
+    """获取当前默认的分片统计进程数。"""
+    return _scan_processes
+
+
+def _resolve_processes(processes: int | None) -> int:
+    return _scan_processes if processes is None else max(1, int(processes))
+
+
+def scan_json_files(
+    root_path: str,
+    exclude_dirs: "list[str] | ExcludeMatcher | None" = None,
+    progress: ProgressCallback | ProgressReporter | None = None,
+    cancel: CancelToken | None = None,
+) -> Generator[Path, None, None]:
     """递归扫描目录下所有 JSON 文件
     
     参数:
         root_path: 根目录路径
-        exclude_dirs: 要排除的目录名列表
+        exclude_dirs: 要排除的目录名、路径或通配模式，命中的目录在遍历时直接跳过
+        progress: 进度回调，遍历过程中定期接收 ScanProgress 事件
+        cancel: 取消令牌，取消后停止遍历
     
     返回:
         JSON 文件路径生成器
     """
-    if exclude_dirs is None:
-        exclude_dirs = []
-    
-    root = Path(root_path)
-    for json_file in root.rglob("*.json"):
-        if _should_exclude_path(json_file, exclude_dirs):
-            continue
-        yield json_file
+    for dir_path, listing in walk_directories(root_path, exclude_dirs, progress=progress, cancel=cancel):
+        for file_name in listing[3]:
+            yield Path(dir_path, file_name)
 
 
-def scan_image_json_pairs(root_path: str, exclude_dirs: list[str] = None) -> dict[str, list[tuple[str, str]]]:
+def scan_image_json_pairs(
+    root_path: str,
+    exclude_dirs: "list[str] | ExcludeMatcher | None" = None,
+    index: DirectoryIndex | None = None,
+) -> dict[str, list[tuple[str, str]]]:
     """扫描图片和 JSON 文件配对，按文件夹分组
     
     参数:
         root_path: 根目录路径
-        exclude_dirs: 要排除的目录名列表
+        exclude_dirs: 要排除的目录名、路径或通配模式
+        index: 已构建的目录索引（需已按相同排除规则构建），为空时自动构建
     
     返回:
         dict: {folder_path: [(img_file, json_file), ...]}
     """
-    if exclude_dirs is None:
-        exclude_dirs = []
+    if index is None:
+        index = DirectoryIndex.build(root_path, exclude_dirs=exclude_dirs)
 
     folder_map = {}
     
-    for root, dirs, files in os.walk(root_path):
-        root_path_current = Path(root)
-        dirs[:] = [d for d in dirs if not _should_exclude_path(root_path_current / d, exclude_dirs)]
-
-        if _should_exclude_path(root_path_current, exclude_dirs):
+    for root in index.dirs:
+        image_names, json_names = index.get_files(root)
+        if not image_names or not json_names:
             continue
-            
-        json_files = [f for f in files if f.lower().endswith('.json')]
+
         pairs = []
-        file_lookup = {Path(file_name).stem.lower(): file_name for file_name in files if is_image_file(file_name)}
+        file_lookup = {os.path.splitext(file_name)[0].lower(): file_name for file_name in image_names}
         
-        for jf in json_files:
+        for jf in json_names:
             base_name = os.path.splitext(jf)[0]
             img_name = file_lookup.get(base_name.lower())
             
@@ -355,11 +1298,12 @@ def scan_image_json_pairs(root_path: str, exclude_dirs: list[str] = None) -> dic
     return folder_map
 
 
-def find_orphan_files(folder_path: str) -> tuple[set, set, int]:
+def find_orphan_files(folder_path: str, index: DirectoryIndex | None = None) -> tuple[set, set, int]:
     """查找孤立的 JPG 和 JSON 文件（兼容旧接口）
     
     参数:
         folder_path: 文件夹路径
+        index: 已构建的目录索引，为空时自动构建
     
     返回:
         (jpg_names, json_names, folder_count)
@@ -367,24 +1311,20 @@ def find_orphan_files(folder_path: str) -> tuple[set, set, int]:
         - json_names: json 文件名集合
         - folder_count: 文件夹数量
     """
+    if index is None:
+        index = DirectoryIndex.build(folder_path)
+
     jpg_names = set()
     json_names = set()
-    folder_count = 0
     
-    for root_dir, dirs, files in os.walk(folder_path):
-        folder_count += 1
-        for file_name in files:
-            _, ext = os.path.splitext(file_name)
-            ext_lower = ext.lower()
-            
-            if ext_lower not in ('.jpg', '.jpeg', '.json'):
-                continue
-            
-            name = os.path.splitext(file_name)[0].lower()
-            
-            if ext_lower in ('.jpg', '.jpeg'):
-                jpg_names.add(name)
-            elif ext_lower == '.json':
-                json_names.add(name)
+    for root_dir in index.dirs:
+        image_files, json_files = index.get_files(root_dir)
+        for file_name in image_files:
+            name, ext = os.path.splitext(file_name)
+            if ext.lower() in ('.jpg', '.jpeg'):
+                jpg_names.add(name.lower())
+
+        for file_name in json_files:
+            json_names.add(os.path.splitext(file_name)[0].lower())
     
-    return jpg_names, json_names, folder_count
+    return jpg_names, json_names, len(index.dirs)
@@ -0,0 +1,104 @@
+"""
+标签字典加载模块
+
+Excel 标签字典以只读流式方式逐行读取第一列，不构建完整的单元格对象。
+解析、去重后的标签列表按文件内容哈希缓存在内存与用户缓存目录中，
+字典文件未变化时，标签校验与标签统计再次加载可直接复用，无需重新打开工作簿。
+"""
+
+import json
+import os
+import threading
+
+from .labelme import write_bytes_atomic
+from .manifest import hash_file
+from .scan_cache import get_user_cache_dir
+
+
+LABEL_DICT_CACHE_DIR_NAME = "label_dicts"
+
+# 解析规则或缓存格式变化时递增，旧版本的缓存文件不再被读取
+LABEL_DICT_CACHE_VERSION = 1
+
+_memory_cache: dict[str, tuple[str, ...]] = {}
+_memory_cache_lock = threading.Lock()
+
+
+def _read_excel_label_column(file_path: str) -> list[str]:
+    """只读流式读取 Excel 活动工作表的第一列，返回去重后保留首次出现顺序的标签列表。"""
+    try:
+        import openpyxl
+    except ImportError:
+        raise ImportError("需要安装 openpyxl 库来读取 Excel 文件")
+
+    wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        labels = {}
+        header_checked = False
+        for row in ws.iter_rows(max_col=1, values_only=True):
+            value = row[0] if row else None
+            if not header_checked:
+                if str(value).strip().lower() != 'label':
+                    raise ValueError("Excel 文件第一列列名必须为 'label'")
+                header_checked = True
+                continue
+            if value is not None and str(value).strip():
+                labels[str(value).strip()] = None
+    finally:
+        wb.close()
+    return list(labels)
+
+
+def _cache_file_path(file_hash: str) -> str:
+    return os.path.join(get_user_cache_dir(), LABEL_DICT_CACHE_DIR_NAME, f"v{LABEL_DICT_CACHE_VERSION}_{file_hash}.json")
+
+
+def _read_cache_file(cache_path: str) -> tuple[str, ...] | None:
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            labels = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(labels, list) or not all(isinstance(label, str) for label in labels):
+        return None
+    return tuple(labels)
+
+
+def load_excel_labels(file_path: str) -> list[str]:
+    """加载 Excel 标签字典，第一列列名必须为 'label'。
+
+    结果按文件内容哈希缓存：同一进程内直接返回内存中的结果，
+    其他进程或下次启动时从用户缓存目录读取，字典内容变化后自动重新解析。
+
+    参数:
+        file_path: Excel 标签文件路径
+
+    返回:
+        去重后保留首次出现顺序的标签列表；文件无法读取或表头不符时抛出异常
+    """
+    file_hash = hash_file(file_path)
+    with _memory_cache_lock:
+        labels = _memory_cache.get(file_hash)
+    if labels is not None:
+        return list(labels)
+
+    cache_path = _cache_file_path(file_hash)
+    labels = _read_cache_file(cache_path)
+    if labels is None:
+        labels = tuple(_read_excel_label_column(file_path))
+        try:
+            write_bytes_atomic(cache_path, json.dumps(list(labels), ensure_ascii=False).encode('utf-8'))
+        except OSError:
+            # 缓存目录不可写时只保留内存缓存
+            pass
+
+    with _memory_cache_lock:
+        _memory_cache[file_hash] = labels
+    return list(labels)
+
+
+def clear_label_dictionary_cache() -> None:
+    """清空内存中的标签字典缓存，磁盘缓存按内容哈希区分，无需清理。"""
+    with _memory_cache_lock:
+        _memory_cache.clear()
@@ -1,6 +1,42 @@
 import json
+import mmap
+import os
+import re
+import threading
+import uuid
+from collections import OrderedDict
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
+
+import numpy as np
+
+
+IMAGE_DATA_KEY = b'"imageData"'
+
+# 跳过 imageData 时写入的占位值，解析后据此确认替换的是顶层 imageData 字段
+_IMAGE_DATA_PLACEHOLDER = "\x00imageData\x00"
+_IMAGE_DATA_PLACEHOLDER_BYTES = json.dumps(_IMAGE_DATA_PLACEHOLDER).encode('ascii')
+
+_JSON_WHITESPACE = b' \t\r\n'
+
+SHAPES_KEY = b'"shapes"'
+
+# 结构扫描时的记号：纯数字数组（如单个点坐标）整体作为一个记号跳过，其余为引号、括号与冒号
+_STRUCTURE_TOKEN = re.compile(rb'\[[0-9\s,.eE+-]*\]|["\[\]{}:]')
+_LITERAL_END = re.compile(rb'[\s,}\]]')
+
+_BASE64_TEXT = re.compile(rb'[A-Za-z0-9+/=]*')
+
+# 标注缓存默认容量，按解析的 JSON 文本字节数（不含 imageData）计
+DEFAULT_ANNOTATION_CACHE_BYTES = 256 * 1024 * 1024
+
+# 写入 JSON 时的 fsync 策略
+FSYNC_NONE = "none"    # 不主动 fsync，由操作系统择机落盘
+FSYNC_FILE = "file"    # 替换前 fsync 临时文件，断电后目标文件为完整的新内容或旧内容
+FSYNC_FULL = "full"    # 另 fsync 所在目录，确保替换操作本身也已落盘
+FSYNC_POLICIES = (FSYNC_NONE, FSYNC_FILE, FSYNC_FULL)
+
+_fsync_policy = FSYNC_NONE
 
 
 def load_labelme_json(json_path: Path) -> dict | None:
@@ -12,17 +48,904 @@ def load_labelme_json(json_path: Path) -> dict | None:
         return None
 
 
-def save_labelme_json(json_path: Path, data: dict) -> bool:
-    """保存 Labelme JSON 文件"""
+def _skip_whitespace(buffer, position: int) -> int:
+    while position < len(buffer) and buffer[position] in _JSON_WHITESPACE:
+        position += 1
+    return position
+
+
+def _find_string_end(buffer, start: int) -> int:
+    """返回从 start（开头引号）开始的 JSON 字符串结束引号之后的位置，找不到时返回 -1。"""
+    position = start + 1
+    while True:
+        position = buffer.find(b'"', position)
+        if position < 0:
+            return -1
+
+        backslashes = 0
+        cursor = position - 1
+        while buffer[cursor] == 0x5C:
+            backslashes += 1
+            cursor -= 1
+        if backslashes % 2 == 0:
+            return position + 1
+        position += 1
+
+
+def _find_image_data_span(buffer) -> tuple[int, int] | None:
+    """定位 "imageData" 字段字符串值的字节范围，不解码其内容。
+
+    shapes 的 flags 等嵌套对象中也可能出现同名键，取字符串值最长的一处，即内嵌的图片数据。
+    """
+    best_span = None
+    position = buffer.find(IMAGE_DATA_KEY)
+    while position >= 0:
+        next_position = position + len(IMAGE_DATA_KEY)
+        value_start = _skip_whitespace(buffer, next_position)
+        if value_start < len(buffer) and buffer[value_start] == 0x3A:
+            value_start = _skip_whitespace(buffer, value_start + 1)
+            if value_start < len(buffer) and buffer[value_start] == 0x22:
+                value_end = _find_string_end(buffer, value_start)
+                if value_end < 0:
+                    break
+                if best_span is None or value_end - value_start > best_span[1] - best_span[0]:
+                    best_span = (value_start, value_end)
+                next_position = value_end
+        position = buffer.find(IMAGE_DATA_KEY, next_position)
+    return best_span
+
+
+def _splice_image_data(buffer) -> bytes | None:
+    """将 imageData 的字符串值替换为占位值，返回替换后的字节；没有 imageData 字符串时返回 None。"""
+    span = _find_image_data_span(buffer)
+    if span is None:
+        return None
+    value_start, value_end = span
+    return buffer[:value_start] + _IMAGE_DATA_PLACEHOLDER_BYTES + buffer[value_end:]
+
+
+def _parse_spliced(spliced: bytes) -> dict | None:
+    """解析替换后的字节，占位值未落在顶层 imageData 字段时返回 None。"""
+    data = json.loads(spliced)
+    if isinstance(data, dict) and data.get('imageData') == _IMAGE_DATA_PLACEHOLDER:
+        del data['imageData']
+        return data
+    return None
+
+
+def _parse_full(buffer) -> dict:
+    data = json.loads(buffer[:])
+    if isinstance(data, dict):
+        data.pop('imageData', None)
+    return data
+
+
+def _parse_without_image_data(buffer) -> tuple[dict, int]:
+    """将 imageData 的字符串值替换为占位值后解析，只有命中顶层字段时才采用。
+
+    返回:
+        (解析结果, 实际解析的字节数)
+    """
+    spliced = _splice_image_data(buffer)
+    if spliced is not None:
+        data = _parse_spliced(spliced)
+        if data is not None:
+            return data, len(spliced)
+
+    return _parse_full(buffer), len(buffer)
+
+
+def _read_labelme_shapes_sized(json_path: Path | str) -> tuple[dict, int]:
+    with open(json_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return json.loads(b''), 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return _parse_without_image_data(buffer)
+
+
+def read_labelme_shapes(json_path: Path | str) -> dict:
+    """只读方式加载 Labelme JSON，跳过内嵌的 imageData。
+
+    使用 mmap 定位 imageData 字段的字符串值并整体替换后再解析，
+    base64 图片数据不会被解码为 Python 字符串，解析时间和内存占用与 shapes 大小相当。
+    返回的字典保留除 imageData 外的全部顶层字段（shapes、imageWidth、imageHeight、imagePath 等）。
+
+    读取或解析失败时抛出异常，调用方负责记录错误信息。
+    """
+    return _read_labelme_shapes_sized(json_path)[0]
+
+
+class _CacheEntry:
+    __slots__ = ("size", "mtime_ns", "data", "cost")
+
+    def __init__(self, size: int, mtime_ns: int, data: dict, cost: int):
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.data = data
+        self.cost = cost
+
+
+def _shallow_copy(data: dict) -> dict:
+    """复制顶层字典与 shapes 列表，调用方增删字段或 shape 不会影响缓存内容。"""
+    result = dict(data)
+    shapes = result.get('shapes')
+    if isinstance(shapes, list):
+        result['shapes'] = list(shapes)
+    return result
+
+
+class AnnotationCache:
+    """进程内共享的 Labelme 标注缓存。
+
+    以绝对路径为键保存 read_labelme_shapes 的解析结果，命中时用文件的 (size, mtime_ns) 校验，
+    文件被修改后自动重新解析。按解析的字节数计算容量，超出时淘汰最久未使用的条目。
+    校验、标签统计、重叠检查等工具在同一会话中依次处理同一目录时，每个文件只需解析一次。
+
+    返回的是浅拷贝：顶层字典与 shapes 列表可以修改，单个 shape 字典与缓存共享，修改前需自行复制。
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_ANNOTATION_CACHE_BYTES):
+        """
+        参数:
+            max_bytes: 缓存容量（字节），0 表示不缓存
+        """
+        self.max_bytes = max(0, int(max_bytes))
+        self._entries: OrderedDict[str, _CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, key: str, stat: os.stat_result) -> dict | None:
+        """返回与 stat 一致的缓存内容并更新命中统计，未命中时返回 None。"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.size == stat.st_size and entry.mtime_ns == stat.st_mtime_ns:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.data
+            self.misses += 1
+            return None
+
+    def read(self, json_path: Path | str) -> dict:
+        """读取标注，优先使用缓存。读取或解析失败时抛出异常，失败结果不缓存。"""
+        key = os.path.abspath(json_path)
+        stat = os.stat(key)
+        data = self._lookup(key, stat)
+        if data is not None:
+            return _shallow_copy(data)
+
+        data, cost = _read_labelme_shapes_sized(key)
+
+        # 读取期间文件被改写时不缓存，避免将新内容登记在旧的 (size, mtime_ns) 下
+        after = os.stat(key)
+        if (after.st_size, after.st_mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+            self._store(key, _CacheEntry(stat.st_size, stat.st_mtime_ns, data, cost))
+        return _shallow_copy(data)
+
+    def prefetch(self, json_path: Path | str) -> "PrefetchedAnnotation":
+        """读取阶段：命中缓存时直接返回，否则读入文件字节并替换掉 imageData，不做 JSON 解析。
+
+        供预读流水线的 I/O 线程调用，解析留给消费方调用 PrefetchedAnnotation.parse()。
+        读取失败不抛出异常，错误在 parse() 时抛出。
+        """
+        key = os.path.abspath(json_path)
+        try:
+            stat = os.stat(key)
+            data = self._lookup(key, stat)
+            if data is not None:
+                return PrefetchedAnnotation(self, key, data=data)
+
+            with open(key, 'rb') as f:
+                raw = f.read()
+            after = os.stat(key)
+        except Exception as e:
+            return PrefetchedAnnotation(self, key, error=e)
+
+        stable = (after.st_size, after.st_mtime_ns) == (stat.st_size, stat.st_mtime_ns)
+        spliced = _splice_image_data(raw)
+        return PrefetchedAnnotation(
+            self, key,
+            stat=stat if stable else None,
+            spliced=spliced,
+            raw=raw if spliced is None else None,
+        )
+
+    def _store(self, key: str, entry: _CacheEntry) -> None:
+        with self._lock:
+            old_entry = self._entries.pop(key, None)
+            if old_entry is not None:
+                self.current_bytes -= old_entry.cost
+            if entry.cost > self.max_bytes:
+                return
+
+            self._entries[key] = entry
+            self.current_bytes += entry.cost
+            while self.current_bytes > self.max_bytes:
+                _key, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= evicted.cost
+
+    def invalidate(self, json_path: Path | str) -> None:
+        """移除单个文件的缓存条目。"""
+        with self._lock:
+            entry = self._entries.pop(os.path.abspath(json_path), None)
+            if entry is not None:
+                self.current_bytes -= entry.cost
+
+    def clear(self) -> None:
+        """清空全部缓存条目与命中统计。"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def set_max_bytes(self, max_bytes: int) -> None:
+        """调整缓存容量，缩小时立即淘汰最久未使用的条目。"""
+        with self._lock:
+            self.max_bytes = max(0, int(max_bytes))
+            while self._entries and self.current_bytes > self.max_bytes:
+                _key, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= evicted.cost
+
+    def stats(self) -> dict:
+        """返回条目数、占用字节数与命中统计。"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+class PrefetchedAnnotation:
+    """预读阶段的结果：缓存内容、替换掉 imageData 后的字节或读取错误。
+
+    imageData 在 I/O 线程中已被替换，预读队列中只保留与 shapes 大小相当的字节。
+    """
+
+    __slots__ = ("json_path", "_cache", "_stat", "_data", "_spliced", "_raw", "_error")
+
+    def __init__(
+        self,
+        cache: AnnotationCache,
+        json_path: str,
+        data: dict | None = None,
+        stat: os.stat_result | None = None,
+        spliced: bytes | None = None,
+        raw: bytes | None = None,
+        error: Exception | None = None,
+    ):
+        self.json_path = json_path
+        self._cache = cache
+        self._stat = stat
+        self._data = data
+        self._spliced = spliced
+        self._raw = raw
+        self._error = error
+
+    def parse(self) -> dict:
+        """解析阶段：返回不含 imageData 的标注字典并登记到缓存，读取或解析失败时抛出异常。"""
+        if self._error is not None:
+            raise self._error
+        if self._data is None:
+            data = _parse_spliced(self._spliced) if self._spliced is not None else None
+            cost = len(self._spliced) if self._spliced is not None else 0
+            if data is None and self._raw is not None:
+                data, cost = _parse_full(self._raw), len(self._raw)
+            elif data is None:
+                # 占位值落在嵌套字段上，需要完整解析，原始字节已释放，重新从磁盘读取
+                data, cost = _read_labelme_shapes_sized(self.json_path)
+
+            if self._stat is not None:
+                self._cache._store(
+                    self.json_path, _CacheEntry(self._stat.st_size, self._stat.st_mtime_ns, data, cost),
+                )
+            self._data = data
+            self._spliced = self._raw = None
+        return _shallow_copy(self._data)
+
+
+_annotation_cache = AnnotationCache()
+
+
+def get_annotation_cache() -> AnnotationCache:
+    """获取进程内共享的标注缓存。"""
+    return _annotation_cache
+
+
+def read_cached_labelme_shapes(json_path: Path | str) -> dict:
+    """通过共享标注缓存读取 Labelme JSON（不含 imageData），失败时抛出异常。"""
+    return _annotation_cache.read(json_path)
+
+
+def prefetch_labelme_shapes(json_path: Path | str) -> PrefetchedAnnotation:
+    """通过共享标注缓存预读 Labelme JSON，供 iter_read_ahead 的读取函数使用。"""
+    return _annotation_cache.prefetch(json_path)
+
+
+def load_labelme_shapes(json_path: Path | str) -> dict | None:
+    """只读方式加载 Labelme JSON（不含 imageData），失败时返回 None"""
+    try:
+        return read_labelme_shapes(json_path)
+    except Exception:
+        return None
+
+
+def set_fsync_policy(policy: str) -> None:
+    """设置所有 JSON 写入的默认 fsync 策略。
+
+    参数:
+        policy: FSYNC_NONE / FSYNC_FILE / FSYNC_FULL
+    """
+    global _fsync_policy
+    if policy not in FSYNC_POLICIES:
+        raise ValueError(f"未知的 fsync 策略: {policy}")
+    _fsync_policy = policy
+
+
+def get_fsync_policy() -> str:
+    """获取当前默认的 fsync 策略。"""
+    return _fsync_policy
+
+
+def _encode_labelme_json(data: dict, compact: bool = False) -> bytes:
+    if compact:
+        text = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    else:
+        text = json.dumps(data, indent=2, ensure_ascii=False)
+    return text.encode('utf-8')
+
+
+def save_labelme_json(
+    json_path: Path,
+    data: dict,
+    compact: bool = False,
+    fsync: str | None = None,
+) -> bool:
+    """保存 Labelme JSON 文件
+
+    先写入同目录下的临时文件再替换，写入中途失败时原文件保持不变。
+
+    参数:
+        json_path: 目标路径
+        data: Labelme JSON 字典
+        compact: 是否使用无缩进的紧凑格式，写入字节数约为缩进格式的一半
+        fsync: fsync 策略，为空时使用 set_fsync_policy 设置的默认值
+    """
+    try:
+        _write_chunks(json_path, (_encode_labelme_json(data, compact),), fsync)
+        return True
+    except Exception:
+        return False
+    finally:
+        _annotation_cache.invalidate(json_path)
+
+
+def _find_top_level_value_span(buffer, key: bytes) -> tuple[int, int, int] | None:
+    """定位顶层对象中 key 对应值的字节范围，值可以是任意 JSON 类型。
+
+    只扫描引号、括号与冒号，字符串整体跳过，内嵌的 imageData 不会被逐字节处理。
+
+    返回:
+        (键起始位置, 值起始位置, 值结束位置)，找不到时返回 None
+    """
+    depth = 0
+    position = 0
+    last_key_start = None
+    value_start = None
+    key_start = None
+
+    while True:
+        match = _STRUCTURE_TOKEN.search(buffer, position)
+        if match is None:
+            return None
+
+        position = match.start()
+        token = buffer[position]
+        if match.end() - position > 1:
+            position = match.end()
+        elif token == 0x22:
+            string_end = _find_string_end(buffer, position)
+            if string_end < 0:
+                return None
+            if depth == 1 and value_start is None:
+                last_key_start = position if buffer[position:string_end] == key else None
+            position = string_end
+        elif token == 0x3A:
+            if depth == 1 and value_start is None and last_key_start is not None:
+                key_start = last_key_start
+                value_start = _skip_whitespace(buffer, position + 1)
+                if value_start >= len(buffer):
+                    return None
+                value_token = buffer[value_start]
+                if value_token == 0x22:
+                    value_end = _find_string_end(buffer, value_start)
+                    return (key_start, value_start, value_end) if value_end >= 0 else None
+                if value_token not in (0x5B, 0x7B):
+                    literal_end = _LITERAL_END.search(buffer, value_start)
+                    value_end = literal_end.start() if literal_end is not None else len(buffer)
+                    return key_start, value_start, value_end
+                depth += 1
+                position = value_start + 1
+            else:
+                last_key_start = None
+                position += 1
+        else:
+            depth += 1 if token in (0x5B, 0x7B) else -1
+            if value_start is not None and depth == 1:
+                return key_start, value_start, position + 1
+            position += 1
+
+
+def _dump_nested_value(value: Any, buffer, key_start: int) -> bytes:
+    """按键所在行的缩进序列化嵌套值，使输出与整体 json.dump(indent=...) 的格式一致。"""
+    line_start = buffer.rfind(b'\n', 0, key_start) + 1
+    indent = bytes(buffer[line_start:key_start])
+    if line_start == 0 or indent.strip(_JSON_WHITESPACE):
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    indent_text = indent.decode('ascii')
+    text = json.dumps(value, indent=indent_text, ensure_ascii=False)
+    return text.replace('\n', '\n' + indent_text).encode('utf-8')
+
+
+def _fsync_dir(dir_path: Path | str) -> None:
+    """fsync 目录，使其中的新建与替换操作落盘。Windows 不支持目录 fsync，直接跳过。"""
+    if os.name == "nt":
+        return
+    try:
+        fd = os.open(dir_path, os.O_RDONLY)
+    except OSError:
+        return
     try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _write_chunks(json_path: Path | str, chunks, fsync: str | None = None, make_dirs: bool = True) -> int:
+    """先写入同目录下的临时文件再替换目标文件，写入失败时目标文件保持原样。
+
+    参数:
+        fsync: fsync 策略，为空时使用默认值
+        make_dirs: 是否先创建父目录，调用方已确认目录存在时可跳过
+
+    返回:
+        写入的字节数
+    """
+    policy = _fsync_policy if fsync is None else fsync
+    json_path = Path(json_path)
+    if make_dirs:
         json_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+    temp_path = json_path.with_name(f"{json_path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    written = 0
+    try:
+        with open(temp_path, 'xb') as f:
+            for chunk in chunks:
+                written += f.write(chunk)
+            if policy != FSYNC_NONE:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temp_path, json_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+    if policy == FSYNC_FULL:
+        _fsync_dir(json_path.parent)
+    return written
+
+
+def write_bytes_atomic(file_path: Path | str, data: bytes, fsync: str | None = None) -> int:
+    """通过临时文件替换原子地写出字节，返回写入的字节数；失败时抛出异常，原文件保持不变。"""
+    return _write_chunks(file_path, (data,), fsync)
+
+
+def _replace_top_level_value(
+    source_path: Path | str,
+    target_path: Path | str,
+    key: str,
+    value: Any,
+    encode_value: Callable[[Any, int], bytes],
+    fsync: str | None = None,
+    make_dirs: bool = True,
+) -> int:
+    """将 source_path 顶层 key 的值替换后写入 target_path，其余字节原样复制。
+
+    encode_value(buffer, key_start) 返回新值的字节；找不到顶层 key 时退回完整解析后重新写出。
+
+    返回:
+        写入的字节数
+    """
+    try:
+        # 先把需要的字节复制出来并关闭文件与映射再写出：Windows 不允许替换仍被打开或映射的文件，
+        # source_path 与 target_path 相同时在 with 块内调用 os.replace 会失败
+        chunks = None
+        with open(source_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                json.loads(b'')
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                span = _find_top_level_value_span(buffer, json.dumps(key).encode('utf-8'))
+                if span is not None:
+                    key_start, value_start, value_end = span
+                    chunks = (
+                        buffer[:value_start],
+                        encode_value(buffer, key_start),
+                        buffer[value_end:],
+                    )
+                else:
+                    data = json.loads(buffer[:])
+
+        if chunks is None:
+            data[key] = value
+            chunks = (_encode_labelme_json(data),)
+        return _write_chunks(target_path, chunks, fsync, make_dirs)
+    finally:
+        _annotation_cache.invalidate(target_path)
+
+
+def write_labelme_shapes(source_path: Path | str, target_path: Path | str, shapes: list[dict]) -> None:
+    """将 source_path 的 shapes 替换为新内容后写入 target_path，其余字节原样复制。
+
+    只重新序列化 shapes 数组，imageData 等字段按原始字节写出，写入耗时与 shapes 大小相当。
+    新 shapes 的缩进沿用原文件中 "shapes" 所在行的缩进。
+    原文件找不到顶层 shapes 字段时退回完整解析后重新写出。
+    source_path 与 target_path 可以相同，写入通过临时文件替换完成。
+
+    读取或写入失败时抛出异常。
+    """
+    _replace_top_level_value(
+        source_path, target_path, 'shapes', shapes,
+        lambda buffer, key_start: _dump_nested_value(shapes, buffer, key_start),
+    )
+
+
+class LabelmeWriter:
+    """批量写出 Labelme JSON 的写入器。
+
+    每个文件都通过临时文件替换写出。已确认存在的目录记录在内存中，数千个输出文件只需为每个目录 mkdir 一次；
+    fsync 策略为 FSYNC_FULL 时，目录的 fsync 推迟到 close() 时每个目录只做一次。
+    可在多个线程中共用同一个实例。
+    """
+
+    def __init__(self, compact: bool = False, fsync: str | None = None):
+        """
+        参数:
+            compact: write() 是否使用无缩进的紧凑格式
+            fsync: fsync 策略，为空时使用 set_fsync_policy 设置的默认值
+        """
+        self.compact = compact
+        self.fsync = _fsync_policy if fsync is None else fsync
+        if self.fsync not in FSYNC_POLICIES:
+            raise ValueError(f"未知的 fsync 策略: {self.fsync}")
+        self.files_written = 0
+        self.bytes_written = 0
+        self._known_dirs: set[str] = set()
+        self._pending_sync_dirs: set[str] = set()
+        self._lock = threading.Lock()
+
+    def ensure_dir(self, dir_path: Path | str) -> None:
+        """确保目录存在，同一目录只创建一次。"""
+        key = os.fspath(dir_path)
+        with self._lock:
+            if key in self._known_dirs:
+                return
+        os.makedirs(key, exist_ok=True)
+        with self._lock:
+            self._known_dirs.add(key)
+
+    def _file_fsync(self) -> str:
+        # 目录 fsync 留到 close() 统一执行，单个文件只需 fsync 自身
+        return FSYNC_FILE if self.fsync == FSYNC_FULL else self.fsync
+
+    def _record(self, json_path: Path | str, written: int) -> None:
+        with self._lock:
+            self.files_written += 1
+            self.bytes_written += written
+            if self.fsync == FSYNC_FULL:
+                self._pending_sync_dirs.add(os.path.dirname(os.fspath(json_path)))
+
+    def write(self, json_path: Path | str, data: dict) -> None:
+        """写出完整的 Labelme JSON 字典，失败时抛出异常。"""
+        self.ensure_dir(os.path.dirname(os.fspath(json_path)) or ".")
+        try:
+            written = _write_chunks(
+                json_path, (_encode_labelme_json(data, self.compact),), self._file_fsync(), make_dirs=False,
+            )
+        finally:
+            _annotation_cache.invalidate(json_path)
+        self._record(json_path, written)
+
+    def write_shapes(self, source_path: Path | str, target_path: Path | str, shapes: list[dict]) -> None:
+        """同 write_labelme_shapes，只替换 shapes 的字节，失败时抛出异常。"""
+        self.ensure_dir(os.path.dirname(os.fspath(target_path)) or ".")
+        written = _replace_top_level_value(
+            source_path, target_path, 'shapes', shapes,
+            lambda buffer, key_start: _dump_nested_value(shapes, buffer, key_start),
+            self._file_fsync(), make_dirs=False,
+        )
+        self._record(target_path, written)
+
+    def close(self) -> None:
+        """fsync 所有写入过文件的目录（仅 FSYNC_FULL 策略）。"""
+        with self._lock:
+            pending_dirs = sorted(self._pending_sync_dirs)
+            self._pending_sync_dirs.clear()
+        for dir_path in pending_dirs:
+            _fsync_dir(dir_path or ".")
+
+    def __enter__(self) -> "LabelmeWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def read_labelme_image_data(json_path: Path | str) -> bytes | None:
+    """读取顶层 imageData 的 base64 原始字节，不解码为字符串；字段不存在或为 null 时返回 None。
+
+    读取或解析失败时抛出异常。
+    """
+    with open(json_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            json.loads(b'')
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            span = _find_top_level_value_span(buffer, IMAGE_DATA_KEY)
+            if span is None:
+                return None
+            _key_start, value_start, value_end = span
+            if buffer[value_start] != 0x22:
+                value = json.loads(buffer[value_start:value_end])
+                if value is None:
+                    return None
+                raise ValueError(f"imageData 不是字符串: {type(value).__name__}")
+
+            raw = buffer[value_start + 1:value_end - 1]
+            if b'\\' in raw:
+                raw = json.loads(buffer[value_start:value_end]).encode('ascii')
+            return raw
+
+
+def write_labelme_image_data(
+    source_path: Path | str,
+    target_path: Path | str,
+    image_data: bytes | None,
+) -> None:
+    """将 source_path 的 imageData 替换为给定的 base64 字节（None 写为 null）后写入 target_path。
+
+    只替换 imageData 的值，shapes 等其余字节原样复制。读取或写入失败时抛出异常。
+    """
+    if image_data is not None and not _BASE64_TEXT.fullmatch(image_data):
+        raise ValueError("imageData 含有非 base64 字符")
+
+    encoded = b'null' if image_data is None else b'"' + image_data + b'"'
+    _replace_top_level_value(
+        source_path, target_path, 'imageData',
+        None if image_data is None else image_data.decode('ascii'),
+        lambda _buffer, _key_start: encoded,
+    )
+
+
+def save_labelme_shapes(json_path: Path | str, shapes: list[dict]) -> bool:
+    """原地替换 Labelme JSON 的 shapes，其余字节保持不变"""
+    try:
+        write_labelme_shapes(json_path, json_path, shapes)
         return True
     except Exception:
         return False
 
 
+def _points_array(points: Any) -> np.ndarray:
+    """将 points 转为 C 连续的 float64 (N, 2) 数组，无法转换时抛出 ValueError。"""
+    try:
+        array = np.ascontiguousarray(points, dtype=np.float64)
+    except TypeError as e:
+        raise ValueError(f"points 无法转换为坐标数组: {e}") from None
+    if array.size == 0:
+        return array.reshape(0, 2)
+    if array.ndim != 2 or array.shape[1] != 2:
+        raise ValueError(f"points 形状为 {array.shape}，应为 (N, 2)")
+    return array
+
+
+# Shape.to_dict / Annotation.to_dict 的字段顺序与 Labelme 保存的顺序一致
+_SHAPE_FIELDS = ('label', 'points', 'group_id', 'shape_type', 'flags')
+_ANNOTATION_FIELDS = ('version', 'flags', 'shapes', 'imagePath', 'imageHeight', 'imageWidth')
+
+_MISSING = object()
+
+
+class Shape:
+    """单个标注形状。
+
+    points 在首次访问时才转换为 float64 (N, 2) 数组，转换后丢弃原始的嵌套列表；
+    只读取标签的场景不会产生任何数组。提供 get()/[] 字典式读取，可直接传给接收 shape 字典的函数。
+    """
+
+    __slots__ = ("label", "shape_type", "group_id", "flags", "extra", "_raw_points", "_points")
+
+    def __init__(
+        self,
+        label: str,
+        points: Any = (),
+        shape_type: str | None = 'polygon',
+        group_id: Any = None,
+        flags: dict | None = None,
+        extra: dict | None = None,
+    ):
+        self.label = label
+        self.shape_type = shape_type
+        self.group_id = group_id
+        self.flags = flags if flags is not None else {}
+        self.extra = extra if extra is not None else {}
+        if isinstance(points, np.ndarray):
+            self._raw_points = None
+            self._points = _points_array(points)
+        else:
+            self._raw_points = points
+            self._points = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Shape":
+        """从 Labelme shape 字典创建，未知字段保存在 extra 中。"""
+        extra = {key: value for key, value in data.items() if key not in _SHAPE_FIELDS}
+        return cls(
+            label=data.get('label', ''),
+            points=data.get('points', []),
+            shape_type=data.get('shape_type'),
+            group_id=data.get('group_id'),
+            flags=data.get('flags'),
+            extra=extra,
+        )
+
+    @property
+    def points(self) -> np.ndarray:
+        """float64 (N, 2) 点坐标数组，可直接传给 shapely 或 NumPy。"""
+        if self._points is None:
+            self._points = _points_array(self._raw_points)
+            self._raw_points = None
+        return self._points
+
+    @points.setter
+    def points(self, value: Any) -> None:
+        self._points = _points_array(value)
+        self._raw_points = None
+
+    @property
+    def point_count(self) -> int:
+        """点数，不触发数组转换。"""
+        if self._points is not None:
+            return len(self._points)
+        try:
+            return len(self._raw_points)
+        except TypeError:
+            return 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key == 'label':
+            return self.label
+        if key == 'points':
+            return self.points
+        if key == 'shape_type':
+            return self.shape_type
+        if key == 'group_id':
+            return self.group_id
+        if key == 'flags':
+            return self.flags
+        return self.extra.get(key, default)
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def to_dict(self) -> dict:
+        """转换回 Labelme shape 字典；points 未转换过时原样输出原始列表。"""
+        points = self._raw_points if self._points is None else self._points.tolist()
+        result = {
+            'label': self.label,
+            'points': points,
+            'group_id': self.group_id,
+            'shape_type': self.shape_type,
+            'flags': self.flags,
+        }
+        result.update(self.extra)
+        return result
+
+    def __repr__(self) -> str:
+        return f"Shape(label={self.label!r}, shape_type={self.shape_type!r}, points={self.point_count})"
+
+
+class Annotation:
+    """单个 Labelme 标注文件的内容（不含 imageData）。
+
+    shapes 为 Shape 列表；imageData 等未知顶层字段保存在 extra 中。
+    """
+
+    __slots__ = ("shapes", "image_path", "image_width", "image_height", "version", "flags", "extra")
+
+    def __init__(
+        self,
+        shapes: list[Shape] | None = None,
+        image_path: str | None = None,
+        image_width: int | None = None,
+        image_height: int | None = None,
+        version: str | None = None,
+        flags: dict | None = None,
+        extra: dict | None = None,
+    ):
+        self.shapes = shapes if shapes is not None else []
+        self.image_path = image_path
+        self.image_width = image_width
+        self.image_height = image_height
+        self.version = version
+        self.flags = flags if flags is not None else {}
+        self.extra = extra if extra is not None else {}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Annotation":
+        """从 Labelme JSON 字典创建。"""
+        extra = {key: value for key, value in data.items() if key not in _ANNOTATION_FIELDS}
+        return cls(
+            shapes=[Shape.from_dict(shape) for shape in data.get('shapes', [])],
+            image_path=data.get('imagePath'),
+            image_width=data.get('imageWidth'),
+            image_height=data.get('imageHeight'),
+            version=data.get('version'),
+            flags=data.get('flags'),
+            extra=extra,
+        )
+
+    def to_dict(self) -> dict:
+        """转换回 Labelme JSON 字典。"""
+        result = {
+            'version': self.version,
+            'flags': self.flags,
+            'shapes': [shape.to_dict() for shape in self.shapes],
+            'imagePath': self.image_path,
+            'imageHeight': self.image_height,
+            'imageWidth': self.image_width,
+        }
+        result.update(self.extra)
+        return result
+
+    def labels(self) -> list[str]:
+        """所有形状的标签。"""
+        return [shape.label for shape in self.shapes]
+
+    def polygon_points(self, min_points: int = 3) -> list[np.ndarray]:
+        """所有点数不少于 min_points 的 polygon 的坐标数组。"""
+        return [
+            shape.points for shape in self.shapes
+            if shape.shape_type == 'polygon' and shape.point_count >= min_points
+        ]
+
+    def __repr__(self) -> str:
+        return f"Annotation(image_path={self.image_path!r}, shapes={len(self.shapes)})"
+
+
+def read_annotation(json_path: Path | str) -> Annotation:
+    """通过共享标注缓存读取为 Annotation（不含 imageData），失败时抛出异常。"""
+    return Annotation.from_dict(read_cached_labelme_shapes(json_path))
+
+
+def load_annotation(json_path: Path | str) -> Annotation | None:
+    """读取为 Annotation，失败时返回 None"""
+    try:
+        return read_annotation(json_path)
+    except Exception:
+        return None
+
+
 def get_shapes(data: dict) -> list[dict]:
     """获取 shapes 列表"""
     return data.get('shapes', [])
@@ -33,8 +956,11 @@ def get_labels(data: dict) -> list[str]:
     return [s.get('label', '') for s in data.get('shapes', [])]
 
 
-def get_polygon_points(shapes: list[dict]) -> list[list[tuple[float, float]]]:
-    """从 shapes 中提取所有多边形点"""
+def get_polygon_points(shapes: "list[dict | Shape]") -> list:
+    """从 shapes 中提取所有多边形点
+
+    shape 为字典时返回原始点列表，为 Shape 时返回 float64 (N, 2) 数组。
+    """
     polygons = []
     for s in shapes:
         if s.get('shape_type') == 'polygon':
@@ -56,3 +982,165 @@ def validate_labels(shapes: list[dict], valid_codes: set) -> list[str]:
         if label and label not in valid_codes:
             invalid.add(label)
     return list(invalid)
+
+
+# Labelme 支持的 shape_type
+KNOWN_SHAPE_TYPES = ('polygon', 'rectangle', 'circle', 'line', 'point', 'linestrip', 'points', 'mask')
+
+# 点数固定的 shape_type；多边形至少 3 个点
+_EXACT_POINT_COUNTS = {'rectangle': 2, 'circle': 2, 'line': 2, 'point': 1}
+_MIN_POLYGON_POINTS = 3
+
+# 多边形面积（平方像素）不大于该值视为零面积
+ZERO_AREA_EPSILON = 1e-6
+
+# check_shape_structure 报告的问题类型
+ISSUE_NON_NUMERIC = "坐标非数值"
+ISSUE_NON_FINITE = "坐标含 NaN/inf"
+ISSUE_DUPLICATE_VERTEX = "相邻顶点重复"
+ISSUE_ZERO_AREA = "多边形面积为零"
+ISSUE_POINT_COUNT = "点数不符"
+ISSUE_UNKNOWN_TYPE = "未知 shape_type"
+
+SHAPE_ISSUE_TYPES = (
+    ISSUE_NON_NUMERIC,
+    ISSUE_NON_FINITE,
+    ISSUE_DUPLICATE_VERTEX,
+    ISSUE_ZERO_AREA,
+    ISSUE_POINT_COUNT,
+    ISSUE_UNKNOWN_TYPE,
+)
+
+
+def _raw_shape_points(shape: "dict | Shape") -> Any:
+    """取 shape 的原始点数据，不触发 Shape 的数组转换。"""
+    if isinstance(shape, Shape):
+        return shape._points if shape._points is not None else shape._raw_points
+    return shape.get('points', [])
+
+
+def _is_coordinate_array(array: np.ndarray) -> bool:
+    return array.dtype.kind in 'iuf' and array.ndim == 2 and array.shape[1] == 2
+
+
+def _shape_coordinates(points: Any) -> np.ndarray | None:
+    """将单个 shape 的点转为 float64 (N, 2) 数组；含非数值或结构不是点列表时返回 None。"""
+    if not isinstance(points, (list, tuple, np.ndarray)):
+        return None
+    if len(points) == 0:
+        return np.empty((0, 2), dtype=np.float64)
+    try:
+        array = np.asarray(points)
+    except (TypeError, ValueError):
+        return None
+    if not _is_coordinate_array(array):
+        return None
+    return array.astype(np.float64, copy=False)
+
+
+def _concat_coordinates(raw_points: list) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """将所有 shape 的点拼接为一个 (M, 2) 数组。
+
+    返回:
+        (坐标数组, 每个 shape 的点数, 每个 shape 的点是否为合法数值坐标)
+    """
+    lengths = [len(points) if isinstance(points, (list, tuple, np.ndarray)) else -1 for points in raw_points]
+    if min(lengths, default=0) >= 0:
+        # 常见情况：所有点一次转换，不逐个 shape 创建数组
+        flat = [point for points in raw_points for point in points]
+        try:
+            coords = np.asarray(flat) if flat else np.empty((0, 2), dtype=np.float64)
+        except (TypeError, ValueError):
+            coords = None
+        if coords is not None and _is_coordinate_array(coords):
+            return (
+                coords.astype(np.float64, copy=False),
+                np.asarray(lengths, dtype=np.int64),
+                np.ones(len(raw_points), dtype=bool),
+            )
+
+    # 存在异常数据时逐个 shape 转换，定位非数值的 shape 并将其点数记为 0
+    arrays = [_shape_coordinates(points) for points in raw_points]
+    numeric = np.array([array is not None for array in arrays], dtype=bool)
+    arrays = [array if array is not None else np.empty((0, 2), dtype=np.float64) for array in arrays]
+    lengths = np.array([len(array) for array in arrays], dtype=np.int64)
+    return np.concatenate(arrays), lengths, numeric
+
+
+def check_shape_structure(shapes: "list[dict | Shape]") -> list[tuple[int, str, str]]:
+    """检查 shapes 的点数据结构，所有坐标在一次向量化计算中完成检查。
+
+    检查项: 非数值坐标、NaN/inf 坐标、相邻重复顶点（多边形含首尾）、零面积多边形、
+    点数不符（矩形、圆、线段须 2 个点，点须 1 个点，多边形至少 3 个点）、未知 shape_type。
+
+    参数:
+        shapes: shape 字典或 Shape 列表
+
+    返回:
+        [(shape 序号, 问题类型, 说明)]，按 shape 序号排列，没有问题时为空列表
+    """
+    if not shapes:
+        return []
+
+    shape_types = [shape.get('shape_type') for shape in shapes]
+    coords, lengths, numeric = _concat_coordinates([_raw_shape_points(shape) for shape in shapes])
+
+    shape_count = len(shapes)
+    point_count = len(coords)
+    is_polygon = np.array([shape_type == 'polygon' for shape_type in shape_types], dtype=bool)
+    expected = np.array([_EXACT_POINT_COUNTS.get(shape_type, -1) for shape_type in shape_types], dtype=np.int64)
+
+    owner = np.repeat(np.arange(shape_count), lengths)
+    starts = np.cumsum(lengths) - lengths
+    ends = starts + lengths - 1
+    has_points = lengths > 0
+
+    finite = np.isfinite(coords).all(axis=1)
+    non_finite_counts = np.bincount(owner[~finite], minlength=shape_count)
+    non_finite = non_finite_counts > 0
+
+    # 每个点的下一个顶点；每个 shape 的最后一点回到第一点，仅多边形计入首尾这一对
+    positions = np.arange(point_count)
+    following = positions + 1
+    following[ends[has_points]] = starts[has_points]
+    closing = np.zeros(point_count, dtype=bool)
+    closing[ends[has_points]] = True
+    edge = (~closing | is_polygon[owner]) & (following != positions)
+
+    duplicate = edge & (coords == coords[following]).all(axis=1)
+    duplicate_counts = np.bincount(owner[duplicate], minlength=shape_count)
+
+    # 鞋带公式；含 NaN/inf 的 shape 面积无意义，不参与零面积判断
+    with np.errstate(invalid='ignore', over='ignore'):
+        x = coords[:, 0]
+        y = coords[:, 1]
+        cross = x * y[following] - x[following] * y
+        areas = 0.5 * np.abs(np.bincount(owner, weights=cross, minlength=shape_count))
+    zero_area = numeric & is_polygon & ~non_finite & (lengths >= _MIN_POLYGON_POINTS) & (areas <= ZERO_AREA_EPSILON)
+
+    wrong_count = numeric & (
+        ((expected >= 0) & (lengths != expected))
+        | (is_polygon & (lengths < _MIN_POLYGON_POINTS))
+    )
+    unknown_type = np.array([shape_type not in KNOWN_SHAPE_TYPES for shape_type in shape_types], dtype=bool)
+
+    flagged = ~numeric | non_finite | (duplicate_counts > 0) | zero_area | wrong_count | unknown_type
+    issues = []
+    for index in np.flatnonzero(flagged).tolist():
+        shape_type = shape_types[index]
+        if unknown_type[index]:
+            issues.append((index, ISSUE_UNKNOWN_TYPE, f"shape_type 为 {shape_type!r}"))
+        if not numeric[index]:
+            issues.append((index, ISSUE_NON_NUMERIC, "points 不是由两个数值组成的坐标列表"))
+            continue
+        if non_finite[index]:
+            issues.append((index, ISSUE_NON_FINITE, f"{non_finite_counts[index]} 个点"))
+        if wrong_count[index]:
+            required = f"应为 {expected[index]}" if expected[index] >= 0 else f"至少 {_MIN_POLYGON_POINTS}"
+            issues.append((index, ISSUE_POINT_COUNT, f"{shape_type} 有 {lengths[index]} 个点，{required}"))
+        if duplicate_counts[index]:
+            issues.append((index, ISSUE_DUPLICATE_VERTEX, f"{duplicate_counts[index]} 处"))
+        if zero_area[index]:
+            issues.append((index, ISSUE_ZERO_AREA, f"面积 {areas[index]:.3g}"))
+
+    return issues
@@ -0,0 +1,398 @@
+"""
+数据集清单模块
+
+一次扫描得到数据集中全部图片与 JSON 的清单：路径、size、mtime_ns、可选的内容哈希以及配对分组。
+各工具的 run_* 均可接收清单代替自行遍历目录，并在结果中返回本次使用的清单，
+从而支持跳过目录发现、只处理有变化的文件，或直接处理外部提供的文件列表。
+
+清单文件为 UTF-8 CSV，表头为 path,size,mtime_ns,hash,group，只有 path 列是必需的：
+    path: 相对数据集根目录的路径（以 / 分隔），根目录之外的文件为绝对路径
+    size / mtime_ns: 文件大小与修改时间，为空表示未记录，增量比较时视为已变化
+    hash: 内容哈希（BLAKE2b-128 十六进制），为空表示未计算
+    group: 配对分组，为相对目录与小写主文件名，同组的图片与 JSON 互为配对
+"""
+
+import csv
+import hashlib
+import os
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from .cancellation import CancelToken
+from .file_scanner import DirectoryIndex, ExcludeMatcher, build_directory_index, is_image_file, walk_directories
+from .pipeline import iter_read_ahead
+from .progress import ProgressCallback, ProgressReporter
+
+
+MANIFEST_FIELDS = ("path", "size", "mtime_ns", "hash", "group")
+
+MANIFEST_FILE_NAME = "数据清单.csv"
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(file_path: str) -> str:
+    """计算文件内容的 BLAKE2b-128 哈希，返回十六进制字符串。"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ManifestEntry:
+    """清单中的单个文件。size / mtime_ns / hash 为 None 表示未记录。"""
+
+    __slots__ = ("path", "size", "mtime_ns", "hash", "group")
+
+    def __init__(
+        self,
+        path: str,
+        size: int | None = None,
+        mtime_ns: int | None = None,
+        hash: str | None = None,
+        group: str = "",
+    ):
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.hash = hash
+        self.group = group
+
+    @property
+    def is_json(self) -> bool:
+        return self.path.lower().endswith(".json")
+
+    @property
+    def is_image(self) -> bool:
+        return is_image_file(self.path)
+
+    def same_content(self, other: "ManifestEntry") -> bool:
+        """判断两条记录是否可视为同一内容；任一方缺少 size/mtime 时视为不同。"""
+        if self.hash is not None and other.hash is not None:
+            return self.hash == other.hash
+        if None in (self.size, self.mtime_ns, other.size, other.mtime_ns):
+            return False
+        return self.size == other.size and self.mtime_ns == other.mtime_ns
+
+    def __repr__(self) -> str:
+        return f"ManifestEntry({self.path!r}, size={self.size}, mtime_ns={self.mtime_ns}, group={self.group!r})"
+
+
+def _path_key(file_path: str) -> str:
+    """比较路径用的规范形式，使遍历得到的路径与从清单文件读入的路径可以互相匹配。"""
+    return os.path.normcase(os.path.abspath(file_path))
+
+
+def _group_key(root_path: str, file_path: str) -> str:
+    """配对分组：相对目录 + 小写主文件名，以 / 分隔。"""
+    rel_path = os.path.relpath(file_path, root_path)
+    stem = os.path.splitext(rel_path)[0]
+    rel_dir, name = os.path.split(stem)
+    return "/".join(filter(None, (rel_dir.replace(os.sep, "/"), name.lower())))
+
+
+def _stat_entry(entry: ManifestEntry, with_hash: bool, previous: ManifestEntry | None = None) -> ManifestEntry | None:
+    """读取阶段：stat 文件并按需计算哈希，文件不存在时返回 None。"""
+    try:
+        stat = os.stat(entry.path)
+    except OSError:
+        return None
+
+    refreshed = ManifestEntry(entry.path, stat.st_size, stat.st_mtime_ns, None, entry.group)
+    if previous is not None and previous.hash is not None and previous.same_content(refreshed):
+        refreshed.hash = previous.hash
+    elif with_hash:
+        try:
+            refreshed.hash = hash_file(entry.path)
+        except OSError:
+            return None
+    return refreshed
+
+
+class DatasetManifest:
+    """数据集清单，条目顺序与目录遍历顺序一致。
+
+    目录内先列图片再列 JSON，json_paths() 的顺序与 scan_json_files 相同。
+    """
+
+    def __init__(self, root_path: str, entries: Iterable[ManifestEntry] = ()):
+        self.root_path = root_path
+        self.entries: list[ManifestEntry] = list(entries)
+
+    @classmethod
+    def build(
+        cls,
+        root_path: str,
+        exclude_dirs: "list[str] | ExcludeMatcher | None" = None,
+        stat_files: bool = True,
+        with_hash: bool = False,
+        progress: ProgressCallback | None = None,
+        cancel: CancelToken | None = None,
+    ) -> "DatasetManifest":
+        """遍历目录树一次，生成清单。
+
+        参数:
+            root_path: 数据集根目录
+            exclude_dirs: 要排除的目录名、路径或通配模式
+            stat_files: 是否记录每个文件的 size 与 mtime_ns
+            with_hash: 是否计算内容哈希，需要读取全部文件，仅在 stat_files 为 True 时生效
+            progress: 进度回调
+            cancel: 取消令牌，取消后清单只包含已列出的目录
+
+        返回:
+            DatasetManifest 实例
+        """
+        manifest = cls(root_path)
+        for dir_path, listing in walk_directories(root_path, exclude_dirs, progress=progress, cancel=cancel):
+            image_names, json_names = listing[2], listing[3]
+            for file_name in (*image_names, *json_names):
+                file_path = os.path.join(dir_path, file_name)
+                manifest.entries.append(ManifestEntry(file_path, group=_group_key(manifest.root_path, file_path)))
+
+        if stat_files:
+            return manifest.refresh(with_hash=with_hash, progress=progress, cancel=cancel)
+        return manifest
+
+    @classmethod
+    def from_directory_index(cls, index: DirectoryIndex) -> "DatasetManifest":
+        """由已构建的目录索引生成清单，不 stat 文件。"""
+        manifest = cls(index.root_path)
+        for dir_path in index.dirs:
+            image_names, json_names = index.get_files(dir_path)
+            for file_name in (*image_names, *json_names):
+                file_path = os.path.join(dir_path, file_name)
+                manifest.entries.append(ManifestEntry(file_path, group=_group_key(manifest.root_path, file_path)))
+        return manifest
+
+    @classmethod
+    def from_paths(cls, root_path: str, paths: Iterable[str | Path]) -> "DatasetManifest":
+        """由外部提供的文件列表生成清单，相对路径按根目录解析，只保留图片与 JSON。"""
+        manifest = cls(root_path)
+        for path in paths:
+            file_path = os.path.normpath(os.path.join(manifest.root_path, path))
+            if is_image_file(file_path) or file_path.lower().endswith(".json"):
+                manifest.entries.append(ManifestEntry(file_path, group=_group_key(manifest.root_path, file_path)))
+        return manifest
+
+    @classmethod
+    def load(cls, manifest_path: str, root_path: str | None = None) -> "DatasetManifest":
+        """读取清单文件。
+
+        参数:
+            manifest_path: 清单 CSV 路径
+            root_path: 数据集根目录，相对路径按其解析；为空时使用清单文件所在目录
+
+        返回:
+            DatasetManifest 实例；表头缺少 path 列时抛出 ValueError
+        """
+        if root_path is None:
+            root_path = os.path.dirname(os.path.abspath(manifest_path))
+
+        manifest = cls(root_path)
+        with open(manifest_path, "r", encoding="utf-8-sig", newline="") as f:
+            reader = csv.DictReader(f)
+            if not reader.fieldnames or "path" not in reader.fieldnames:
+                raise ValueError("清单文件缺少 path 列")
+
+            for row in reader:
+                path = (row.get("path") or "").strip()
+                if not path:
+                    continue
+                file_path = os.path.normpath(os.path.join(manifest.root_path, path))
+                manifest.entries.append(ManifestEntry(
+                    file_path,
+                    size=_parse_int(row.get("size")),
+                    mtime_ns=_parse_int(row.get("mtime_ns")),
+                    hash=(row.get("hash") or "").strip() or None,
+                    group=(row.get("group") or "").strip() or _group_key(manifest.root_path, file_path),
+                ))
+        return manifest
+
+    def save(self, manifest_path: str | None = None) -> str:
+        """写出清单文件，返回文件路径；路径为空时写入根目录下的 MANIFEST_FILE_NAME。"""
+        if manifest_path is None:
+            manifest_path = os.path.join(self.root_path, MANIFEST_FILE_NAME)
+
+        rows = []
+        for entry in self.entries:
+            rel_path = os.path.relpath(entry.path, self.root_path)
+            if rel_path == os.pardir or rel_path.startswith(os.pardir + os.sep):
+                rel_path = entry.path
+            else:
+                rel_path = rel_path.replace(os.sep, "/")
+            rows.append((
+                rel_path,
+                "" if entry.size is None else entry.size,
+                "" if entry.mtime_ns is None else entry.mtime_ns,
+                entry.hash or "",
+                entry.group,
+            ))
+
+        with open(manifest_path, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(MANIFEST_FIELDS)
+            writer.writerows(rows)
+        return manifest_path
+
+    def refresh(
+        self,
+        with_hash: bool = False,
+        progress: ProgressCallback | None = None,
+        cancel: CancelToken | None = None,
+    ) -> "DatasetManifest":
+        """重新 stat 全部文件，返回新的清单，已不存在的文件被移除。
+
+        size 与 mtime_ns 未变化的文件沿用原有哈希，with_hash 为 True 时为其余文件重新计算哈希。
+        """
+        refreshed = DatasetManifest(self.root_path)
+        reporter = ProgressReporter(progress, "记录文件信息", total_files=len(self.entries))
+        for entry, result, _error in iter_read_ahead(
+            self.entries, lambda item: _stat_entry(item, with_hash, item), cancel=cancel,
+        ):
+            reporter.advance(files=1)
+            if result is not None:
+                refreshed.entries.append(result)
+        reporter.finish()
+        return refreshed
+
+    def changed_since(self, previous: "DatasetManifest | None") -> "DatasetManifest":
+        """返回相对 previous 新增或内容变化的条目组成的清单，两边都需记录 size 与 mtime_ns 才能判断未变化。"""
+        if previous is None:
+            return DatasetManifest(self.root_path, self.entries)
+
+        previous_entries = {_path_key(entry.path): entry for entry in previous.entries}
+        changed = []
+        for entry in self.entries:
+            old_entry = previous_entries.get(_path_key(entry.path))
+            if old_entry is None or not entry.same_content(old_entry):
+                changed.append(entry)
+        return DatasetManifest(self.root_path, changed)
+
+    def without(self, paths: Iterable[str]) -> "DatasetManifest":
+        """返回移除指定文件后的清单。"""
+        removed = {_path_key(path) for path in paths}
+        return DatasetManifest(self.root_path, [entry for entry in self.entries if _path_key(entry.path) not in removed])
+
+    def without_dir(self, dir_path: str | Path) -> "DatasetManifest":
+        """返回移除指定目录（含子目录）下全部文件后的清单，用于剔除工具自身的输出目录。"""
+        prefix = os.path.join(_path_key(str(dir_path)), "")
+        return DatasetManifest(
+            self.root_path, [entry for entry in self.entries if not _path_key(entry.path).startswith(prefix)],
+        )
+
+    def json_paths(self) -> list[Path]:
+        """按清单顺序返回全部 JSON 文件路径。"""
+        return [Path(entry.path) for entry in self.entries if entry.is_json]
+
+    def image_paths(self) -> list[Path]:
+        """按清单顺序返回全部图片文件路径。"""
+        return [Path(entry.path) for entry in self.entries if entry.is_image]
+
+    def to_directory_index(self) -> DirectoryIndex:
+        """将清单转换为目录索引，供按目录统计的函数直接使用，不访问文件系统。
+
+        目录顺序为清单中首次出现的顺序，子目录关系只包含清单中出现过的目录。
+        """
+        index = DirectoryIndex(self.root_path)
+        listings: dict[str, tuple[list[str], list[str]]] = {}
+        for entry in self.entries:
+            dir_path, file_name = os.path.split(entry.path)
+            image_names, json_names = listings.setdefault(dir_path, ([], []))
+            if entry.is_json:
+                json_names.append(file_name)
+            elif entry.is_image:
+                image_names.append(file_name)
+
+        subdirs: dict[str, list[str]] = {dir_path: [] for dir_path in listings}
+        for dir_path in listings:
+            parent_path, name = os.path.split(dir_path)
+            if parent_path in subdirs and parent_path != dir_path:
+                subdirs[parent_path].append(name)
+
+        for dir_path, (image_names, json_names) in listings.items():
+            index._add_dir(dir_path, subdirs[dir_path], image_names, json_names)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self) -> Iterator[ManifestEntry]:
+        return iter(self.entries)
+
+    def __repr__(self) -> str:
+        return f"DatasetManifest({self.root_path!r}, {len(self.entries)} 个文件)"
+
+
+def _parse_int(value: str | None) -> int | None:
+    value = (value or "").strip()
+    return int(value) if value else None
+
+
+def build_manifest(
+    root_path: str,
+    exclude_dirs: "list[str] | ExcludeMatcher | None" = None,
+    stat_files: bool = True,
+    with_hash: bool = False,
+    progress: ProgressCallback | None = None,
+    cancel: CancelToken | None = None,
+) -> DatasetManifest:
+    """遍历目录树一次生成数据集清单，参数同 DatasetManifest.build。"""
+    return DatasetManifest.build(
+        root_path, exclude_dirs=exclude_dirs, stat_files=stat_files, with_hash=with_hash,
+        progress=progress, cancel=cancel,
+    )
+
+
+def resolve_manifest(manifest: "DatasetManifest | str | None", root_path: str) -> DatasetManifest | None:
+    """将工具参数中的清单统一为 DatasetManifest：为路径时读取清单文件，相对路径按 root_path 解析。"""
+    if manifest is None or isinstance(manifest, DatasetManifest):
+        return manifest
+    return DatasetManifest.load(manifest, root_path)
+
+
+def prepare_manifest(
+    manifest: "DatasetManifest | str | None",
+    root_path: str,
+    exclude_dirs: "list[str] | ExcludeMatcher | None" = None,
+    stat_files: bool = False,
+    progress: ProgressCallback | None = None,
+    cancel: CancelToken | None = None,
+) -> DatasetManifest:
+    """逐文件处理的工具在入口处调用：未提供清单时遍历目录生成，提供时直接使用其中的文件。
+
+    默认不逐个 stat 文件，工具随后读取文件时自然会发现已不存在的文件；
+    stat_files 为 True 时记录每个文件的 size 与 mtime_ns（提供的清单重新 stat 并移除已不存在的文件），
+    供 changed_since 做增量比较。读取清单文件失败时抛出异常，由调用方转换为错误信息。
+    """
+    manifest = resolve_manifest(manifest, root_path)
+    if manifest is None:
+        return build_manifest(
+            root_path, exclude_dirs=exclude_dirs, stat_files=stat_files, progress=progress, cancel=cancel,
+        )
+    if stat_files:
+        return manifest.refresh(progress=progress, cancel=cancel)
+    return manifest
+
+
+def prepare_directory_index(
+    manifest: "DatasetManifest | str | None",
+    root_path: str,
+    exclude_dirs: "list[str] | ExcludeMatcher | None" = None,
+    use_cache: bool = False,
+    progress: ProgressCallback | None = None,
+    cancel: CancelToken | None = None,
+) -> tuple[DirectoryIndex, DatasetManifest]:
+    """按目录统计的工具在入口处调用，返回 (目录索引, 清单)。
+
+    提供清单时直接转换为目录索引，不访问文件系统；否则遍历目录（可使用扫描缓存）构建索引，
+    再由索引生成不含 size 与 mtime 的清单。读取清单文件失败时抛出异常。
+    """
+    manifest = resolve_manifest(manifest, root_path)
+    if manifest is not None:
+        return manifest.to_directory_index(), manifest
+
+    index = build_directory_index(
+        root_path, exclude_dirs=exclude_dirs, use_cache=use_cache, progress=progress, cancel=cancel,
+    )
+    return index, DatasetManifest.from_directory_index(index)
@@ -0,0 +1,168 @@
+"""
+预读流水线模块
+
+逐文件处理的工具原先按 打开 → 读取 → 解析 → 分析 的顺序串行执行，网络存储上 CPU 大部分时间在等待读取。
+本模块提供有序的有界预读：I/O 线程提前读取后续文件，消费方按输入顺序取得结果并完成解析与分析。
+已读取但尚未被消费的条目数有上限，消费方处理较慢时读取线程自动等待，内存占用不会随文件数增长。
+"""
+
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator
+
+from .cancellation import CancelToken, is_cancelled
+
+
+# 预读默认 I/O 线程数；本地磁盘 2~4 即可，网络共享目录建议 8~16
+_read_ahead_workers = 4
+
+# 分块解析默认进程数，1 表示在当前进程中串行解析
+_parse_processes = 1
+
+# 每个进程任务包含的条目数；过小时进程间传输开销占比高，过大时取消与进度反馈不及时
+DEFAULT_CHUNK_SIZE = 64
+
+
+def set_read_ahead_workers(workers: int) -> None:
+    """设置逐文件工具默认的预读线程数，1 表示只比消费方提前读取一个文件。
+
+    参数:
+        workers: I/O 线程数
+    """
+    global _read_ahead_workers
+    _read_ahead_workers = max(1, int(workers))
+
+
+def get_read_ahead_workers() -> int:
+    """获取当前默认的预读线程数。"""
+    return _read_ahead_workers
+
+
+def set_parse_processes(processes: int) -> None:
+    """设置支持多进程解析的工具默认使用的进程数。
+
+    图形界面不提供此设置，始终使用默认值；需要多进程解析时在脚本中调用，或向工具函数传入 processes。
+
+    参数:
+        processes: 进程数，1 表示在当前进程中串行解析
+    """
+    global _parse_processes
+    _parse_processes = max(1, int(processes))
+
+
+def get_parse_processes() -> int:
+    """获取当前默认的解析进程数。"""
+    return _parse_processes
+
+
+def iter_read_ahead(
+    items: Iterable[Any],
+    load: Callable[[Any], Any],
+    workers: int | None = None,
+    depth: int | None = None,
+    cancel: CancelToken | None = None,
+) -> Iterator[tuple[Any, Any, Exception | None]]:
+    """在 I/O 线程中对 items 依次调用 load，按输入顺序产出结果。
+
+    参数:
+        items: 待处理条目，如文件路径列表
+        load: 在 I/O 线程中执行的函数，通常只做读取与轻量预处理，解析和分析留给消费方
+        workers: I/O 线程数，为空时使用 set_read_ahead_workers 设置的默认值
+        depth: 最多提前读取的条目数，为空时为 workers 的 2 倍
+        cancel: 取消令牌，取消后不再提交新的读取，已读取的结果仍会产出
+
+    产出:
+        (条目, load 的返回值, load 抛出的异常或 None)
+
+    消费方提前结束迭代时，未开始的读取会被取消，正在进行的读取完成后线程退出。
+    """
+    workers = _read_ahead_workers if workers is None else max(1, int(workers))
+    depth = workers * 2 if depth is None else max(1, int(depth))
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    pending: deque[tuple[Any, Future]] = deque()
+    try:
+        for item in items:
+            if is_cancelled(cancel):
+                break
+            pending.append((item, executor.submit(load, item)))
+            if len(pending) >= depth:
+                yield _take(pending)
+
+        while pending:
+            yield _take(pending)
+    finally:
+        for _item, future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+def _take(pending: deque) -> tuple[Any, Any, Exception | None]:
+    item, future = pending.popleft()
+    try:
+        return item, future.result(), None
+    except Exception as e:
+        return item, None, e
+
+
+def iter_process_chunks(
+    items: Iterable[Any],
+    process_chunk: Callable[[list], list],
+    processes: int | None = None,
+    chunk_size: int | None = None,
+    depth: int | None = None,
+    cancel: CancelToken | None = None,
+    initializer: Callable | None = None,
+    initargs: tuple = (),
+) -> Iterator[tuple[Any, Any, Exception | None]]:
+    """将 items 分块交给进程池中的 process_chunk，按输入顺序逐条产出结果。
+
+    参数:
+        items: 待处理条目，须可被 pickle，如文件路径列表
+        process_chunk: 模块级函数，接收一块条目列表，返回等长且顺序一致的结果列表
+        processes: 进程数，为空时使用 set_parse_processes 设置的默认值
+        chunk_size: 每块条目数，为空时使用 DEFAULT_CHUNK_SIZE
+        depth: 最多同时提交的块数，为空时为进程数的 2 倍
+        cancel: 取消令牌，取消后不再提交新的块，已完成的块仍会产出
+        initializer: 每个子进程启动时调用一次，用于传入各块共享的只读数据
+        initargs: initializer 的参数
+
+    产出:
+        (条目, 结果, 该块抛出的异常或 None)；某一块失败时块内每个条目都带上同一异常
+
+    消费方提前结束迭代时，未开始的块会被取消。
+    """
+    processes = _parse_processes if processes is None else max(1, int(processes))
+    chunk_size = DEFAULT_CHUNK_SIZE if chunk_size is None else max(1, int(chunk_size))
+    depth = processes * 2 if depth is None else max(1, int(depth))
+
+    items = list(items)
+    executor = ProcessPoolExecutor(max_workers=processes, initializer=initializer, initargs=initargs)
+    pending: deque[tuple[list, Future]] = deque()
+    try:
+        for start in range(0, len(items), chunk_size):
+            if is_cancelled(cancel):
+                break
+            chunk = items[start:start + chunk_size]
+            pending.append((chunk, executor.submit(process_chunk, chunk)))
+            if len(pending) >= depth:
+                yield from _take_chunk(pending)
+
+        while pending:
+            yield from _take_chunk(pending)
+    finally:
+        for _chunk, future in pending:
+            future.cancel()
+        executor.shutdown(wait=not is_cancelled(cancel), cancel_futures=True)
+
+
+def _take_chunk(pending: deque) -> Iterator[tuple[Any, Any, Exception | None]]:
+    chunk, future = pending.popleft()
+    try:
+        results = future.result()
+    except Exception as e:
+        for item in chunk:
+            yield item, None, e
+        return
+    for item, result in zip(chunk, results):
+        yield item, result, None
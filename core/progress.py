@@ -0,0 +1,135 @@
+"""
+进度事件模块
+
+扫描和批处理过程中按固定时间间隔发出进度事件，供 GUI 和命令行实时展示吞吐与剩余时间。
+"""
+
+import time
+from typing import Callable
+
+
+class ScanProgress:
+    """单次进度事件。
+
+    属性:
+        stage: 阶段名称，如 "扫描目录"、"检查文件"
+        dirs_done: 已完成的目录数
+        files_seen: 已处理的文件数
+        pending_dirs: 已发现但尚未列出的目录数，未知时为 None
+        total_files: 文件总数，未知时为 None
+        elapsed: 已用时间（秒）
+        files_per_sec: 文件吞吐（个/秒）
+        eta_seconds: 预计剩余时间（秒），无法估计时为 None
+        finished: 是否为该阶段的最后一个事件
+        partial: 调用方附带的阶段性结果，如当前累计的配对统计
+    """
+
+    __slots__ = (
+        "stage", "dirs_done", "files_seen", "pending_dirs", "total_files",
+        "elapsed", "files_per_sec", "eta_seconds", "finished", "partial",
+    )
+
+    def __init__(
+        self,
+        stage: str,
+        dirs_done: int,
+        files_seen: int,
+        pending_dirs: int | None,
+        total_files: int | None,
+        elapsed: float,
+        finished: bool = False,
+        partial: dict | None = None,
+    ):
+        self.stage = stage
+        self.dirs_done = dirs_done
+        self.files_seen = files_seen
+        self.pending_dirs = pending_dirs
+        self.total_files = total_files
+        self.elapsed = elapsed
+        self.files_per_sec = files_seen / elapsed if elapsed > 0 else 0.0
+        self.finished = finished
+        self.partial = partial
+        self.eta_seconds = self._estimate_remaining()
+
+    def _estimate_remaining(self) -> float | None:
+        if self.finished:
+            return 0.0
+        if self.total_files is not None and self.files_per_sec > 0:
+            return max(self.total_files - self.files_seen, 0) / self.files_per_sec
+        if self.pending_dirs is not None and self.dirs_done > 0:
+            return self.pending_dirs * self.elapsed / self.dirs_done
+        return None
+
+    def format(self) -> str:
+        """格式化为单行中文进度文本。"""
+        parts = [self.stage]
+        if self.dirs_done:
+            parts.append(f"目录 {self.dirs_done} 个")
+        if self.total_files is not None:
+            parts.append(f"文件 {self.files_seen}/{self.total_files} 个")
+        else:
+            parts.append(f"文件 {self.files_seen} 个")
+        parts.append(f"{self.files_per_sec:.0f} 个/秒")
+        if self.finished:
+            parts.append(f"用时 {self.elapsed:.1f} 秒")
+        elif self.eta_seconds is not None:
+            parts.append(f"预计剩余 {self.eta_seconds:.0f} 秒")
+        return "，".join(parts)
+
+
+ProgressCallback = Callable[[ScanProgress], None]
+
+
+class ProgressReporter:
+    """累计进度并按时间间隔节流回调。"""
+
+    def __init__(
+        self,
+        callback: ProgressCallback | None,
+        stage: str,
+        total_files: int | None = None,
+        interval: float = 0.5,
+        partial: Callable[[], dict] | None = None,
+    ):
+        self.callback = callback
+        self.stage = stage
+        self.total_files = total_files
+        self.interval = interval
+        self.partial = partial
+        self.dirs_done = 0
+        self.files_seen = 0
+        self.pending_dirs = None
+        self._start = time.monotonic()
+        self._last_emit = self._start
+
+    def advance(self, dirs: int = 0, files: int = 0, pending_dirs: int | None = None) -> None:
+        """累加进度，距上次回调超过间隔时发出事件。"""
+        self.dirs_done += dirs
+        self.files_seen += files
+        if pending_dirs is not None:
+            self.pending_dirs = pending_dirs
+
+        if self.callback is None:
+            return
+
+        now = time.monotonic()
+        if now - self._last_emit >= self.interval:
+            self._last_emit = now
+            self.callback(self._event(now, finished=False))
+
+    def finish(self) -> None:
+        """发出阶段结束事件。"""
+        if self.callback is not None:
+            self.callback(self._event(time.monotonic(), finished=True))
+
+    def _event(self, now: float, finished: bool) -> ScanProgress:
+        return ScanProgress(
+            stage=self.stage,
+            dirs_done=self.dirs_done,
+            files_seen=self.files_seen,
+            pending_dirs=0 if finished else self.pending_dirs,
+            total_files=self.total_files,
+            elapsed=now - self._start,
+            finished=finished,
+            partial=self.partial() if self.partial is not None else None,
+        )
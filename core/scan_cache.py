@@ -0,0 +1,196 @@
+"""
+目录扫描缓存模块
+
+使用 SQLite 持久化每个目录的列表结果与配对统计，按目录 mtime 与条目数判断是否需要重新列出。
+交付后不再变化的目录在下次扫描时只需一次 stat 和一次只读名称的列出，无需逐个判断条目类型，也无需重新计算配对统计。
+"""
+
+import json
+import os
+import sqlite3
+import threading
+
+
+CACHE_DIR_NAME = "labelme_toolbox"
+CACHE_FILE_NAME = "scan_cache.sqlite3"
+
+# 表结构或配对统计的存储格式变化时递增，旧版本缓存在打开时整表清空
+CACHE_SCHEMA_VERSION = 2
+
+# 目录 mtime 与列出时间相差不足该值时不信任缓存，避免同一时间粒度内的修改被漏掉
+RACY_MTIME_WINDOW_NS = 2 * 10**9
+
+_NAME_SEPARATOR = "\x00"
+
+
+def get_user_cache_dir() -> str:
+    """获取用户级缓存目录路径。"""
+    if os.name == "nt":
+        base_dir = os.environ.get("LOCALAPPDATA") or os.path.expanduser(r"~\AppData\Local")
+    else:
+        base_dir = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base_dir, CACHE_DIR_NAME)
+
+
+def _join_names(names: list[str]) -> str:
+    return _NAME_SEPARATOR.join(names)
+
+
+def _split_names(text: str) -> list[str]:
+    return text.split(_NAME_SEPARATOR) if text else []
+
+
+class ScanCache:
+    """按目录路径保存列表结果与配对统计的持久化缓存。
+
+    每行记录目录的 mtime_ns、条目数、子目录名、图片/JSON 文件名以及配对统计。
+    配对统计由调用方转换为可 JSON 序列化的紧凑结构后存入。
+    目录 mtime 与条目数均未变化时直接复用缓存，否则由调用方重新列出并写回。
+    """
+
+    def __init__(self, db_path: str | None = None):
+        if db_path is None:
+            db_path = os.path.join(get_user_cache_dir(), CACHE_FILE_NAME)
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != CACHE_SCHEMA_VERSION:
+            self._conn.execute("DROP TABLE IF EXISTS dir_listing")
+            self._conn.execute(f"PRAGMA user_version={CACHE_SCHEMA_VERSION}")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS dir_listing (
+                path TEXT PRIMARY KEY,
+                mtime_ns INTEGER,
+                entry_count INTEGER NOT NULL,
+                subdirs TEXT NOT NULL,
+                walk_dirs TEXT NOT NULL,
+                image_files TEXT NOT NULL,
+                json_files TEXT NOT NULL,
+                pairing TEXT
+            )
+            """
+        )
+        self._conn.commit()
+        self._pending = []
+
+    def load_tree(self, root_path: str) -> dict[str, tuple]:
+        """一次性读取根目录下所有目录的缓存记录。
+
+        返回:
+            {dir_path: (mtime_ns, entry_count, subdirs, walk_dirs, image_files, json_files, pairing)}
+        """
+        rows = {}
+
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT path, mtime_ns, entry_count, subdirs, walk_dirs, image_files, json_files, pairing "
+                "FROM dir_listing WHERE path >= ? AND path < ?",
+                (root_path, root_path + "\U0010ffff"),
+            )
+            for path, mtime_ns, entry_count, subdirs, walk_dirs, image_files, json_files, pairing in cursor:
+                rows[path] = (
+                    mtime_ns,
+                    entry_count,
+                    _split_names(subdirs),
+                    _split_names(walk_dirs),
+                    _split_names(image_files),
+                    _split_names(json_files),
+                    _decode_pairing(pairing),
+                )
+
+        return rows
+
+    def store(
+        self,
+        dir_path: str,
+        mtime_ns: int,
+        listed_at_ns: int,
+        entry_count: int,
+        subdirs: list[str],
+        walk_dirs: list[str],
+        image_files: list[str],
+        json_files: list[str],
+        pairing: list | None,
+    ) -> None:
+        """登记一条待写入的目录记录，调用 commit() 后批量落盘。
+
+        目录 mtime 距列出时间过近时记录为不可复用，下次扫描会重新列出。
+        """
+        if listed_at_ns - mtime_ns < RACY_MTIME_WINDOW_NS:
+            mtime_ns = None
+
+        row = (
+            dir_path,
+            mtime_ns,
+            entry_count,
+            _join_names(subdirs),
+            _join_names(walk_dirs),
+            _join_names(image_files),
+            _join_names(json_files),
+            _encode_pairing(pairing),
+        )
+        with self._lock:
+            self._pending.append(row)
+
+    def remove_tree(self, dir_path: str) -> None:
+        """删除目录及其所有子目录的缓存记录。"""
+        prefix = dir_path.rstrip("\\/") + os.sep
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM dir_listing WHERE path = ? OR substr(path, 1, ?) = ?",
+                (dir_path, len(prefix), prefix),
+            )
+
+    def commit(self) -> None:
+        """将登记的记录批量写入数据库。"""
+        with self._lock:
+            if self._pending:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO dir_listing "
+                    "(path, mtime_ns, entry_count, subdirs, walk_dirs, image_files, json_files, pairing) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    self._pending,
+                )
+                self._pending = []
+            self._conn.commit()
+
+    def clear(self) -> None:
+        """清空全部缓存记录。"""
+        with self._lock:
+            self._pending = []
+            self._conn.execute("DELETE FROM dir_listing")
+            self._conn.commit()
+
+    def close(self) -> None:
+        """写入剩余记录并关闭数据库连接。"""
+        self.commit()
+        with self._lock:
+            self._conn.close()
+
+
+def _encode_pairing(pairing: list | None) -> str | None:
+    if pairing is None:
+        return None
+    return json.dumps(pairing, ensure_ascii=False, separators=(",", ":"))
+
+
+def _decode_pairing(text: str | None) -> list | None:
+    if not text:
+        return None
+    return json.loads(text)
+
+
+def open_scan_cache(db_path: str | None = None) -> ScanCache | None:
+    """打开扫描缓存，缓存目录不可写或数据库损坏时返回 None。"""
+    try:
+        return ScanCache(db_path)
+    except (OSError, sqlite3.Error):
+        return None
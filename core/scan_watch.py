@@ -0,0 +1,327 @@
+"""
+目录监视模块
+
+定期对目录树做轻量快照：逐个 stat 已知目录比较 mtime，只重新列出发生变化的目录，
+增量更新配对、孤立文件与特殊配对统计。不依赖任何操作系统的文件通知接口，
+适用于网络共享目录。
+"""
+
+import os
+import threading
+import time
+from typing import Callable
+
+from .cancellation import CancelToken
+from .file_scanner import (
+    DirPairing,
+    ExcludeMatcher,
+    ImageCounts,
+    _scandir_listing,
+    _split_candidate_files,
+    _summarize_dir,
+)
+from .progress import ProgressCallback, ProgressReporter
+from .scan_cache import RACY_MTIME_WINDOW_NS
+
+
+# 增量统计中的计数字段，顺序即变化说明中的输出顺序
+DELTA_FIELDS = (
+    ('paired', "有效配对"),
+    ('orphan_image', "孤立图片"),
+    ('orphan_json', "孤立JSON"),
+    ('special_count', "特殊配对"),
+    ('folder_count', "目录"),
+    ('total_json', "JSON"),
+)
+
+
+class _WatchedDir:
+    """单个已知目录的快照。"""
+
+    __slots__ = ("mtime_ns", "walk_names", "pairing")
+
+    def __init__(self, mtime_ns: int | None, walk_names: list[str], pairing: DirPairing | None):
+        self.mtime_ns = mtime_ns
+        self.walk_names = walk_names
+        self.pairing = pairing
+
+
+class PairingDelta:
+    """一次轮询得到的统计变化。
+
+    属性:
+        changed_dirs: 内容发生变化并重新列出的目录
+        added_dirs: 新出现的目录
+        removed_dirs: 已消失的目录
+        changes: {字段: 变化量}，字段见 DELTA_FIELDS，只包含非零项
+        totals: 变化后的累计统计，结构同 ScanWatcher.counts()
+    """
+
+    __slots__ = ("changed_dirs", "added_dirs", "removed_dirs", "changes", "totals")
+
+    def __init__(
+        self,
+        changed_dirs: list[str],
+        added_dirs: list[str],
+        removed_dirs: list[str],
+        changes: dict[str, int],
+        totals: dict,
+    ):
+        self.changed_dirs = changed_dirs
+        self.added_dirs = added_dirs
+        self.removed_dirs = removed_dirs
+        self.changes = changes
+        self.totals = totals
+
+    def format(self) -> str:
+        """格式化为单行中文变化说明。"""
+        parts = [f"{label} {self.changes[key]:+d}" for key, label in DELTA_FIELDS if self.changes.get(key)]
+        dir_count = len(self.changed_dirs) + len(self.added_dirs) + len(self.removed_dirs)
+        summary = "，".join(parts) if parts else "统计无变化"
+        return f"{dir_count} 个目录有变化：{summary}"
+
+
+class ScanWatcher:
+    """按目录 mtime 增量维护配对统计的监视器。
+
+    首次调用 snapshot() 完整遍历一次目录树，之后每次 poll() 只 stat 已知目录，
+    mtime 变化的目录重新列出并替换其配对统计，新增子目录整棵加入，消失的目录整棵移除。
+    目录内文件增删会改变目录 mtime，文件内容修改不影响配对统计，无需检测。
+    """
+
+    def __init__(self, root_path: str, exclude_dirs: "list[str] | ExcludeMatcher | None" = None):
+        self.root_path = root_path
+        self._matcher = ExcludeMatcher.compile(exclude_dirs)
+        self._dirs: dict[str, _WatchedDir] = {}
+        self._counts = self._empty_counts()
+        self._image_counts = ImageCounts()
+
+    @staticmethod
+    def _empty_counts() -> dict[str, int]:
+        return {key: 0 for key, _label in DELTA_FIELDS}
+
+    def snapshot(
+        self,
+        progress: ProgressCallback | None = None,
+        cancel: "CancelToken | threading.Event | None" = None,
+    ) -> dict:
+        """完整遍历目录树，建立初始快照。
+
+        参数:
+            progress: 进度回调，事件的 partial 字段为当前累计的配对统计
+            cancel: 取消令牌或停止信号，设置后停止遍历，快照只包含已列出的目录
+
+        返回:
+            汇总统计，结构同 scan_all_leaf_dirs
+        """
+        self._dirs = {}
+        self._counts = self._empty_counts()
+        self._image_counts = ImageCounts()
+
+        reporter = None
+        if progress is not None:
+            reporter = ProgressReporter(progress, "扫描目录", partial=self.counts)
+        self._add_tree(self.root_path, reporter, cancel)
+        if reporter is not None:
+            reporter.finish()
+
+        return self.stats()
+
+    def poll(self) -> PairingDelta | None:
+        """检查一次目录变化并增量更新统计。
+
+        返回:
+            PairingDelta，没有任何目录变化时返回 None
+        """
+        before = dict(self._counts)
+        changed_dirs = []
+        added_dirs = []
+        removed_dirs = []
+
+        for dir_path in list(self._dirs):
+            watched = self._dirs.get(dir_path)
+            if watched is None:
+                continue
+
+            try:
+                mtime_ns = os.stat(dir_path).st_mtime_ns
+            except OSError:
+                removed_dirs.extend(self._remove_tree(dir_path))
+                continue
+
+            if mtime_ns == watched.mtime_ns:
+                continue
+
+            try:
+                changed, subtree_added, subtree_removed = self._refresh_dir(dir_path, watched)
+            except OSError:
+                removed_dirs.extend(self._remove_tree(dir_path))
+                continue
+
+            if changed:
+                changed_dirs.append(dir_path)
+            added_dirs.extend(subtree_added)
+            removed_dirs.extend(subtree_removed)
+
+        if not (changed_dirs or added_dirs or removed_dirs):
+            return None
+
+        changes = {key: self._counts[key] - before[key] for key in before if self._counts[key] != before[key]}
+        return PairingDelta(changed_dirs, added_dirs, removed_dirs, changes, self.counts())
+
+    def watch(
+        self,
+        on_change: Callable[[PairingDelta], None],
+        stop_event: "CancelToken | threading.Event",
+        interval: float = 5.0,
+    ) -> None:
+        """按固定间隔轮询，直到 stop_event 被设置。
+
+        参数:
+            on_change: 统计变化时的回调，在监视线程中调用
+            stop_event: 停止信号，可以是 threading.Event 或 CancelToken
+            interval: 轮询间隔（秒）
+        """
+        while not stop_event.wait(interval):
+            delta = self.poll()
+            if delta is not None:
+                on_change(delta)
+
+    def counts(self) -> dict:
+        """返回当前累计的计数统计。"""
+        return dict(self._counts)
+
+    def stats(self) -> dict:
+        """返回当前完整统计，结构同 scan_all_leaf_dirs。"""
+        special_pairs = []
+        for watched in self._dirs.values():
+            if watched.pairing is not None:
+                special_pairs.extend(watched.pairing.special_pairs)
+
+        image_counts = ImageCounts()
+        image_counts.merge(self._image_counts)
+        return {
+            'paired': self._counts['paired'],
+            'orphan_image': self._counts['orphan_image'],
+            'orphan_json': self._counts['orphan_json'],
+            'special_pairs': special_pairs,
+            'folder_count': self._counts['folder_count'],
+            'image_counts': image_counts,
+            'total_json': self._counts['total_json'],
+        }
+
+    def _list_dir(self, dir_path: str) -> tuple[int | None, list[str], DirPairing | None]:
+        """stat 并列出单个目录，返回 (可信的 mtime_ns, 可遍历子目录名, 配对统计或 None)。
+
+        mtime 距列出时间过近时记为 None，下次轮询必定重新列出，避免同一时间粒度内的修改被漏掉。
+        """
+        mtime_ns = os.stat(dir_path).st_mtime_ns
+        listed_at_ns = time.time_ns()
+        _subdir_names, walk_names, file_names = _scandir_listing(dir_path)
+        if self._matcher:
+            walk_names = [
+                name for name in walk_names
+                if not self._matcher.matches(os.path.join(dir_path, name), name)
+            ]
+
+        image_names, json_names = _split_candidate_files(file_names)
+        pairing = None
+        if image_names or json_names:
+            pairing = _summarize_dir(dir_path, image_names, json_names)
+
+        if listed_at_ns - mtime_ns < RACY_MTIME_WINDOW_NS:
+            mtime_ns = None
+        return mtime_ns, walk_names, pairing
+
+    def _apply_pairing(self, pairing: DirPairing | None, sign: int) -> None:
+        """将单个目录的配对统计计入 (sign=1) 或移出 (sign=-1) 累计结果。"""
+        if pairing is None:
+            return
+
+        counts = self._counts
+        counts['paired'] += sign * pairing.paired
+        counts['orphan_image'] += sign * pairing.orphan_image
+        counts['orphan_json'] += sign * pairing.orphan_json
+        counts['special_count'] += sign * len(pairing.special_pairs)
+        counts['folder_count'] += sign
+        counts['total_json'] += sign * pairing.json_count
+        if sign > 0:
+            self._image_counts.merge(pairing.image_counts)
+        else:
+            self._image_counts.subtract(pairing.image_counts)
+
+    def _add_tree(
+        self,
+        root_path: str,
+        reporter: ProgressReporter | None = None,
+        cancel: "CancelToken | threading.Event | None" = None,
+    ) -> list[str]:
+        """按 os.walk 顺序加入整棵子树，返回加入的目录列表。"""
+        added_dirs = []
+        stack = [root_path]
+        while stack:
+            if cancel is not None and cancel.is_set():
+                break
+
+            dir_path = stack.pop()
+            try:
+                mtime_ns, walk_names, pairing = self._list_dir(dir_path)
+            except OSError:
+                continue
+
+            self._dirs[dir_path] = _WatchedDir(mtime_ns, walk_names, pairing)
+            self._apply_pairing(pairing, 1)
+            added_dirs.append(dir_path)
+
+            for name in reversed(walk_names):
+                stack.append(os.path.join(dir_path, name))
+            if reporter is not None:
+                file_count = pairing.json_count + sum(pairing.image_counts.values()) if pairing is not None else 0
+                reporter.advance(dirs=1, files=file_count, pending_dirs=len(stack))
+
+        return added_dirs
+
+    def _remove_tree(self, root_path: str) -> list[str]:
+        """移除整棵子树的快照与统计，返回移除的目录列表。"""
+        removed_dirs = []
+        stack = [root_path]
+        while stack:
+            dir_path = stack.pop()
+            watched = self._dirs.pop(dir_path, None)
+            if watched is None:
+                continue
+
+            self._apply_pairing(watched.pairing, -1)
+            removed_dirs.append(dir_path)
+            stack.extend(os.path.join(dir_path, name) for name in watched.walk_names)
+
+        return removed_dirs
+
+    def _refresh_dir(self, dir_path: str, watched: _WatchedDir) -> tuple[bool, list[str], list[str]]:
+        """重新列出 mtime 变化或不可信的目录，返回 (内容是否变化, 新增目录, 移除目录)。"""
+        mtime_ns, walk_names, pairing = self._list_dir(dir_path)
+        changed = walk_names != watched.walk_names or _pairing_state(pairing) != _pairing_state(watched.pairing)
+
+        self._apply_pairing(watched.pairing, -1)
+        self._apply_pairing(pairing, 1)
+
+        old_names = set(watched.walk_names)
+        new_names = set(walk_names)
+        watched.mtime_ns = mtime_ns
+        watched.walk_names = walk_names
+        watched.pairing = pairing
+
+        removed_dirs = []
+        for name in old_names - new_names:
+            removed_dirs.extend(self._remove_tree(os.path.join(dir_path, name)))
+
+        added_dirs = []
+        for name in walk_names:
+            if name not in old_names:
+                added_dirs.extend(self._add_tree(os.path.join(dir_path, name)))
+
+        return changed, added_dirs, removed_dirs
+
+
+def _pairing_state(pairing: DirPairing | None) -> list | None:
+    return pairing.to_state() if pairing is not None else None
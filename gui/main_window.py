@@ -8,11 +8,12 @@ from tkinter import PhotoImage, filedialog
 import customtkinter as ctk
 
 from .theme import *
+from core.cancellation import CancelToken
 from tools.image_count import run_count
 from tools.image_json_sampler import run_sampler, get_default_output_dir
 from tools.label_counter import run_label_counter, load_ordered_labels, parse_manual_ordered_labels
 from tools.label_validator import run_validator, export_template, load_label_dict, parse_manual_labels
-from tools.orphan_image_cleaner import run_scan, run_clean
+from tools.orphan_image_cleaner import run_scan, run_clean, run_watch
 from tools.polygon_overlap_checker import run_polygon_overlap_check
 
 
@@ -21,6 +22,7 @@ HELP_TEXTS = {
         "选择数据文件夹后点击“开始扫描”，结果会导出为 Excel。",
         "每个包含图片或 JSON 的目录都会独立配对，支持 jpg、jpeg、png、tif、tiff。",
         "结果文件保存在源目录，文件名为 文件计数统计结果.xlsx。",
+        "勾选“使用扫描缓存”后只重新列出有变化的目录，重复统计同一目录时更快。",
     ],
     "orphan_cleaner": [
         "先扫描查看统计结果，再按需要选择删除孤立图片或孤立 JSON。",
@@ -89,6 +91,14 @@ def create_modal_window(owner, title: str, width: int, height: int) -> ctk.CTkTo
     return window
 
 
+def make_progress_callback(panel, handler):
+    """创建进度回调，将后台线程中的进度事件转交到界面线程处理。"""
+    def callback(event):
+        panel.after(0, lambda: handler(event))
+
+    return callback
+
+
 def create_modal_header(window, title: str, description: str | None = None) -> ctk.CTkFrame:
     """创建统一风格的弹窗头部。"""
     header = ctk.CTkFrame(
@@ -277,6 +287,18 @@ class OrphanCleanerPanel(ctk.CTkFrame):
         )
         self.btn_clean.pack(side="left", padx=(0, 10))
 
+        self.btn_watch = ctk.CTkButton(
+            self.buttons_card, text="持续监视",
+            font=APP_FONT_BOLD, height=45,
+            fg_color=COLOR_PRIMARY, hover_color=COLOR_PRIMARY_HOVER,
+            text_color="#FFFFFF",
+            command=self._toggle_watch
+        )
+        self.btn_watch.pack(side="left", padx=(0, 10))
+
+        self.btn_stop = StopButton(self.buttons_card)
+        self.btn_stop.pack(side="left", padx=(0, 10))
+
         self.btn_clear = ctk.CTkButton(
             self.buttons_card, text="清空",
             font=APP_FONT, height=45,
@@ -343,10 +365,14 @@ class OrphanCleanerPanel(ctk.CTkFrame):
         )
         self.log_label.pack(anchor="w", padx=15, pady=(10, 5))
 
+        self.progress_status = ProgressStatus(self.log_card)
+        self.progress_status.pack(fill="x", padx=15, pady=(0, 5))
+
         self.log_viewer = LogViewer(self.log_card, height=160)
         self.log_viewer.pack(fill="both", expand=True, padx=10, pady=(0, 10))
 
         self.scan_stats = None
+        self.watch_stop_event = None
 
     def _run_scan(self):
         target_dir = self.folder_selector.get()
@@ -355,7 +381,9 @@ class OrphanCleanerPanel(ctk.CTkFrame):
             return
 
         self.btn_scan.configure(state="disabled", text="扫描中...")
+        cancel = self.btn_stop.start()
         self.log_viewer.clear()
+        self.progress_status.reset()
         self.log_viewer.append(f"开始扫描数据文件夹: {target_dir}")
         self.log_viewer.append(f"支持图片格式: jpg, jpeg, png, tif, tiff")
 
@@ -363,7 +391,9 @@ class OrphanCleanerPanel(ctk.CTkFrame):
 
         def run_task():
             try:
-                stats, error = run_scan(target_dir)
+                stats, error = run_scan(
+                    target_dir, progress=make_progress_callback(self, self._on_progress), cancel=cancel
+                )
             except Exception as exc:
                 stats, error = None, f"执行扫描失败: {str(exc)}"
             elapsed = time.time() - start_time
@@ -372,8 +402,23 @@ class OrphanCleanerPanel(ctk.CTkFrame):
         thread = threading.Thread(target=run_task, daemon=True)
         thread.start()
 
+    def _on_progress(self, event):
+        self.progress_status.update_progress(event)
+        partial = event.partial
+        if not partial:
+            return
+
+        self.lbl_paired.configure(text=f"有效配对: {partial['paired']} 对")
+        self.lbl_orphan_image.configure(text=f"孤立图片: {partial['orphan_image']} 个")
+        self.lbl_orphan_json.configure(text=f"孤立JSON: {partial['orphan_json']} 个")
+        self.lbl_special.configure(text=f"特殊配对: {partial['special_count']} 组")
+        self.lbl_folder.configure(text=f"扫描到的目录: {partial['folder_count']} 个")
+
     def _on_scan_complete(self, stats, error, elapsed):
         self.btn_scan.configure(state="normal", text="开始扫描")
+        self.btn_stop.finish()
+        if stats and stats.get('cancelled'):
+            self.log_viewer.append("任务已中止，以下为已处理部分的结果")
 
         if error:
             self.log_viewer.append(f"错误: {error}")
@@ -404,6 +449,84 @@ class OrphanCleanerPanel(ctk.CTkFrame):
 
         self._refresh_clean_button_state()
 
+    def _toggle_watch(self):
+        if self.watch_stop_event is not None:
+            self.watch_stop_event.set()
+            self.btn_watch.configure(state="disabled", text="停止中...")
+            return
+
+        target_dir = self.folder_selector.get()
+        if not target_dir:
+            self.log_viewer.append("请选择数据文件夹")
+            return
+
+        stop_event = CancelToken()
+        self.watch_stop_event = stop_event
+        self.btn_scan.configure(state="disabled")
+        self.btn_watch.configure(text="停止监视")
+        self.log_viewer.clear()
+        self.progress_status.reset()
+        self.log_viewer.append(f"开始监视数据文件夹: {target_dir}")
+
+        start_time = time.time()
+
+        def run_task():
+            try:
+                stats, error = run_watch(
+                    target_dir,
+                    on_change=lambda delta: self.after(0, lambda: self._on_watch_delta(delta)),
+                    stop_event=stop_event,
+                    on_snapshot=lambda stats: self.after(
+                        0, lambda: self._on_watch_snapshot(stats, time.time() - start_time)
+                    ),
+                    progress=make_progress_callback(self, self._on_progress),
+                )
+            except Exception as exc:
+                stats, error = None, f"执行监视失败: {str(exc)}"
+            self.after(0, lambda: self._on_watch_stopped(error))
+
+        thread = threading.Thread(target=run_task, daemon=True)
+        thread.start()
+
+    def _on_watch_snapshot(self, stats, elapsed):
+        self._on_scan_complete(stats, None, elapsed)
+        if self.watch_stop_event is not None:
+            self.btn_scan.configure(state="disabled")
+            self.log_viewer.append("初始扫描完成，等待新数据...")
+
+    def _on_watch_delta(self, delta):
+        if self.watch_stop_event is None:
+            return
+
+        totals = delta.totals
+        self.log_viewer.append(f"[{time.strftime('%H:%M:%S')}] {delta.format()}")
+        self.lbl_paired.configure(text=f"有效配对: {totals['paired']} 对")
+        self.lbl_orphan_image.configure(text=f"孤立图片: {totals['orphan_image']} 个")
+        self.lbl_orphan_json.configure(text=f"孤立JSON: {totals['orphan_json']} 个")
+        self.lbl_special.configure(text=f"特殊配对: {totals['special_count']} 组")
+        self.lbl_folder.configure(text=f"扫描到的目录: {totals['folder_count']} 个")
+
+        if self.scan_stats:
+            self.scan_stats = {
+                **self.scan_stats,
+                'paired': totals['paired'],
+                'orphan_image': totals['orphan_image'],
+                'orphan_json': totals['orphan_json'],
+                'folder_count': totals['folder_count'],
+            }
+        self._refresh_clean_button_state()
+
+    def _on_watch_stopped(self, error):
+        self.watch_stop_event = None
+        self.btn_watch.configure(state="normal", text="持续监视")
+        self.btn_scan.configure(state="normal", text="开始扫描")
+
+        if error:
+            self.log_viewer.append(f"错误: {error}")
+            return
+
+        self.log_viewer.append("已停止监视")
+
     def _refresh_clean_button_state(self):
         if not self.scan_stats:
             self.btn_clean.configure(state="disabled")
@@ -470,6 +593,7 @@ class OrphanCleanerPanel(ctk.CTkFrame):
 
     def _execute_clean(self, target_dir, mode):
         self.btn_clean.configure(state="disabled", text="清理中...")
+        cancel = self.btn_stop.start()
         self.log_viewer.append(f"开始清理...")
         mode_text = "孤立图片" if mode == 'image' else "孤立JSON"
 
@@ -477,7 +601,9 @@ class OrphanCleanerPanel(ctk.CTkFrame):
 
         def run_task():
             try:
-                stats, error = run_clean(target_dir, mode)
+                stats, error = run_clean(
+                    target_dir, mode, progress=make_progress_callback(self, self._on_progress), cancel=cancel
+                )
             except Exception as exc:
                 stats, error = None, f"执行清理失败: {str(exc)}"
             elapsed = time.time() - start_time
@@ -488,6 +614,9 @@ class OrphanCleanerPanel(ctk.CTkFrame):
 
     def _on_clean_complete(self, stats, error, elapsed, mode_text):
         self.btn_clean.configure(state="normal", text="开始清理")
+        self.btn_stop.finish()
+        if stats and stats.get('cancelled'):
+            self.log_viewer.append("任务已中止，以下为已处理部分的结果")
 
         if error:
             self.log_viewer.append(f"错误: {error}")
@@ -518,10 +647,13 @@ class OrphanCleanerPanel(ctk.CTkFrame):
         self._refresh_clean_button_state()
 
     def _clear_input(self):
+        if self.watch_stop_event is not None:
+            self.watch_stop_event.set()
         self.folder_selector.set("")
         self.mode_var.set("image")
         self.scan_stats = None
         self.log_viewer.clear()
+        self.progress_status.reset()
         self.lbl_paired.configure(text="有效配对: 0 对")
         self.lbl_orphan_image.configure(text="孤立图片: 0 个")
         self.lbl_orphan_json.configure(text="孤立JSON: 0 个")
@@ -665,6 +797,9 @@ class LabelValidatorPanel(ctk.CTkFrame):
         )
         self.btn_template.pack(side="left", padx=(0, 10))
 
+        self.btn_stop = StopButton(self.buttons_card)
+        self.btn_stop.pack(side="left", padx=(0, 10))
+
         self.btn_clear = ctk.CTkButton(
             self.buttons_card, text="清空",
             font=APP_FONT, height=45,
@@ -685,6 +820,9 @@ class LabelValidatorPanel(ctk.CTkFrame):
         )
         self.log_label.pack(anchor="w", padx=15, pady=(10, 5))
 
+        self.progress_status = ProgressStatus(self.log_card)
+        self.progress_status.pack(fill="x", padx=15, pady=(0, 5))
+
         self.log_viewer = LogViewer(self.log_card, height=200)
         self.log_viewer.pack(fill="both", expand=True, padx=10, pady=(0, 10))
 
@@ -791,9 +929,11 @@ class LabelValidatorPanel(ctk.CTkFrame):
             return
 
         self.btn_run.configure(state="disabled", text="检查中...")
+        cancel = self.btn_stop.start()
         self.result_path = None
         self.btn_open_folder.configure(state="disabled")
         self.log_viewer.clear()
+        self.progress_status.reset()
         self.log_viewer.append(f"开始检查数据文件夹: {target_dir}")
         if dict_path and manual_text:
             self.log_viewer.append("检测到同时提供标签文件和手动输入，本次优先使用标签文件")
@@ -803,7 +943,11 @@ class LabelValidatorPanel(ctk.CTkFrame):
 
         def run_task():
             try:
-                output_path, error, stats = run_validator(target_dir, valid_labels)
+                output_path, error, stats = run_validator(
+                    target_dir, valid_labels,
+                    progress=make_progress_callback(self, self.progress_status.update_progress),
+                    cancel=cancel,
+                )
             except Exception as exc:
                 output_path, error, stats = None, f"执行检查失败: {str(exc)}", {}
             elapsed = time.time() - start_time
@@ -814,6 +958,9 @@ class LabelValidatorPanel(ctk.CTkFrame):
 
     def _on_complete(self, output_path, error, stats, elapsed):
         self.btn_run.configure(state="normal", text="开始检查")
+        self.btn_stop.finish()
+        if stats and stats.get('cancelled'):
+            self.log_viewer.append("任务已中止，以下为已处理部分的结果")
         
         if error:
             self.log_viewer.append(f"错误: {error}")
@@ -835,6 +982,7 @@ class LabelValidatorPanel(ctk.CTkFrame):
         self.manual_input.delete("1.0", "end")
         self.dict_preview.configure(text="", text_color=COLOR_TEXT_MUTED)
         self.log_viewer.clear()
+        self.progress_status.reset()
         self.result_path = None
         self.btn_open_folder.configure(state="disabled")
 
@@ -984,6 +1132,9 @@ class LabelCounterPanel(ctk.CTkFrame):
         )
         self.btn_template.pack(side="left", padx=(0, 10))
 
+        self.btn_stop = StopButton(self.buttons_card)
+        self.btn_stop.pack(side="left", padx=(0, 10))
+
         self.btn_clear = ctk.CTkButton(
             self.buttons_card, text="清空",
             font=APP_FONT, height=45,
@@ -1004,6 +1155,9 @@ class LabelCounterPanel(ctk.CTkFrame):
         )
         self.log_label.pack(anchor="w", padx=15, pady=(10, 5))
 
+        self.progress_status = ProgressStatus(self.log_card)
+        self.progress_status.pack(fill="x", padx=15, pady=(0, 5))
+
         self.log_viewer = LogViewer(self.log_card, height=200)
         self.log_viewer.pack(fill="both", expand=True, padx=10, pady=(0, 10))
 
@@ -1108,9 +1262,11 @@ class LabelCounterPanel(ctk.CTkFrame):
             return
 
         self.btn_run.configure(state="disabled", text="统计中...")
+        cancel = self.btn_stop.start()
         self.result_path = None
         self.btn_open_folder.configure(state="disabled")
         self.log_viewer.clear()
+        self.progress_status.reset()
         self.log_viewer.append(f"开始统计数据文件夹: {target_dir}")
         if dict_path and manual_text:
             self.log_viewer.append("检测到同时提供标签文件和手动输入，本次优先使用标签文件")
@@ -1120,7 +1276,11 @@ class LabelCounterPanel(ctk.CTkFrame):
 
         def run_task():
             try:
-                output_path, error, stats = run_label_counter(target_dir, ordered_labels)
+                output_path, error, stats = run_label_counter(
+                    target_dir, ordered_labels,
+                    progress=make_progress_callback(self, self.progress_status.update_progress),
+                    cancel=cancel,
+                )
             except Exception as exc:
                 output_path, error, stats = None, f"执行统计失败: {str(exc)}", {}
             elapsed = time.time() - start_time
@@ -1131,6 +1291,9 @@ class LabelCounterPanel(ctk.CTkFrame):
 
     def _on_complete(self, output_path, error, stats, elapsed):
         self.btn_run.configure(state="normal", text="开始统计")
+        self.btn_stop.finish()
+        if stats and stats.get('cancelled'):
+            self.log_viewer.append("任务已中止，以下为已处理部分的结果")
 
         if error:
             self.log_viewer.append(f"错误: {error}")
@@ -1151,6 +1314,7 @@ class LabelCounterPanel(ctk.CTkFrame):
         self.manual_input.delete("1.0", "end")
         self.dict_preview.configure(text="", text_color=COLOR_TEXT_MUTED)
         self.log_viewer.clear()
+        self.progress_status.reset()
         self.result_path = None
         self.btn_open_folder.configure(state="disabled")
 
@@ -1286,6 +1450,9 @@ class PolygonOverlapPanel(ctk.CTkFrame):
         )
         self.btn_open_folder.pack(side="left", padx=(0, 10))
 
+        self.btn_stop = StopButton(self.buttons_card)
+        self.btn_stop.pack(side="left", padx=(0, 10))
+
         self.btn_clear = ctk.CTkButton(
             self.buttons_card, text="清空",
             font=APP_FONT, height=45,
@@ -1304,6 +1471,9 @@ class PolygonOverlapPanel(ctk.CTkFrame):
         )
         self.log_label.pack(anchor="w", padx=15, pady=(10, 5))
 
+        self.progress_status = ProgressStatus(self.log_card)
+        self.progress_status.pack(fill="x", padx=15, pady=(0, 5))
+
         self.log_viewer = LogViewer(self.log_card, height=200)
         self.log_viewer.pack(fill="both", expand=True, padx=10, pady=(0, 10))
 
@@ -1344,9 +1514,11 @@ class PolygonOverlapPanel(ctk.CTkFrame):
             self.output_var.set(output_dir)
 
         self.btn_run.configure(state="disabled", text="检查中...")
+        cancel = self.btn_stop.start()
         self.btn_open_folder.configure(state="disabled")
         self.result_path = None
         self.log_viewer.clear()
+        self.progress_status.reset()
         self.log_viewer.append(f"开始检查数据文件夹: {source_dir}")
         self.log_viewer.append(f"输出目录: {output_dir}")
         self.log_viewer.append(f"重叠面积阈值: {threshold}")
@@ -1355,7 +1527,11 @@ class PolygonOverlapPanel(ctk.CTkFrame):
 
         def run_task():
             try:
-                result_path, error, stats = run_polygon_overlap_check(source_dir, threshold, output_dir)
+                result_path, error, stats = run_polygon_overlap_check(
+                    source_dir, threshold, output_dir,
+                    progress=make_progress_callback(self, self.progress_status.update_progress),
+                    cancel=cancel,
+                )
             except Exception as exc:
                 result_path, error, stats = None, f"执行检查失败: {str(exc)}", {}
             elapsed = time.time() - start_time
@@ -1366,6 +1542,9 @@ class PolygonOverlapPanel(ctk.CTkFrame):
 
     def _on_complete(self, result_path, error, stats, elapsed):
         self.btn_run.configure(state="normal", text="开始检查")
+        self.btn_stop.finish()
+        if stats and stats.get('cancelled'):
+            self.log_viewer.append("任务已中止，以下为已处理部分的结果")
 
         if error:
             self.log_viewer.append(f"错误: {error}")
@@ -1418,6 +1597,7 @@ class PolygonOverlapPanel(ctk.CTkFrame):
         self.threshold_var.set("0.1")
         self.result_path = None
         self.log_viewer.clear()
+        self.progress_status.reset()
         self.btn_open_folder.configure(state="disabled")
 
     def _open_result_folder(self):
@@ -1542,6 +1722,9 @@ class SamplerPanel(ctk.CTkFrame):
         )
         self.btn_open_folder.pack(side="left", padx=(0, 10))
 
+        self.btn_stop = StopButton(self.buttons_card)
+        self.btn_stop.pack(side="left", padx=(0, 10))
+
         self.btn_clear = ctk.CTkButton(
             self.buttons_card, text="清空",
             font=APP_FONT, height=45,
@@ -1562,6 +1745,9 @@ class SamplerPanel(ctk.CTkFrame):
         )
         self.log_label.pack(anchor="w", padx=15, pady=(10, 5))
 
+        self.progress_status = ProgressStatus(self.log_card)
+        self.progress_status.pack(fill="x", padx=15, pady=(0, 5))
+
         self.log_viewer = LogViewer(self.log_card, height=200)
         self.log_viewer.pack(fill="both", expand=True, padx=10, pady=(0, 10))
 
@@ -1599,9 +1785,11 @@ class SamplerPanel(ctk.CTkFrame):
             return
 
         self.btn_run.configure(state="disabled", text="抽样中...")
+        cancel = self.btn_stop.start()
         self.result_path = None
         self.btn_open_folder.configure(state="disabled")
         self.log_viewer.clear()
+        self.progress_status.reset()
         self.log_viewer.append(f"开始抽样数据文件夹: {source_dir}")
         self.log_viewer.append(f"输出目录: {output_dir}")
         self.log_viewer.append(f"抽样数量: {sample_count} 张")
@@ -1610,7 +1798,11 @@ class SamplerPanel(ctk.CTkFrame):
 
         def run_task():
             try:
-                output_path, error, stats = run_sampler(source_dir, output_dir, sample_count)
+                output_path, error, stats = run_sampler(
+                    source_dir, output_dir, sample_count,
+                    progress=make_progress_callback(self, self.progress_status.update_progress),
+                    cancel=cancel,
+                )
             except Exception as exc:
                 output_path, error, stats = None, f"执行抽样失败: {str(exc)}", {}
             elapsed = time.time() - start_time
@@ -1621,6 +1813,9 @@ class SamplerPanel(ctk.CTkFrame):
 
     def _on_sampler_complete(self, output_path, error, stats, elapsed):
         self.btn_run.configure(state="normal", text="开始抽样")
+        self.btn_stop.finish()
+        if stats and stats.get('cancelled'):
+            self.log_viewer.append("任务已中止，以下为已处理部分的结果")
 
         if error:
             self.log_viewer.append(f"错误: {error}")
@@ -1639,6 +1834,7 @@ class SamplerPanel(ctk.CTkFrame):
         self.output_var.set("")
         self.count_var.set("50")
         self.log_viewer.clear()
+        self.progress_status.reset()
         self.result_path = None
         self.btn_open_folder.configure(state="disabled")
 
@@ -1690,7 +1886,15 @@ class ImageCountPanel(ctk.CTkFrame):
             text="自动识别: jpg, jpeg, png, tif, tiff",
             font=APP_FONT_SMALL, text_color=COLOR_TEXT_MUTED
         )
-        self.info_label.pack(anchor="w", padx=15, pady=(5, 15))
+        self.info_label.pack(anchor="w", padx=15, pady=(5, 10))
+
+        self.cache_var = ctk.BooleanVar(value=False)
+        self.cache_checkbox = ctk.CTkCheckBox(
+            self.params_card, text="使用扫描缓存",
+            variable=self.cache_var,
+            font=APP_FONT_SMALL, fg_color=COLOR_PRIMARY
+        )
+        self.cache_checkbox.pack(anchor="w", padx=15, pady=(0, 15))
         
         self.buttons_card = ctk.CTkFrame(self, fg_color="transparent")
         self.buttons_card.pack(fill="x", padx=20, pady=(0, 15))
@@ -1714,6 +1918,9 @@ class ImageCountPanel(ctk.CTkFrame):
         )
         self.btn_open_folder.pack(side="left", padx=(0, 10))
         
+        self.btn_stop = StopButton(self.buttons_card)
+        self.btn_stop.pack(side="left", padx=(0, 10))
+
         self.btn_clear = ctk.CTkButton(
             self.buttons_card, text="清空",
             font=APP_FONT, height=45,
@@ -1733,6 +1940,9 @@ class ImageCountPanel(ctk.CTkFrame):
             font=APP_FONT_BOLD, text_color=COLOR_TEXT_PRIMARY
         )
         self.log_label.pack(anchor="w", padx=15, pady=(10, 5))
+
+        self.progress_status = ProgressStatus(self.log_card)
+        self.progress_status.pack(fill="x", padx=15, pady=(0, 5))
         
         self.log_viewer = LogViewer(self.log_card, height=200)
         self.log_viewer.pack(fill="both", expand=True, padx=10, pady=(0, 10))
@@ -1744,17 +1954,24 @@ class ImageCountPanel(ctk.CTkFrame):
             return
         
         self.btn_run.configure(state="disabled", text="扫描中...")
+        cancel = self.btn_stop.start()
         self.result_path = None
         self.btn_open_folder.configure(state="disabled")
         self.log_viewer.clear()
+        self.progress_status.reset()
         self.log_viewer.append(f"开始扫描数据文件夹: {folder}")
         self.log_viewer.append("自动识别: jpg, jpeg, png, tif, tiff")
         
+        use_cache = self.cache_var.get()
         start_time = time.time()
         
         def run_task():
             try:
-                output_path, error, stats = run_count(folder)
+                output_path, error, stats = run_count(
+                    folder, use_cache=use_cache,
+                    progress=make_progress_callback(self, self.progress_status.update_progress),
+                    cancel=cancel,
+                )
             except Exception as exc:
                 output_path, error, stats = None, f"执行扫描失败: {str(exc)}", {}
             elapsed = time.time() - start_time
@@ -1765,6 +1982,9 @@ class ImageCountPanel(ctk.CTkFrame):
     
     def _on_scan_complete(self, output_path, error, stats, elapsed):
         self.btn_run.configure(state="normal", text="开始扫描")
+        self.btn_stop.finish()
+        if stats and stats.get('cancelled'):
+            self.log_viewer.append("任务已中止，以下为已处理部分的结果")
         
         if error:
             self.log_viewer.append(f"错误: {error}")
@@ -1787,6 +2007,7 @@ class ImageCountPanel(ctk.CTkFrame):
     def _clear_input(self):
         self.path_selector.set("")
         self.log_viewer.clear()
+        self.progress_status.reset()
         self.result_path = None
         self.btn_open_folder.configure(state="disabled")
     
@@ -1841,6 +2062,54 @@ class PathSelector(ctk.CTkFrame):
         self.path_var.set(value)
 
 
+class ProgressStatus(ctk.CTkLabel):
+    """进度状态组件，显示已处理数量、吞吐与预计剩余时间"""
+    
+    def __init__(self, master, **kwargs):
+        super().__init__(
+            master, text="", font=APP_FONT_SMALL,
+            text_color=COLOR_TEXT_MUTED, anchor="w",
+            **kwargs
+        )
+    
+    def update_progress(self, event):
+        self.configure(text=event.format())
+    
+    def reset(self):
+        self.configure(text="")
+
+
+class StopButton(ctk.CTkButton):
+    """停止按钮，持有当前任务的取消令牌"""
+    
+    def __init__(self, master, **kwargs):
+        super().__init__(
+            master, text="停止",
+            font=APP_FONT_BOLD, height=45,
+            fg_color="#F59E0B", hover_color="#D97706",
+            text_color="#FFFFFF",
+            state="disabled",
+            command=self._stop,
+            **kwargs
+        )
+        self.cancel_token = None
+    
+    def start(self):
+        """任务开始时创建新的取消令牌并启用按钮"""
+        self.cancel_token = CancelToken()
+        self.configure(state="normal", text="停止")
+        return self.cancel_token
+    
+    def finish(self):
+        self.cancel_token = None
+        self.configure(state="disabled", text="停止")
+    
+    def _stop(self):
+        if self.cancel_token is not None:
+            self.cancel_token.cancel()
+            self.configure(state="disabled", text="停止中...")
+
+
 class LogViewer(ctk.CTkTextbox):
     """日志查看器组件"""
     
@@ -13,11 +13,14 @@ Labelme 工具箱
 4. 抽样类：检查抽样
 """
 
+import multiprocessing
 import sys
 from gui.main_window import MainWindow
 
 
 def main():
+    # 打包为单文件 exe 后，多进程扫描与解析的子进程会重新启动本程序，须在创建界面前交由 multiprocessing 接管
+    multiprocessing.freeze_support()
     app = MainWindow()
     app.mainloop()
 
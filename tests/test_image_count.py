@@ -0,0 +1,29 @@
+"""文件计数统计：所有路径都返回 (output_path, error, stats) 三元组。"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.image_count import run_count
+
+
+class RunCountReturnTest(unittest.TestCase):
+    def test_empty_folder_argument(self):
+        output_path, error, stats = run_count("")
+        self.assertIsNone(output_path)
+        self.assertTrue(error)
+        self.assertEqual(stats, {})
+
+    def test_invalid_folder(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output_path, error, stats = run_count(os.path.join(temp_dir, "missing"))
+        self.assertIsNone(output_path)
+        self.assertTrue(error)
+        self.assertEqual(stats, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
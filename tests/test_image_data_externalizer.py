@@ -0,0 +1,156 @@
+"""imageData 外置工具与同路径 JSON 改写的往返测试。
+
+Windows 不允许替换仍被打开或内存映射的文件。测试中将 os.replace 包装为先检查
+当前进程是否仍持有目标文件的句柄（含 mmap 内部复制的句柄），在 Linux 上复现该限制。
+"""
+
+import base64
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import labelme
+from core.labelme import read_labelme_image_data, read_labelme_shapes, write_labelme_image_data, write_labelme_shapes
+from tools.image_data_externalizer import (
+    MODE_RESTORE,
+    MODE_SIDECAR,
+    MODE_STRIP,
+    STATUS_CHANGED,
+    _process_file,
+    get_sidecar_path,
+    run_externalize,
+)
+
+
+PROC_FD_DIR = "/proc/self/fd"
+
+IMAGE_BYTES = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 4
+
+
+def _open_handles(path: str) -> int:
+    """当前进程中指向 path 的文件描述符数。"""
+    target = os.path.realpath(path)
+    count = 0
+    for name in os.listdir(PROC_FD_DIR):
+        try:
+            if os.readlink(os.path.join(PROC_FD_DIR, name)) == target:
+                count += 1
+        except OSError:
+            continue
+    return count
+
+
+_real_replace = os.replace
+
+
+def _windows_like_replace(src, dst):
+    if os.path.exists(dst) and _open_handles(os.fspath(dst)):
+        raise PermissionError(f"目标文件仍被打开: {dst}")
+    return _real_replace(src, dst)
+
+
+@unittest.skipUnless(os.path.isdir(PROC_FD_DIR), "需要 /proc/self/fd 检查打开的句柄")
+class SamePathWriteTest(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self._temp_dir.name)
+        self.image_path = self.root / "IMG_1.jpg"
+        self.image_path.write_bytes(IMAGE_BYTES)
+        self.image_data = base64.b64encode(IMAGE_BYTES)
+        self.json_path = self.root / "IMG_1.json"
+        self.shapes = [{"label": "0101", "points": [[1, 2], [3, 4], [5, 1]], "group_id": None,
+                        "shape_type": "polygon", "flags": {}}]
+        self.json_path.write_text(json.dumps({
+            "version": "5.2.1",
+            "flags": {},
+            "shapes": self.shapes,
+            "imagePath": self.image_path.name,
+            "imageData": self.image_data.decode("ascii"),
+            "imageHeight": 10,
+            "imageWidth": 10,
+        }, indent=2), encoding="utf-8")
+
+        patcher = mock.patch.object(labelme.os, "replace", _windows_like_replace)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self._temp_dir.cleanup)
+
+    def test_image_data_same_path_round_trip(self):
+        write_labelme_image_data(self.json_path, self.json_path, None)
+        self.assertIsNone(read_labelme_image_data(self.json_path))
+
+        write_labelme_image_data(self.json_path, self.json_path, self.image_data)
+        self.assertEqual(read_labelme_image_data(self.json_path), self.image_data)
+        self.assertEqual(read_labelme_shapes(self.json_path)["shapes"], self.shapes)
+
+    def test_shapes_same_path(self):
+        shapes = [dict(self.shapes[0], label="0201")]
+        write_labelme_shapes(self.json_path, self.json_path, shapes)
+        self.assertEqual(read_labelme_shapes(self.json_path)["shapes"], shapes)
+        self.assertEqual(read_labelme_image_data(self.json_path), self.image_data)
+        self.assertTrue(labelme.save_labelme_shapes(self.json_path, self.shapes))
+
+    def test_strip_then_restore_from_image(self):
+        row = _process_file(self.json_path, MODE_STRIP)
+        self.assertEqual(row["status"], STATUS_CHANGED, row["note"])
+        self.assertIsNone(read_labelme_image_data(self.json_path))
+
+        row = _process_file(self.json_path, MODE_RESTORE)
+        self.assertEqual(row["status"], STATUS_CHANGED, row["note"])
+        self.assertEqual(read_labelme_image_data(self.json_path), self.image_data)
+
+    def test_sidecar_then_restore(self):
+        original = self.json_path.read_bytes()
+
+        row = _process_file(self.json_path, MODE_SIDECAR)
+        self.assertEqual(row["status"], STATUS_CHANGED, row["note"])
+        sidecar_path = get_sidecar_path(self.json_path)
+        self.assertEqual(sidecar_path.read_bytes(), self.image_data)
+
+        row = _process_file(self.json_path, MODE_RESTORE)
+        self.assertEqual(row["status"], STATUS_CHANGED, row["note"])
+        self.assertFalse(sidecar_path.exists())
+        self.assertEqual(self.json_path.read_bytes(), original)
+
+
+class IncrementalRunTest(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+        self.root = Path(self._temp_dir.name)
+        self.image_data = base64.b64encode(IMAGE_BYTES).decode("ascii")
+        for name in ("IMG_1", "IMG_2"):
+            (self.root / f"{name}.jpg").write_bytes(IMAGE_BYTES)
+            self._write_json(name)
+
+    def _write_json(self, name: str) -> None:
+        (self.root / f"{name}.json").write_text(json.dumps({
+            "version": "5.2.1", "flags": {}, "shapes": [], "imagePath": f"{name}.jpg", "imageData": self.image_data,
+        }, indent=2), encoding="utf-8")
+
+    def test_since_processes_only_changed_files(self):
+        _report, error, stats = run_externalize(str(self.root), MODE_STRIP, workers=1)
+        self.assertIsNone(error)
+        self.assertEqual((stats["total_files"], stats["changed_files"], stats["unchanged_files"]), (2, 2, 0))
+        previous = stats["manifest"]
+
+        _report, error, stats = run_externalize(str(self.root), MODE_STRIP, workers=1, since=previous)
+        self.assertIsNone(error)
+        self.assertEqual((stats["total_files"], stats["unchanged_files"]), (0, 2))
+
+        # 只有重新写入 imageData 的文件需要处理
+        self._write_json("IMG_2")
+        _report, error, stats = run_externalize(str(self.root), MODE_STRIP, workers=1, since=stats["manifest"])
+        self.assertIsNone(error)
+        self.assertEqual((stats["total_files"], stats["changed_files"], stats["unchanged_files"]), (1, 1, 1))
+        self.assertIsNone(read_labelme_image_data(self.root / "IMG_2.json"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+"""标签审核：使用标注索引与逐个解析文件得到的无效标签及其顺序必须一致。"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.label_audit import audit_labels
+
+
+class InvalidLabelOrderTest(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+        self._cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._cache_dir.cleanup)
+        previous = os.environ.get("XDG_CACHE_HOME")
+        os.environ["XDG_CACHE_HOME"] = self._cache_dir.name
+        self.addCleanup(
+            lambda: os.environ.__setitem__("XDG_CACHE_HOME", previous) if previous is not None
+            else os.environ.pop("XDG_CACHE_HOME", None)
+        )
+
+        label_sets = [["zz", "0101", " yy", "aa", "yy ", "zz", "mm"], ["q", "p", "0101", "o"], ["b ", " b", "a"]]
+        for i, labels in enumerate(label_sets):
+            shapes = [{"label": label, "points": [[0, 0], [1, 1]], "shape_type": "line"} for label in labels]
+            (Path(self._temp_dir.name) / f"f{i}.json").write_text(json.dumps({"shapes": shapes}), encoding="utf-8")
+
+    def _invalid_labels(self, use_index: bool) -> list[tuple[str, str]]:
+        result, error = audit_labels(self._temp_dir.name, {"0101"}, ["0101"], use_index=use_index, processes=1)
+        self.assertIsNone(error)
+        return result.invalid_labels
+
+    def test_index_keeps_first_appearance_order(self):
+        expected = [
+            ("f0.json", "zz"), ("f0.json", "yy"), ("f0.json", "aa"), ("f0.json", "mm"),
+            ("f1.json", "q"), ("f1.json", "p"), ("f1.json", "o"),
+            ("f2.json", "b"), ("f2.json", "a"),
+        ]
+        self.assertEqual(self._invalid_labels(use_index=False), expected)
+        # 第一次建立索引，第二次直接由索引得到无效标签
+        self.assertEqual(self._invalid_labels(use_index=True), expected)
+        self.assertEqual(self._invalid_labels(use_index=True), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
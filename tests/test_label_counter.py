@@ -0,0 +1,88 @@
+"""标签计数：多进程与串行统计写出的各工作表逐行一致。"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from openpyxl import load_workbook
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import annotation_index
+from tools.label_counter import run_label_counter
+
+
+ORDERED_LABELS = ["0202", "0101", "x"]
+
+
+def _write_dataset(root: Path) -> None:
+    """写出多个提交批次下的标注，包含带空白的标签、未列出的标签与损坏的 JSON。"""
+    label_sets = [
+        ["0101", "zz", " 0202"], ["x", "0101", "x"], [], ["0202", "b ", "0101 "],
+        ["0101"], ["x", "y"], ["0202", "0202"], ["m"],
+    ]
+    for i, labels in enumerate(label_sets):
+        folder = root / f"第{i % 3 + 1}次提交" / f"区域{i % 2}"
+        folder.mkdir(parents=True, exist_ok=True)
+        shapes = [{"label": label, "points": [[0, 0], [1, 1]], "shape_type": "line"} for label in labels]
+        (folder / f"f{i}.json").write_text(json.dumps({"shapes": shapes}), encoding="utf-8")
+    (root / "第1次提交" / "broken.json").write_text("{not json", encoding="utf-8")
+
+
+def _read_rows(path: str) -> dict[str, list[tuple]]:
+    workbook = load_workbook(path, read_only=True)
+    try:
+        return {sheet.title: [tuple(row) for row in sheet.iter_rows(values_only=True)] for sheet in workbook.worksheets}
+    finally:
+        workbook.close()
+
+
+class ParallelCounterTest(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+        self._cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._cache_dir.cleanup)
+        previous = os.environ.get("XDG_CACHE_HOME")
+        self.addCleanup(
+            lambda: os.environ.__setitem__("XDG_CACHE_HOME", previous) if previous is not None
+            else os.environ.pop("XDG_CACHE_HOME", None)
+        )
+        self.root = Path(self._temp_dir.name)
+        _write_dataset(self.root)
+
+    def _run(self, cache_name: str, processes: int, use_index: bool = True) -> dict[str, list[tuple]]:
+        # 每种运行方式使用独立的缓存目录，两者都从空索引开始
+        os.environ["XDG_CACHE_HOME"] = os.path.join(self._cache_dir.name, cache_name)
+        output_path, error, stats = run_label_counter(
+            str(self.root), ORDERED_LABELS, use_index=use_index, processes=processes, chunk_size=2,
+        )
+        self.assertIsNone(error)
+        self.assertEqual(stats["total_files"], 9)
+        return _read_rows(output_path)
+
+    def test_parallel_count_sheets_match_serial(self):
+        serial = self._run("serial", processes=1)
+        with mock.patch.object(
+            annotation_index, "iter_process_chunks", wraps=annotation_index.iter_process_chunks,
+        ) as spy:
+            parallel = self._run("parallel", processes=2)
+        # 默认使用索引时，索引更新本身应交给进程池解析
+        spy.assert_called_once()
+        self.assertEqual(spy.call_args.kwargs["processes"], 2)
+        self.assertGreater(len(serial), 1)
+        self.assertEqual(parallel, serial)
+
+    def test_parallel_count_sheets_match_serial_without_index(self):
+        serial = self._run("serial", processes=1, use_index=False)
+        parallel = self._run("parallel", processes=2, use_index=False)
+        self.assertEqual(parallel, serial)
+        self.assertEqual(self._run("indexed", processes=2), serial)
+
+
+if __name__ == "__main__":
+    unittest.main()
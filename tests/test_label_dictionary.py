@@ -0,0 +1,73 @@
+"""标签字典缓存：内容变化后重新解析，返回的列表是独立副本。"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from openpyxl import Workbook
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import label_dictionary
+from core.label_dictionary import clear_label_dictionary_cache, load_excel_labels
+
+
+def _save_workbook(path: str, labels: list) -> None:
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["label"])
+    for label in labels:
+        ws.append([label])
+    wb.save(path)
+
+
+class LoadExcelLabelsTest(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+        self._cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._cache_dir.cleanup)
+        previous = os.environ.get("XDG_CACHE_HOME")
+        os.environ["XDG_CACHE_HOME"] = self._cache_dir.name
+        self.addCleanup(
+            lambda: os.environ.__setitem__("XDG_CACHE_HOME", previous) if previous is not None
+            else os.environ.pop("XDG_CACHE_HOME", None)
+        )
+        clear_label_dictionary_cache()
+        self.addCleanup(clear_label_dictionary_cache)
+
+        self.path = os.path.join(self._temp_dir.name, "labels.xlsx")
+        _save_workbook(self.path, ["0101", " 0102 ", "0101", None, 203])
+
+    def test_content_change_invalidates_cache(self):
+        self.assertEqual(load_excel_labels(self.path), ["0101", "0102", "203"])
+
+        # 同一路径写入新内容，内存与磁盘缓存都不应再命中旧结果
+        _save_workbook(self.path, ["0301", "0101"])
+        self.assertEqual(load_excel_labels(self.path), ["0301", "0101"])
+        clear_label_dictionary_cache()
+        self.assertEqual(load_excel_labels(self.path), ["0301", "0101"])
+
+    def test_returns_independent_copies(self):
+        labels = load_excel_labels(self.path)
+        labels.append("mutated")
+        labels[0] = "changed"
+
+        again = load_excel_labels(self.path)
+        self.assertEqual(again, ["0101", "0102", "203"])
+        self.assertIsNot(again, load_excel_labels(self.path))
+
+    def test_disk_cache_reused_after_memory_cache_cleared(self):
+        expected = load_excel_labels(self.path)
+        clear_label_dictionary_cache()
+        with mock.patch.object(label_dictionary, "_read_excel_label_column", side_effect=AssertionError("不应重新解析")):
+            labels = load_excel_labels(self.path)
+        self.assertEqual(labels, expected)
+        labels.clear()
+        self.assertEqual(load_excel_labels(self.path), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+"""标签校验：多进程更新标注索引时的报告与串行运行逐行一致。"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from openpyxl import load_workbook
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import annotation_index
+from tools.label_validator import run_validator
+
+
+VALID_LABELS = {"0101", "0202"}
+
+# 刚写入的文件 mtime 不可信，每次都会重新解析；统一改为较早的时间，使增量更新可以复用记录
+OLD_MTIME_NS = 1_600_000_000 * 10**9
+
+
+def _write_dataset(root: Path) -> None:
+    """写出多级目录的标注，包含无效标签、损坏的 JSON 与点数组结构错误的形状。"""
+    label_sets = [
+        ["0101", "zz", " 0202"], ["q", "0101", "q"], [], ["0202", "b ", "a", "0101 "],
+        ["0101"], ["x", "y", "z"], ["0202", "0202"], ["m"],
+    ]
+    for i, labels in enumerate(label_sets):
+        folder = root / f"批次{i % 3}" / "区域"
+        folder.mkdir(parents=True, exist_ok=True)
+        shapes = [{"label": label, "points": [[0, 0], [i, 1], [1, i]], "shape_type": "polygon"} for label in labels]
+        (folder / f"f{i}.json").write_text(
+            json.dumps({"shapes": shapes, "imageWidth": 10, "imageHeight": 10}), encoding="utf-8",
+        )
+    (root / "批次0" / "broken.json").write_text("{not json", encoding="utf-8")
+    (root / "批次1" / "bad_points.json").write_text(
+        json.dumps({"shapes": [{"label": "bad", "points": [1, 2, 3], "shape_type": "polygon"}]}), encoding="utf-8",
+    )
+    for json_path in root.rglob("*.json"):
+        os.utime(json_path, ns=(OLD_MTIME_NS, OLD_MTIME_NS))
+
+
+def _read_rows(path: str) -> dict[str, list[tuple]]:
+    workbook = load_workbook(path, read_only=True)
+    try:
+        return {sheet.title: [tuple(row) for row in sheet.iter_rows(values_only=True)] for sheet in workbook.worksheets}
+    finally:
+        workbook.close()
+
+
+class ParallelValidatorTest(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+        self._cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._cache_dir.cleanup)
+        previous = os.environ.get("XDG_CACHE_HOME")
+        self.addCleanup(
+            lambda: os.environ.__setitem__("XDG_CACHE_HOME", previous) if previous is not None
+            else os.environ.pop("XDG_CACHE_HOME", None)
+        )
+        self.root = Path(self._temp_dir.name)
+        _write_dataset(self.root)
+
+    def _run(self, cache_name: str, processes: int, total_files: int = 10) -> dict[str, list[tuple]]:
+        # 每种运行方式使用独立的缓存目录，两者都从空索引开始
+        os.environ["XDG_CACHE_HOME"] = os.path.join(self._cache_dir.name, cache_name)
+        output_path, error, stats = run_validator(str(self.root), VALID_LABELS, processes=processes, chunk_size=2)
+        self.assertIsNone(error)
+        self.assertEqual(stats["total_files"], total_files)
+        return _read_rows(output_path)
+
+    def test_parallel_report_matches_serial(self):
+        serial = self._run("serial", processes=1)
+        with mock.patch.object(
+            annotation_index, "iter_process_chunks", wraps=annotation_index.iter_process_chunks,
+        ) as spy:
+            parallel = self._run("parallel", processes=2)
+        # 默认使用索引时，索引更新本身应交给进程池解析
+        spy.assert_called_once()
+        self.assertEqual(spy.call_args.kwargs["processes"], 2)
+        self.assertEqual(len(spy.call_args.args[0]), 10)
+        self.assertEqual(parallel, serial)
+
+    def test_parallel_incremental_update_matches_serial(self):
+        self._run("serial", processes=1)
+        self._run("parallel", processes=2)
+
+        changed = self.root / "批次1" / "区域" / "f1.json"
+        changed.write_text(json.dumps({"shapes": [{"label": "new", "points": [[0, 0]], "shape_type": "point"}]}))
+        os.utime(changed, ns=(OLD_MTIME_NS + 1, OLD_MTIME_NS + 1))
+        (self.root / "批次2" / "区域" / "f5.json").unlink()
+
+        serial = self._run("serial", processes=1, total_files=9)
+        with mock.patch.object(
+            annotation_index, "iter_process_chunks", wraps=annotation_index.iter_process_chunks,
+        ) as spy:
+            parallel = self._run("parallel", processes=2, total_files=9)
+        # 只有被修改的文件需要重新解析
+        self.assertEqual([str(path) for path in spy.call_args.args[0]], [str(changed)])
+        self.assertEqual(parallel, serial)
+
+
+if __name__ == "__main__":
+    unittest.main()
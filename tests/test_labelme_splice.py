@@ -0,0 +1,113 @@
+"""按字节替换顶层字段：只能命中顶层键，其余字节原样保留。"""
+
+import base64
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.labelme import (
+    _find_top_level_value_span,
+    read_labelme_image_data,
+    write_labelme_image_data,
+    write_labelme_shapes,
+)
+
+
+NEW_SHAPES = [{"label": "0201", "points": [[1.5, 2.0], [3.0, 4.0]], "group_id": None,
+               "shape_type": "line", "flags": {}}]
+
+
+class ReplaceTopLevelValueTest(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+        self.root = Path(self._temp_dir.name)
+
+    def _write(self, name: str, content: bytes) -> Path:
+        path = self.root / name
+        path.write_bytes(content)
+        return path
+
+    def _assert_shapes_replaced(self, data: dict, content: bytes | None = None) -> Path:
+        """替换 shapes 后应与整体解析再写出的结果一致，shapes 之前的字节保持不变。"""
+        if content is None:
+            content = json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+        source = self._write("source.json", content)
+        target = self.root / "target.json"
+
+        span = _find_top_level_value_span(content, b'"shapes"')
+        self.assertIsNotNone(span)
+        self.assertEqual(json.loads(content[span[1]:span[2]]), data["shapes"])
+
+        write_labelme_shapes(source, target, NEW_SHAPES)
+        written = target.read_bytes()
+        self.assertEqual(json.loads(written), dict(data, shapes=NEW_SHAPES))
+        self.assertEqual(written[:span[1]], content[:span[1]])
+        return target
+
+    def test_key_text_inside_string_values(self):
+        data = {
+            "version": "5.2.1",
+            "flags": {},
+            "imagePath": "\"shapes\": [\"x\"], \\\"shapes\\\"",
+            "shapes": [{"label": "shapes", "points": [[0, 0]], "shape_type": "point", "flags": {}}],
+            "note": "{\"shapes\": 1}",
+        }
+        target = self._assert_shapes_replaced(data)
+        self.assertEqual(target.read_bytes(), json.dumps(dict(data, shapes=NEW_SHAPES), indent=2).encode("utf-8"))
+
+    def test_empty_shapes(self):
+        data = {"version": "5.2.1", "flags": {}, "shapes": [], "imagePath": "a.jpg", "imageData": None}
+        target = self._assert_shapes_replaced(data)
+        self.assertEqual(target.read_bytes(), json.dumps(dict(data, shapes=NEW_SHAPES), indent=2).encode("utf-8"))
+
+        # 紧凑格式与键值之间无空白的写法
+        compact = b'{"flags":{},"shapes":[],"imagePath":"a.jpg"}'
+        self._assert_shapes_replaced(json.loads(compact), compact)
+
+    def test_nested_shapes_key(self):
+        data = {
+            "version": "5.2.1",
+            "flags": {"shapes": [1, 2], "meta": {"shapes": {"shapes": []}}},
+            "otherData": [{"shapes": [{"label": "nested"}]}],
+            "shapes": [{"label": "top", "points": [[0, 0], [1, 1]], "shape_type": "line", "flags": {}}],
+            "imagePath": "a.jpg",
+        }
+        target = self._assert_shapes_replaced(data)
+        written = json.loads(target.read_bytes())
+        self.assertEqual(written["flags"], data["flags"])
+        self.assertEqual(written["otherData"], data["otherData"])
+
+    def test_nested_shapes_key_without_top_level_key(self):
+        data = {"flags": {"shapes": [1]}, "imagePath": "a.jpg"}
+        content = json.dumps(data, indent=2).encode("utf-8")
+        self.assertIsNone(_find_top_level_value_span(content, b'"shapes"'))
+
+        source = self._write("source.json", content)
+        write_labelme_shapes(source, source, NEW_SHAPES)
+        self.assertEqual(json.loads(source.read_bytes()), dict(data, shapes=NEW_SHAPES))
+
+    def test_shapes_after_large_image_data(self):
+        image_data = base64.b64encode(os.urandom(15 * 1024 * 1024)).decode("ascii")
+        self.assertGreaterEqual(len(image_data), 20 * 1024 * 1024)
+        data = {
+            "version": "5.2.1",
+            "flags": {},
+            "imageData": image_data,
+            "shapes": [{"label": "0101", "points": [[0, 0], [5, 5], [9, 0]], "shape_type": "polygon", "flags": {}}],
+            "imageHeight": 10,
+        }
+        target = self._assert_shapes_replaced(data)
+        self.assertEqual(read_labelme_image_data(target), image_data.encode("ascii"))
+
+        write_labelme_image_data(target, target, None)
+        self.assertEqual(json.loads(target.read_bytes()), dict(data, shapes=NEW_SHAPES, imageData=None))
+
+
+if __name__ == "__main__":
+    unittest.main()
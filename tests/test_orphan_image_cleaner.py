@@ -0,0 +1,58 @@
+"""孤立文件清理：删除前必须以磁盘现状为准，不能只依据清单或扫描缓存。"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.orphan_image_cleaner import run_clean, run_scan
+
+
+class RunCleanTest(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+        self._cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._cache_dir.cleanup)
+        previous = os.environ.get("XDG_CACHE_HOME")
+        os.environ["XDG_CACHE_HOME"] = self._cache_dir.name
+        self.addCleanup(
+            lambda: os.environ.__setitem__("XDG_CACHE_HOME", previous) if previous is not None
+            else os.environ.pop("XDG_CACHE_HOME", None)
+        )
+
+        self.leaf = Path(self._temp_dir.name) / "第1次数据提交" / "x" / "330102上城区"
+        self.leaf.mkdir(parents=True)
+        for name in ("a.jpg", "a.json", "b.jpg", "c.jpg"):
+            (self.leaf / name).write_bytes(b"x")
+
+    def test_stale_manifest_does_not_delete_newly_paired_image(self):
+        stats, error = run_scan(self._temp_dir.name, processes=1)
+        self.assertIsNone(error)
+        self.assertEqual(stats['orphan_image'], 2)
+
+        # 扫描之后 b.jpg 补齐了标注，清单中仍记录其为孤立图片
+        (self.leaf / "b.json").write_bytes(b"{}")
+        stats, error = run_clean(self._temp_dir.name, 'image', processes=1, manifest=stats['manifest'])
+        self.assertIsNone(error)
+
+        self.assertTrue((self.leaf / "b.jpg").exists())
+        self.assertFalse((self.leaf / "c.jpg").exists())
+        self.assertEqual(stats['deleted'], 1)
+        self.assertEqual(stats['skipped'], [str(self.leaf / "b.jpg")])
+        # 复查为真实的重新扫描，能看到清单之外新增的 b.json
+        self.assertEqual(stats['paired'], 2)
+        self.assertEqual(stats['orphan_image'], 0)
+
+    def test_clean_without_manifest(self):
+        stats, error = run_clean(self._temp_dir.name, 'image', processes=1)
+        self.assertIsNone(error)
+        self.assertEqual(stats['deleted'], 2)
+        self.assertEqual(sorted(os.listdir(self.leaf)), ["a.jpg", "a.json"])
+
+
+if __name__ == "__main__":
+    unittest.main()
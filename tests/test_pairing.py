@@ -0,0 +1,113 @@
+"""目录配对：单次遍历分组的实现与原先按名称集合求交集的实现结果一致。"""
+
+import os
+import random
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.file_scanner import IMAGE_EXTENSIONS, find_orphans_in_leaf, is_image_file, scan_leaf_dir
+
+
+def _reference_pairing(leaf_dir: str) -> dict:
+    """原 scan_leaf_dir 与 find_orphans_in_leaf 的集合实现，特殊配对按名称排序后比较。"""
+    image_files = []
+    json_files = []
+    image_counts = {ext: 0 for ext in IMAGE_EXTENSIONS}
+    for file_name in os.listdir(leaf_dir):
+        name, ext = os.path.splitext(file_name)
+        if is_image_file(file_name):
+            image_files.append((name.lower(), file_name))
+            image_counts[ext.lower()] += 1
+        elif ext.lower() == '.json':
+            json_files.append((name.lower(), file_name))
+
+    image_names = {name for name, _file_name in image_files}
+    json_names = {name for name, _file_name in json_files}
+    paired = 0
+    special_pairs = []
+    for name in image_names & json_names:
+        image_filenames = [file_name for n, file_name in image_files if n == name]
+        if len(image_filenames) == 1:
+            paired += 1
+        else:
+            json_filename = [file_name for n, file_name in json_files if n == name][0]
+            special_pairs.append((name, tuple(image_filenames + [json_filename])))
+
+    orphan_image_names = image_names - json_names
+    orphan_json_names = json_names - image_names
+    return {
+        'paired': paired,
+        'orphan_image': len(orphan_image_names),
+        'orphan_json': len(orphan_json_names),
+        'special_pairs': sorted(special_pairs),
+        'image_counts': image_counts,
+        'json_count': len(json_files),
+        'orphan_image_paths': sorted(os.path.join(leaf_dir, f) for n, f in image_files if n in orphan_image_names),
+        'orphan_json_paths': sorted(os.path.join(leaf_dir, f) for n, f in json_files if n in orphan_json_names),
+        'orphan_image_names': orphan_image_names,
+        'orphan_json_names': orphan_json_names,
+    }
+
+
+def _current_pairing(leaf_dir: str) -> dict:
+    pairing = scan_leaf_dir(leaf_dir)
+    orphans = find_orphans_in_leaf(leaf_dir)
+    special_pairs = sorted((pair.name, tuple(pair.files)) for pair in pairing['special_pairs'])
+    orphan_special_pairs = sorted((pair.name, tuple(pair.files)) for pair in orphans['special_pairs'])
+    assert special_pairs == orphan_special_pairs
+    return {
+        'paired': pairing['paired'],
+        'orphan_image': pairing['orphan_image'],
+        'orphan_json': pairing['orphan_json'],
+        'special_pairs': special_pairs,
+        'image_counts': dict(pairing['image_counts']),
+        'json_count': pairing['json_count'],
+        'orphan_image_paths': sorted(orphans['orphan_image_paths']),
+        'orphan_json_paths': sorted(orphans['orphan_json_paths']),
+        'orphan_image_names': set(orphans['orphan_image_names']),
+        'orphan_json_names': set(orphans['orphan_json_names']),
+    }
+
+
+class PairingEquivalenceTest(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+
+    def _make_dir(self, name: str, file_names: list[str]) -> str:
+        leaf = Path(self._temp_dir.name) / name
+        leaf.mkdir()
+        for file_name in file_names:
+            (leaf / file_name).write_bytes(b"x")
+        return str(leaf)
+
+    def test_mixed_case_and_multiple_formats(self):
+        leaf = self._make_dir("mixed", [
+            "A.JPG", "a.json",                  # 扩展名与主文件名大小写不同的正常配对
+            "b.jpg", "B.png", "b.JSON",         # 同名多格式图片加 JSON：特殊配对
+            "c.Tif", "c.tiff", "C.jpeg",        # 同名多格式图片无 JSON：孤立图片
+            "d.json", "D.JSON",                 # 同名多个 JSON 无图片：孤立 JSON
+            "e.jpg", "E.json", "e.Json",        # 一张图片对应多个 JSON
+            "notes.txt", "f.json.bak",          # 非图片与非 JSON 文件忽略
+        ])
+        expected = _reference_pairing(leaf)
+        self.assertEqual(_current_pairing(leaf), expected)
+        self.assertEqual((expected['paired'], expected['orphan_image'], expected['orphan_json']), (2, 1, 1))
+        self.assertEqual(len(expected['special_pairs']), 1)
+
+    def test_random_directories(self):
+        rng = random.Random(20240521)
+        extensions = [".jpg", ".JPG", ".jpeg", ".Png", ".tif", ".TIFF", ".json", ".JSON", ".txt"]
+        stems = ["a", "A", "b", "B", "img_1", "IMG_1", "x.y", "X.Y"]
+        for case in range(40):
+            file_names = {rng.choice(stems) + rng.choice(extensions) for _ in range(rng.randint(0, 20))}
+            leaf = self._make_dir(f"case{case}", sorted(file_names))
+            self.assertEqual(_current_pairing(leaf), _reference_pairing(leaf), sorted(file_names))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+"""并发目录遍历：产出顺序与串行一致，目录列出后立即产出，取消后尽快结束。"""
+
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.cancellation import CancelToken
+from core.file_scanner import _ParallelTreeLister, walk_directories
+
+
+TIMEOUT = 5
+
+
+def _fake_listing(children: list[str]) -> tuple:
+    return children, children, [], [], None, 1
+
+
+class ParallelWalkTest(unittest.TestCase):
+    def test_order_matches_serial(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            for parts in ("a/x/1", "a/x/2", "a/y", "b", "c/z/3/4"):
+                (root / parts).mkdir(parents=True)
+                (root / parts / "p.jpg").write_bytes(b"x")
+
+            serial = [(path, listing[:4]) for path, listing in walk_directories(temp_dir, workers=1)]
+            parallel = [(path, listing[:4]) for path, listing in walk_directories(temp_dir, workers=4)]
+        self.assertEqual(parallel, serial)
+        self.assertEqual(len(serial), 11)
+
+    def test_finished_directories_are_available_before_the_rest(self):
+        tree = {"root": ["a", "b"], "root/a": [], "root/b": ["c"], "root/b/c": []}
+        release = threading.Event()
+
+        def read_dir(dir_path):
+            if dir_path == "root/b/c":
+                release.wait(TIMEOUT)
+            return _fake_listing(tree[dir_path])
+
+        lister = _ParallelTreeLister("root", lambda path: read_dir(path.replace(os.sep, "/")), 4)
+        try:
+            self.assertEqual(lister.get("root")[1], ["a", "b"])
+            self.assertEqual(lister.get(os.path.join("root", "a"))[1], [])
+            self.assertEqual(lister.get(os.path.join("root", "b"))[1], ["c"])
+            # c 仍在列出中，其他目录已经可以取得
+            self.assertFalse(release.is_set())
+            release.set()
+            self.assertEqual(lister.get(os.path.join("root", "b", "c"))[1], [])
+        finally:
+            release.set()
+            lister.close()
+
+    def test_cancel_stops_submitting_new_directories(self):
+        listed = []
+        cancel = CancelToken()
+        cancelled = threading.Event()
+
+        def read_dir(dir_path):
+            listed.append(dir_path)
+            if dir_path != "r":
+                # 子目录在取消之后才列完，其下的目录不应再被提交
+                cancelled.wait(TIMEOUT)
+            return _fake_listing(["d0", "d1", "d2"])
+
+        lister = _ParallelTreeLister("r", read_dir, 4, cancel)
+        try:
+            lister.get("r")
+            cancel.cancel()
+            cancelled.set()
+        finally:
+            lister.close()
+        self.assertEqual(len(listed), 4)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+"""扫描缓存：目录 mtime 未变但条目数变化时必须重新列出。"""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.file_scanner import scan_all_leaf_dirs
+
+
+class EntryCountTest(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+        self._cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._cache_dir.cleanup)
+        previous = os.environ.get("XDG_CACHE_HOME")
+        os.environ["XDG_CACHE_HOME"] = self._cache_dir.name
+        self.addCleanup(
+            lambda: os.environ.__setitem__("XDG_CACHE_HOME", previous) if previous is not None
+            else os.environ.pop("XDG_CACHE_HOME", None)
+        )
+
+        self.leaf = Path(self._temp_dir.name) / "a"
+        self.leaf.mkdir()
+        for name in ("1.jpg", "1.json", "2.jpg"):
+            (self.leaf / name).write_bytes(b"x")
+        # mtime 远离当前时间，缓存记录才会被视为可复用
+        self.old_mtime_ns = time.time_ns() - 3600 * 10**9
+        self._set_leaf_mtime()
+
+    def _set_leaf_mtime(self):
+        os.utime(self.leaf, ns=(self.old_mtime_ns, self.old_mtime_ns))
+
+    def test_unchanged_directory_reuses_cache(self):
+        first = scan_all_leaf_dirs(self._temp_dir.name, use_cache=True)
+        second = scan_all_leaf_dirs(self._temp_dir.name, use_cache=True)
+        self.assertEqual((first['paired'], first['orphan_image']), (1, 1))
+        self.assertEqual((second['paired'], second['orphan_image']), (1, 1))
+
+    def test_stale_mtime_with_new_entry_is_relisted(self):
+        stats = scan_all_leaf_dirs(self._temp_dir.name, use_cache=True)
+        self.assertEqual(stats['orphan_image'], 1)
+
+        # 模拟网络共享目录客户端缓存的 mtime：新增文件后目录 mtime 仍为旧值
+        (self.leaf / "2.json").write_bytes(b"x")
+        self._set_leaf_mtime()
+
+        stats = scan_all_leaf_dirs(self._temp_dir.name, use_cache=True)
+        self.assertEqual(stats['paired'], 2)
+        self.assertEqual(stats['orphan_image'], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+"""形状结构检查：向量化的批量检查与逐个 shape 的检查结果一致。"""
+
+import math
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.labelme import (
+    ISSUE_DUPLICATE_VERTEX,
+    ISSUE_NON_FINITE,
+    ISSUE_NON_NUMERIC,
+    ISSUE_POINT_COUNT,
+    ISSUE_UNKNOWN_TYPE,
+    ISSUE_ZERO_AREA,
+    KNOWN_SHAPE_TYPES,
+    ZERO_AREA_EPSILON,
+    check_shape_structure,
+)
+
+
+EXACT_POINT_COUNTS = {'rectangle': 2, 'circle': 2, 'line': 2, 'point': 1}
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _reference_issues(shape: dict) -> list[tuple[str, str]]:
+    """逐点循环实现的单个 shape 检查，返回 [(问题类型, 说明)]。"""
+    shape_type = shape.get('shape_type')
+    points = shape.get('points', [])
+    issues = []
+    if shape_type not in KNOWN_SHAPE_TYPES:
+        issues.append((ISSUE_UNKNOWN_TYPE, f"shape_type 为 {shape_type!r}"))
+    numeric = isinstance(points, (list, tuple)) and all(
+        isinstance(point, (list, tuple)) and len(point) == 2 and all(_is_number(value) for value in point)
+        for point in points
+    )
+    if not numeric:
+        issues.append((ISSUE_NON_NUMERIC, "points 不是由两个数值组成的坐标列表"))
+        return issues
+
+    count = len(points)
+    is_polygon = shape_type == 'polygon'
+    non_finite = sum(1 for x, y in points if not (math.isfinite(x) and math.isfinite(y)))
+    if non_finite:
+        issues.append((ISSUE_NON_FINITE, f"{non_finite} 个点"))
+
+    expected = EXACT_POINT_COUNTS.get(shape_type)
+    if expected is not None and count != expected:
+        issues.append((ISSUE_POINT_COUNT, f"{shape_type} 有 {count} 个点，应为 {expected}"))
+    elif is_polygon and count < 3:
+        issues.append((ISSUE_POINT_COUNT, f"{shape_type} 有 {count} 个点，至少 3"))
+
+    edges = [(i, i + 1) for i in range(count - 1)]
+    if is_polygon and count > 1:
+        edges.append((count - 1, 0))
+    duplicates = sum(1 for a, b in edges if list(points[a]) == list(points[b]))
+    if duplicates:
+        issues.append((ISSUE_DUPLICATE_VERTEX, f"{duplicates} 处"))
+
+    if is_polygon and not non_finite and count >= 3:
+        area = 0.5 * abs(sum(
+            points[i][0] * points[(i + 1) % count][1] - points[(i + 1) % count][0] * points[i][1]
+            for i in range(count)
+        ))
+        if area <= ZERO_AREA_EPSILON:
+            issues.append((ISSUE_ZERO_AREA, f"面积 {area:.3g}"))
+    return issues
+
+
+def _random_shape(rng: random.Random) -> dict:
+    shape_type = rng.choice(['polygon', 'polygon', 'rectangle', 'circle', 'line', 'point', 'linestrip', 'ellipse', None])
+    kind = rng.random()
+    if kind < 0.05:
+        return {'shape_type': shape_type, 'points': rng.choice([None, "1,2", 3, {"x": 1}])}
+    count = rng.choice([0, 1, 2, 3, 4, 5]) if rng.random() < 0.5 else rng.randint(0, 12)
+    # 小范围整数坐标，容易出现重复顶点与共线的零面积多边形
+    points = [[rng.randint(0, 3), rng.randint(0, 3)] for _ in range(count)]
+    if points and kind < 0.15:
+        points[rng.randrange(count)] = rng.choice([["a", 1], [1], [1, 2, 3], None])
+    elif points and kind < 0.25:
+        points[rng.randrange(count)][rng.randrange(2)] = rng.choice([math.nan, math.inf, -math.inf])
+    elif points and kind < 0.35:
+        points = [[float(x) + 0.5, y] for x, y in points]
+    return {'shape_type': shape_type, 'points': points}
+
+
+class ShapeStructureTest(unittest.TestCase):
+    def _assert_matches_per_shape(self, shapes: list[dict]) -> None:
+        batch = check_shape_structure(shapes)
+        expected = [(index, *issue) for index, shape in enumerate(shapes) for issue in _reference_issues(shape)]
+        single = [(index, *issue) for index, shape in enumerate(shapes) for _i, *issue in check_shape_structure([shape])]
+        self.assertEqual(batch, expected)
+        self.assertEqual(single, expected)
+
+    def test_mixed_valid_and_invalid_shapes(self):
+        shapes = [
+            {'shape_type': 'polygon', 'points': [[0, 0], [4, 0], [4, 3]]},
+            {'shape_type': 'polygon', 'points': [[0, 0], [1, 1], [2, 2]]},                  # 零面积
+            {'shape_type': 'polygon', 'points': [[0, 0], [4, 0], [4, 3], [0, 0]]},          # 首尾重复
+            {'shape_type': 'rectangle', 'points': [[1, 1], [5, 5], [6, 6]]},                 # 点数不符
+            {'shape_type': 'line', 'points': [[1, 1], [1, 1]]},                              # 相邻重复
+            {'shape_type': 'point', 'points': [[math.nan, 2]]},                              # NaN
+            {'shape_type': 'polygon', 'points': [[0, 0], [math.inf, 0], [1, 1]]},            # inf 不参与面积判断
+            {'shape_type': 'polygon', 'points': [[0, 0], ["x", 1], [1, 1]]},                 # 非数值
+            {'shape_type': 'ellipse', 'points': [[0, 0], [1, 1]]},                           # 未知类型
+            {'shape_type': 'polygon', 'points': []},
+            {'shape_type': 'linestrip', 'points': [[0, 0], [1, 0], [0, 0]]},                 # 非多边形不计首尾
+            {'shape_type': 'polygon', 'points': [[0, 0], [1, 0]]},
+        ]
+        self._assert_matches_per_shape(shapes)
+        self.assertEqual([index for index, *_issue in check_shape_structure(shapes[:1])], [])
+
+    def test_random_shapes(self):
+        rng = random.Random(20240607)
+        for _case in range(200):
+            self._assert_matches_per_shape([_random_shape(rng) for _ in range(rng.randint(1, 15))])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,10 @@
 import os
 import sys
 from openpyxl import Workbook
-from core.file_scanner import get_pairable_dirs, scan_leaf_dir, IMAGE_EXTENSIONS
+from core.cancellation import CancelToken, format_cancel_note, is_cancelled
+from core.file_scanner import iter_scan_leaf_dirs, IMAGE_EXTENSIONS
+from core.manifest import DatasetManifest, prepare_directory_index
+from core.progress import ProgressCallback
 
 
 def select_folder():
@@ -14,22 +17,32 @@ def select_folder():
     return folder_selected
 
 
-def run_count(root_folder: str):
+def run_count(
+    root_folder: str,
+    use_cache: bool = False,
+    progress: ProgressCallback | None = None,
+    cancel: CancelToken | None = None,
+    manifest: DatasetManifest | str | None = None,
+):
     """执行文件计数统计
     
     参数:
         root_folder: 根目录路径
+        use_cache: 是否使用持久化扫描缓存，仅重新列出有变化的目录；默认重新列出全部目录，
+            网络共享目录的 mtime 可能被客户端缓存，需要时由调用方开启
+        progress: 进度回调，扫描过程中定期接收 ScanProgress 事件
+        cancel: 取消令牌，在目录之间检查；取消后只输出已扫描目录的统计
+        manifest: 数据清单或清单文件路径，提供时按清单中的文件统计，不再遍历目录
     
     返回:
         (output_path, error, stats)
+        - stats['manifest']: 本次统计所用的清单，由目录遍历生成时不含 size 与 mtime
     """
     if not root_folder:
-        return None, "未选择文件夹"
+        return None, "未选择文件夹", {}
     
     if not os.path.isdir(root_folder):
-        return None, "文件夹路径无效"
-    
-    pairable_dirs = get_pairable_dirs(root_folder)
+        return None, "文件夹路径无效", {}
     
     total_folders = 0
     total_images_by_ext = {ext: 0 for ext in IMAGE_EXTENSIONS}
@@ -41,9 +54,16 @@ def run_count(root_folder: str):
     ws.title = "统计结果"
     ws.append(["序号", "文件夹路径", "jpg文件数", "jpeg文件数", "png文件数", "tif文件数", "tiff文件数", "json文件数", "文件配对成功数"])
     
-    for idx, fld in enumerate(pairable_dirs, 1):
-        result = scan_leaf_dir(fld)
-        
+    try:
+        index, manifest = prepare_directory_index(
+            manifest, root_folder, use_cache=use_cache, progress=progress, cancel=cancel,
+        )
+    except Exception as e:
+        return None, f"数据清单读取失败: {str(e)}", {}
+
+    scan_results = iter_scan_leaf_dirs(root_folder, index=index, cancel=cancel)
+    for idx, (fld, result) in enumerate(scan_results, 1):
+
         total_imgs = sum(result['image_counts'].values())
         if total_imgs > 0 or result['json_count'] > 0:
             ws.append([
@@ -62,6 +82,9 @@ def run_count(root_folder: str):
             total_json += result['json_count']
             total_matched += result['paired']
     
+    if is_cancelled(cancel):
+        ws.append(["-", format_cancel_note(cancel, total_folders)])
+
     output_path = os.path.join(root_folder, "文件计数统计结果.xlsx")
     wb.save(output_path)
     
@@ -69,7 +92,9 @@ def run_count(root_folder: str):
         "total_folders": total_folders,
         "total_images": total_images_by_ext,
         "total_json": total_json,
-        "total_matched": total_matched
+        "total_matched": total_matched,
+        "cancelled": is_cancelled(cancel),
+        "manifest": manifest,
     }
     
     return output_path, None, stats
@@ -0,0 +1,288 @@
+"""
+imageData 外置工具 (Image Data Externalizer)
+
+功能说明：
+- 递归扫描选定目录中的所有 Labelme JSON 文件
+- 清除模式：确认同目录下存在对应图片后，将内嵌的 base64 imageData 置为 null
+- 外置模式：确认图片存在后，将 imageData 原样移入 JSON 旁的附属文件，再置为 null
+- 还原模式：优先从附属文件还原 imageData，没有附属文件时由对应图片重新编码
+- 多线程并行处理，每个文件通过临时文件整体替换，中途失败不会留下半写的 JSON
+- 生成 xlsx 报告，统计每个文件及总计节省的字节数
+
+使用场景：
+- 压缩数据集体积，加快后续扫描、抽样复制与重叠检查结果的写出
+"""
+
+import base64
+import os
+import sys
+from pathlib import Path
+
+from openpyxl import Workbook
+
+from core.cancellation import CancelToken, format_cancel_note, is_cancelled
+from core.file_scanner import IMAGE_EXTENSIONS, TOOL_OUTPUT_EXCLUDES
+from core.labelme import read_labelme_image_data, read_labelme_shapes, write_bytes_atomic, write_labelme_image_data
+from core.manifest import DatasetManifest, prepare_manifest, resolve_manifest
+from core.pipeline import iter_read_ahead
+from core.progress import ProgressCallback, ProgressReporter
+
+
+MODE_STRIP = "strip"
+MODE_SIDECAR = "sidecar"
+MODE_RESTORE = "restore"
+
+MODE_NAMES = {
+    MODE_STRIP: "清除",
+    MODE_SIDECAR: "外置",
+    MODE_RESTORE: "还原",
+}
+
+# 附属文件名为 JSON 文件名加该后缀，如 IMG_1.json.imagedata，内容为原 base64 文本
+SIDECAR_SUFFIX = ".imagedata"
+
+REPORT_FILE_NAME = "imageData处理报告.xlsx"
+
+DEFAULT_WORKERS = 4
+
+STATUS_CHANGED = "已处理"
+STATUS_SKIPPED = "跳过"
+STATUS_FAILED = "失败"
+
+
+def get_sidecar_path(json_path: Path) -> Path:
+    """获取 JSON 对应的 imageData 附属文件路径。"""
+    return json_path.with_name(json_path.name + SIDECAR_SUFFIX)
+
+
+def _find_image_for_json(json_path: Path, image_path_field) -> Path | None:
+    """查找 JSON 对应的非空图片：优先使用 imagePath 字段，其次查找同名图片。"""
+    candidates = []
+    if isinstance(image_path_field, str) and image_path_field:
+        candidates.append(json_path.parent / image_path_field)
+    candidates.extend(json_path.with_suffix(ext) for ext in IMAGE_EXTENSIONS)
+    candidates.extend(json_path.with_suffix(ext.upper()) for ext in IMAGE_EXTENSIONS)
+
+    for candidate in candidates:
+        try:
+            if candidate.is_file() and candidate.stat().st_size > 0:
+                return candidate
+        except OSError:
+            continue
+    return None
+
+
+def _process_file(json_path: Path, mode: str) -> dict:
+    """处理单个 JSON，返回报告行数据。"""
+    row = {
+        "file": json_path,
+        "status": STATUS_SKIPPED,
+        "size_before": 0,
+        "size_after": 0,
+        "sidecar_bytes": 0,
+        "note": "",
+    }
+
+    try:
+        row["size_before"] = row["size_after"] = json_path.stat().st_size
+        image_data = read_labelme_image_data(json_path)
+        sidecar_path = get_sidecar_path(json_path)
+
+        if mode == MODE_RESTORE:
+            if image_data is not None:
+                row["note"] = "已包含 imageData"
+                return row
+
+            if sidecar_path.is_file():
+                restored = sidecar_path.read_bytes()
+                source_note = "由附属文件还原"
+            else:
+                image_path = _find_image_for_json(json_path, read_labelme_shapes(json_path).get('imagePath'))
+                if image_path is None:
+                    row["status"] = STATUS_FAILED
+                    row["note"] = "未找到附属文件或对应图片"
+                    return row
+                restored = base64.b64encode(image_path.read_bytes())
+                source_note = f"由图片 {image_path.name} 重新编码"
+
+            write_labelme_image_data(json_path, json_path, restored)
+            if sidecar_path.is_file():
+                sidecar_path.unlink()
+            row["note"] = source_note
+        else:
+            if image_data is None:
+                row["note"] = "不含 imageData"
+                return row
+
+            image_path = _find_image_for_json(json_path, read_labelme_shapes(json_path).get('imagePath'))
+            if image_path is None:
+                row["status"] = STATUS_FAILED
+                row["note"] = "未找到对应图片，保留 imageData"
+                return row
+
+            if mode == MODE_SIDECAR:
+                # 先落盘附属文件，再清除 JSON 中的数据，任一步失败都不会丢失 imageData
+                write_bytes_atomic(sidecar_path, image_data)
+                row["sidecar_bytes"] = len(image_data)
+                row["note"] = f"已移入 {sidecar_path.name}"
+            else:
+                row["note"] = f"对应图片 {image_path.name}"
+            write_labelme_image_data(json_path, json_path, None)
+
+        row["status"] = STATUS_CHANGED
+        row["size_after"] = json_path.stat().st_size
+    except Exception as e:
+        row["status"] = STATUS_FAILED
+        row["note"] = f"处理失败: {str(e)}"
+
+    return row
+
+
+def _write_report(report_path: Path, root_path: Path, mode: str, rows: list[dict], stats: dict, note: str = "") -> str:
+    workbook = Workbook()
+    worksheet = workbook.active
+    worksheet.title = f"imageData{MODE_NAMES[mode]}"
+    worksheet.append(["序号", "文件路径", "处理结果", "原大小(字节)", "新大小(字节)", "节省(字节)", "附属文件(字节)", "说明"])
+
+    for index, row in enumerate(rows, 1):
+        worksheet.append([
+            index,
+            os.path.relpath(row["file"], root_path),
+            row["status"],
+            row["size_before"],
+            row["size_after"],
+            row["size_before"] - row["size_after"],
+            row["sidecar_bytes"],
+            row["note"],
+        ])
+
+    worksheet.append([
+        "总计", "-", f"处理 {stats['changed_files']} 个",
+        stats["bytes_before"], stats["bytes_after"], stats["bytes_saved"], stats["sidecar_bytes"],
+        f"跳过 {stats['skipped_files']} 个，失败 {stats['failed_files']} 个",
+    ])
+    if note:
+        worksheet.append(["-", "-", "-", "-", "-", "-", "-", note])
+
+    workbook.save(report_path)
+    return str(report_path)
+
+
+def run_externalize(
+    target_dir: str,
+    mode: str = MODE_STRIP,
+    workers: int = DEFAULT_WORKERS,
+    progress: ProgressCallback | None = None,
+    cancel: CancelToken | None = None,
+    manifest: DatasetManifest | str | None = None,
+    since: DatasetManifest | str | None = None,
+) -> tuple[str | None, str | None, dict]:
+    """批量清除、外置或还原 Labelme JSON 中的 imageData。
+
+    参数:
+        target_dir: 数据文件夹路径
+        mode: MODE_STRIP / MODE_SIDECAR / MODE_RESTORE
+        workers: 并行处理的线程数
+        progress: 进度回调，扫描与处理阶段定期接收 ScanProgress 事件
+        cancel: 取消令牌，在提交文件之间检查；取消后等待已提交的文件完成，只为已处理的文件生成报告
+        manifest: 数据清单或清单文件路径，提供时只处理其中的 JSON，不再遍历目录
+        since: 上一次运行返回的清单或其清单文件路径，提供时逐个 stat 文件，只处理相对其新增或内容变化的 JSON
+
+    返回:
+        (report_path, error, stats)
+        - stats: {'total_files', 'unchanged_files', 'changed_files', 'skipped_files', 'failed_files',
+                  'bytes_before', 'bytes_after', 'bytes_saved', 'sidecar_bytes', 'cancelled', 'manifest'}
+          total_files 为本次需要处理的 JSON 数，unchanged_files 为相对 since 未变化而未处理的 JSON 数；
+          manifest 为完整的清单，有文件被改写或提供了 since 时记录了 size 与 mtime，可作为下一次运行的 since
+    """
+    if mode not in MODE_NAMES:
+        return None, f"不支持的处理模式: {mode}", {}
+
+    if not os.path.isdir(target_dir):
+        return None, "目标文件夹不存在或不是有效目录", {}
+
+    try:
+        previous = resolve_manifest(since, target_dir)
+        manifest = prepare_manifest(
+            manifest, target_dir, TOOL_OUTPUT_EXCLUDES, stat_files=previous is not None,
+            progress=progress, cancel=cancel,
+        )
+    except Exception as e:
+        return None, f"数据清单读取失败: {str(e)}", {}
+    all_json_files = manifest.json_paths()
+
+    if not all_json_files:
+        if is_cancelled(cancel):
+            return None, f"任务已中止（{cancel.reason}）", {}
+        return None, "目标文件夹内未找到 JSON 文件", {}
+
+    if previous is not None:
+        all_json_files = manifest.changed_since(previous).json_paths()
+    total_files = len(all_json_files)
+
+    rows = []
+    reporter = ProgressReporter(progress, f"{MODE_NAMES[mode]} imageData", total_files=total_files)
+
+    # 结果按扫描顺序取回；取消后不再提交新文件，已开始处理的文件全部计入报告
+    for _json_path, row, _error in iter_read_ahead(
+        all_json_files, lambda json_path: _process_file(json_path, mode), workers=workers, cancel=cancel,
+    ):
+        rows.append(row)
+        reporter.advance(files=1)
+    reporter.finish()
+
+    stats = {
+        'total_files': total_files,
+        'unchanged_files': len(manifest.json_paths()) - total_files,
+        'changed_files': sum(1 for row in rows if row["status"] == STATUS_CHANGED),
+        'skipped_files': sum(1 for row in rows if row["status"] == STATUS_SKIPPED),
+        'failed_files': sum(1 for row in rows if row["status"] == STATUS_FAILED),
+        'bytes_before': sum(row["size_before"] for row in rows),
+        'bytes_after': sum(row["size_after"] for row in rows),
+        'sidecar_bytes': sum(row["sidecar_bytes"] for row in rows),
+        'cancelled': is_cancelled(cancel),
+    }
+    stats['bytes_saved'] = stats['bytes_before'] - stats['bytes_after']
+    # 处理过程会改写 JSON，有文件被改写时返回重新 stat 后的清单
+    stats['manifest'] = manifest.refresh() if stats['changed_files'] else manifest
+
+    note = format_cancel_note(cancel, len(rows), total_files) if stats['cancelled'] else ""
+    report_path = _write_report(Path(target_dir) / REPORT_FILE_NAME, Path(target_dir), mode, rows, stats, note)
+    return report_path, None, stats
+
+
+def _format_bytes(size: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(size) < 1024 or unit == "GB":
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size} {unit}"
+        size /= 1024
+
+
+if __name__ == "__main__":
+    import tkinter as tk
+    from tkinter import filedialog
+
+    mode = sys.argv[1] if len(sys.argv) > 1 else MODE_STRIP
+    if mode not in MODE_NAMES:
+        print(f"用法: python -m tools.image_data_externalizer [{'|'.join(MODE_NAMES)}]")
+        sys.exit(1)
+
+    root = tk.Tk()
+    root.withdraw()
+    folder = filedialog.askdirectory(title=f"选择需要{MODE_NAMES[mode]} imageData 的文件夹")
+    if not folder:
+        print("未选择文件夹")
+        sys.exit(1)
+
+    report_path, error, stats = run_externalize(folder, mode)
+    if error:
+        print(f"错误: {error}")
+        sys.exit(1)
+
+    print(f"处理完成，报告已保存到: {report_path}")
+    print(f"JSON 文件: {stats['total_files']} 个，处理 {stats['changed_files']} 个，"
+          f"跳过 {stats['skipped_files']} 个，失败 {stats['failed_files']} 个")
+    print(f"JSON 总大小: {_format_bytes(stats['bytes_before'])} -> {_format_bytes(stats['bytes_after'])}，"
+          f"节省 {_format_bytes(stats['bytes_saved'])}")
+    if stats['sidecar_bytes']:
+        print(f"附属文件: {_format_bytes(stats['sidecar_bytes'])}")
@@ -13,12 +13,17 @@
 """
 
 import os
-import json
 import random
 import shutil
 from pathlib import Path
 
-from core.file_scanner import IMAGE_EXTENSIONS, scan_image_json_pairs
+from core.annotation_index import load_annotation_index
+from core.cancellation import CancelToken, is_cancelled
+from core.file_scanner import IMAGE_EXTENSIONS, TOOL_OUTPUT_EXCLUDES, DirectoryIndex, scan_image_json_pairs
+from core.labelme import LabelmeWriter, prefetch_labelme_shapes
+from core.manifest import DatasetManifest, resolve_manifest
+from core.pipeline import iter_read_ahead
+from core.progress import ProgressCallback
 
 
 def get_image_json_pairs(root_path: str) -> dict[str, list[tuple[str, str]]]:
@@ -30,8 +35,7 @@ def get_image_json_pairs(root_path: str) -> dict[str, list[tuple[str, str]]]:
     返回:
         文件夹路径到 (图片名, json名) 列表的映射
     """
-    exclude_dirs = ["照片检查+", "抽样结果", "重叠检查结果"]
-    return scan_image_json_pairs(root_path, exclude_dirs=exclude_dirs)
+    return scan_image_json_pairs(root_path, exclude_dirs=TOOL_OUTPUT_EXCLUDES)
 
 
 def dispersed_sample(folder_map: dict, target_count: int) -> list[tuple[str, tuple[str, str]]]:
@@ -69,19 +73,32 @@ def dispersed_sample(folder_map: dict, target_count: int) -> list[tuple[str, tup
     return selected_pairs
 
 
-def run_sampler(source_dir: str, output_dir: str, sample_count: int = 50) -> tuple[str | None, str | None, dict]:
+def run_sampler(
+    source_dir: str,
+    output_dir: str,
+    sample_count: int = 50,
+    progress: ProgressCallback | None = None,
+    cancel: CancelToken | None = None,
+    use_index: bool = True,
+    manifest: DatasetManifest | str | None = None,
+) -> tuple[str | None, str | None, dict]:
     """执行抽样逻辑
     
     参数:
         source_dir: 数据文件夹路径
         output_dir: 输出目录路径
         sample_count: 抽样数量
+        progress: 进度回调，扫描阶段定期接收 ScanProgress 事件
+        cancel: 取消令牌；扫描阶段取消时直接返回，复制阶段取消时保留已复制的样本
+        use_index: 是否从已有的标注索引读取样本的标签数，索引中没有或已过期的文件仍读取 JSON
+        manifest: 数据清单或清单文件路径，提供时只从其中的配对中抽样，不再遍历目录
     
     返回:
         (output_path, error, stats)
         - output_path: 输出目录路径，成功时返回
         - error: 错误信息，无错误返回 None
-        - stats: {'sampled': int, 'labels': int, 'total_found': int}
+        - stats: {'sampled': int, 'labels': int, 'total_found': int, 'cancelled': bool, 'manifest': DatasetManifest}
+          manifest 为本次抽样所用的清单，由目录遍历生成时不含 size 与 mtime
     """
     if not os.path.isdir(source_dir):
         return None, "数据文件夹不存在或不是有效目录", {}
@@ -89,8 +106,21 @@ def run_sampler(source_dir: str, output_dir: str, sample_count: int = 50) -> tup
     output_path = Path(output_dir).resolve()
     source_path = Path(source_dir).resolve()
 
-    exclude_dirs = [str(output_path), "照片检查+", "抽样结果", "重叠检查结果"]
-    folder_map = scan_image_json_pairs(source_dir, exclude_dirs=exclude_dirs)
+    try:
+        manifest = resolve_manifest(manifest, source_dir)
+    except Exception as e:
+        return None, f"数据清单读取失败: {str(e)}", {}
+
+    exclude_dirs = [str(output_path), *TOOL_OUTPUT_EXCLUDES]
+    if manifest is None:
+        index = DirectoryIndex.build(source_dir, exclude_dirs=exclude_dirs, progress=progress, cancel=cancel)
+        if is_cancelled(cancel):
+            return None, f"任务已中止（{cancel.reason}）", {}
+        manifest = DatasetManifest.from_directory_index(index)
+    else:
+        manifest = manifest.without_dir(output_path)
+        index = manifest.to_directory_index()
+    folder_map = scan_image_json_pairs(source_dir, exclude_dirs=exclude_dirs, index=index)
     total_found = sum(len(v) for v in folder_map.values())
 
     if total_found == 0:
@@ -99,28 +129,42 @@ def run_sampler(source_dir: str, output_dir: str, sample_count: int = 50) -> tup
     output_path.mkdir(parents=True, exist_ok=True)
 
     sampled_list = dispersed_sample(folder_map, sample_count)
+    annotation_index = load_annotation_index(source_dir) if use_index else None
+    shape_counts = annotation_index.shape_counts() if annotation_index is not None else None
     total_labels = 0
     copied_count = 0
+    # 样本集中在少数子目录中，目标目录只在首次用到时创建一次
+    writer = LabelmeWriter()
 
-    for root_path, (img_name, json_name) in sampled_list:
+    def copy_sample(sample):
+        """读取阶段：复制一对样本，返回索引中的标签数或预读的 JSON。"""
+        root_path, (img_name, json_name) = sample
         source_folder = Path(root_path).resolve()
         relative_folder = source_folder.relative_to(source_path)
         target_folder = output_path / relative_folder
-        target_folder.mkdir(parents=True, exist_ok=True)
+        writer.ensure_dir(target_folder)
 
-        image_src = source_folder / img_name
-        image_dst = target_folder / img_name
         json_src = source_folder / json_name
-        json_dst = target_folder / json_name
-
-        shutil.copy2(image_src, image_dst)
-        shutil.copy2(json_src, json_dst)
+        shutil.copy2(source_folder / img_name, target_folder / img_name)
+        shutil.copy2(json_src, target_folder / json_name)
+
+        file_id = annotation_index.current_file_id(str(json_src)) if annotation_index is not None else None
+        if file_id is not None:
+            return int(shape_counts[file_id]), None
+        return 0, prefetch_labelme_shapes(json_src)
+
+    # 取消后不再提交新的复制，已开始的复制全部计入结果
+    for _sample, result, error in iter_read_ahead(sampled_list, copy_sample, cancel=cancel):
+        if error is not None:
+            raise error
+        label_count, prefetched = result
         copied_count += 1
+        total_labels += label_count
+        if prefetched is None:
+            continue
 
         try:
-            with open(json_dst, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                total_labels += len(data.get('shapes', []))
+            total_labels += len(prefetched.parse().get('shapes', []))
         except Exception:
             pass
 
@@ -129,6 +173,8 @@ def run_sampler(source_dir: str, output_dir: str, sample_count: int = 50) -> tup
         'labels': total_labels,
         'total_found': total_found,
         'supported_formats': list(IMAGE_EXTENSIONS),
+        'cancelled': is_cancelled(cancel),
+        'manifest': manifest,
     }
 
     return str(output_path), None, stats
@@ -0,0 +1,626 @@
+"""
+标签审核工具 (Label Audit)
+
+功能说明：
+- 递归扫描选定目录中的所有 Labelme JSON 文件，每个文件只读取、解析一次
+- 同时得到三类结果：不在标签列表中的无效标签、按标签列表顺序的逐文件出现次数、
+  各标签按形状类型汇总的形状数与顶点数
+- 生成一个包含全部结果的 xlsx 报告，也可以分别写出标签校验与标签出现次数统计两份原有报告
+
+使用场景：
+- 交付前一次完成标签校验与标签统计，替代分别运行两个工具
+"""
+
+import os
+from array import array
+
+import numpy as np
+from openpyxl import Workbook
+
+from core.annotation_index import open_annotation_index
+from core.cancellation import CancelToken, format_cancel_note, is_cancelled
+from core.file_scanner import TOOL_OUTPUT_EXCLUDES
+from core.labelme import PrefetchedAnnotation, prefetch_labelme_shapes, read_labelme_shapes
+from core.manifest import DatasetManifest, prepare_manifest
+from core.pipeline import get_parse_processes, iter_process_chunks, iter_read_ahead
+from core.progress import ProgressCallback, ProgressReporter
+from tools.region_submission_counter import (
+    REGION_RECORDS,
+    _extract_submission_and_region,
+    _resolve_region,
+    _submission_sort_key,
+)
+
+
+REPORT_FILE_NAME = "标签审核报告.xlsx"
+VALIDATOR_REPORT_FILE_NAME = "标签校验报告.xlsx"
+COUNTER_REPORT_FILE_NAME = "标签出现次数统计报告.xlsx"
+
+UNKNOWN_SUBMISSION = "未识别提交批次"
+UNKNOWN_REGION = "未识别行政区"
+
+# 行政区汇总表按映射表顺序排列，未识别的排在最后
+REGION_ORDER = {record["code"]: i for i, record in enumerate(REGION_RECORDS)}
+
+
+def _vertex_count(points) -> int:
+    """形状的顶点数，与标注索引一致：points 无法转换为 (N, 2) 坐标时记为 0。"""
+    try:
+        array = np.asarray(points, dtype=np.float64)
+    except (TypeError, ValueError):
+        return 0
+    if array.ndim != 2 or array.shape[1] != 2:
+        return 0
+    return len(array)
+
+
+def _merge_shape_stats(target: dict, key: tuple[str, str], count: int, total: int, minimum: int, maximum: int) -> None:
+    current = target.get(key)
+    if current is None:
+        target[key] = [count, total, minimum, maximum]
+        return
+    current[0] += count
+    current[1] += total
+    current[2] = min(current[2], minimum)
+    current[3] = max(current[3], maximum)
+
+
+def _audit_shapes(
+    shapes: list, valid_labels: set[str] | None, label_positions: dict[str, int], with_shape_stats: bool = True,
+) -> tuple[list[str], tuple[np.ndarray, np.ndarray], dict]:
+    """统计单个文件的全部 shapes，返回 (无效标签, 各标签次数, 形状统计)；shape 结构错误时抛出异常。
+
+    无效标签去重后按首次出现顺序排列，串行与多进程审核得到的报告行顺序一致。
+    各标签次数为稀疏的 (列位置, 次数) 两个 int32 向量，只含出现过的标签，开销与标签列表长度无关。
+    """
+    positions = []
+    file_invalid = {}
+    file_stats = {}
+    for shape in shapes:
+        label = str(shape.get('label', '')).strip()
+        position = label_positions.get(label)
+        if position is not None:
+            positions.append(position)
+        if valid_labels is not None and label and label not in valid_labels:
+            file_invalid[label] = None
+
+        if with_shape_stats:
+            shape_type = shape.get('shape_type')
+            vertices = _vertex_count(shape.get('points', []))
+            key = (label, "" if shape_type is None else str(shape_type))
+            _merge_shape_stats(file_stats, key, 1, vertices, vertices, vertices)
+
+    columns, counts = np.unique(np.asarray(positions, dtype=np.int32), return_counts=True)
+    return list(file_invalid), (columns, counts.astype(np.int32)), file_stats
+
+
+def _audit_prefetched(prefetched: PrefetchedAnnotation, options: tuple) -> tuple:
+    """解析预读的 JSON 并审核，返回 (读取错误信息, 无效标签, 各标签次数, 形状统计)。
+
+    options 为 (有效标签集合, 标签位置, 是否统计形状)，读取失败时各标签次数为 None。
+    """
+    try:
+        shapes = prefetched.parse().get('shapes', [])
+        return (None, *_audit_shapes(shapes, *options))
+    except Exception as e:
+        return str(e), [], None, {}
+
+
+# 子进程内各块共享的只读审核参数，由 _init_audit_worker 在进程启动时设置一次
+_worker_options: tuple | None = None
+
+
+def _init_audit_worker(valid_labels: frozenset[str] | None, ordered_labels: tuple[str, ...], with_shape_stats: bool) -> None:
+    global _worker_options
+    # 标签到位置的映射在每个进程中只建立一次，各块直接复用
+    _worker_options = (valid_labels, {label: i for i, label in enumerate(ordered_labels)}, with_shape_stats)
+
+
+def _audit_file_chunk(json_paths: list[str]) -> list[tuple]:
+    """在子进程中逐个读取并审核一块文件，返回值与 _audit_prefetched 一致。"""
+    outcomes = []
+    for json_path in json_paths:
+        try:
+            shapes = read_labelme_shapes(json_path).get('shapes', [])
+            outcomes.append((None, *_audit_shapes(shapes, *_worker_options)))
+        except Exception as e:
+            outcomes.append((str(e), [], None, {}))
+    return outcomes
+
+
+class SparseLabelCounts:
+    """文件 × 标签的稀疏计数矩阵（CSR 形式），只保存非零项。
+
+    属性:
+        paths: 各行对应的相对路径
+        labels: 各列对应的标签，顺序与 ordered_labels 一致
+        offsets: int64 (行数 + 1,)，第 i 行的非零项为 columns/counts[offsets[i]:offsets[i + 1]]
+        columns: int32，非零项所在列
+        counts: int32，非零项的次数
+    """
+
+    def __init__(self, paths: list[str], labels: list[str], offsets: np.ndarray, columns: np.ndarray, counts: np.ndarray):
+        self.paths = paths
+        self.labels = labels
+        self.offsets = offsets
+        self.columns = columns
+        self.counts = counts
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def dense_row(self, row: int) -> np.ndarray:
+        """第 row 行的完整计数向量，int32 (标签数,)。"""
+        values = np.zeros(len(self.labels), dtype=np.int32)
+        start, end = self.offsets[row], self.offsets[row + 1]
+        values[self.columns[start:end]] = self.counts[start:end]
+        return values
+
+    def label_totals(self) -> tuple[np.ndarray, np.ndarray]:
+        """各标签的出现总次数与出现过该标签的文件数，均为 int64 (标签数,)。"""
+        totals = np.bincount(self.columns, weights=self.counts, minlength=len(self.labels)).astype(np.int64)
+        file_counts = np.bincount(self.columns, minlength=len(self.labels)).astype(np.int64)
+        return totals, file_counts
+
+    def group_sums(self, row_groups: np.ndarray, group_count: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """按行分组求和，结果仍为稀疏形式。
+
+        参数:
+            row_groups: 每行所属的分组编号，int64 (行数,)
+            group_count: 分组数
+
+        返回:
+            (groups, columns, sums) - 按 (分组, 列) 升序排列的非零项
+        """
+        entry_groups = np.repeat(np.asarray(row_groups, dtype=np.int64), np.diff(self.offsets))
+        label_total = max(len(self.labels), 1)
+        keys, inverse = np.unique(entry_groups * label_total + self.columns, return_inverse=True)
+        sums = np.bincount(inverse, weights=self.counts).astype(np.int64)
+        groups, columns = np.divmod(keys, label_total)
+        return groups, columns, sums
+
+
+class LabelAuditResult:
+    """单次遍历得到的审核结果，文件均以相对根目录的路径记录，顺序与处理顺序一致。
+
+    属性:
+        target_dir: 审核的根目录
+        total_files: 待审核的 JSON 文件总数
+        processed_files: 实际处理的文件数（取消时少于总数）
+        read_errors: [(相对路径, 错误信息)]
+        invalid_labels: [(相对路径, 无效标签)]，未提供有效标签集合时为空
+        count_paths: 记录了标签计数的文件（读取成功的文件），计数见 count_matrix()
+        shape_stats: {(标签, 形状类型): [形状数, 顶点总数, 最少顶点数, 最多顶点数]}，未统计形状时为空
+        manifest: 本次审核所用的清单
+    """
+
+    def __init__(
+        self, target_dir: str, total_files: int, valid_labels: set[str] | None, ordered_labels: list[str], manifest,
+        with_shape_stats: bool = True,
+    ):
+        self.target_dir = target_dir
+        self.total_files = total_files
+        self.valid_labels = valid_labels
+        self.ordered_labels = ordered_labels
+        self.with_shape_stats = with_shape_stats
+        self.manifest = manifest
+        self.processed_files = 0
+        self.read_errors: list[tuple[str, str]] = []
+        self.invalid_labels: list[tuple[str, str]] = []
+        self.count_paths: list[str] = []
+        self.shape_stats: dict[tuple[str, str], list[int]] = {}
+        # 非零计数按文件顺序追加到紧凑的 int32/int64 数组中，百万级文件也只占用与非零项数相当的内存
+        self._count_offsets = array('q', [0])
+        self._count_columns = array('i')
+        self._count_values = array('i')
+
+    def invalid_files(self) -> set[str]:
+        """含无效标签或读取失败的文件。"""
+        return {rel_path for rel_path, _label in self.invalid_labels} | {rel_path for rel_path, _error in self.read_errors}
+
+    def add_counts(self, rel_path: str, columns: np.ndarray, counts: np.ndarray) -> None:
+        """追加单个文件的稀疏标签计数。"""
+        self.count_paths.append(rel_path)
+        self._count_columns.frombytes(np.ascontiguousarray(columns, dtype=np.int32).tobytes())
+        self._count_values.frombytes(np.ascontiguousarray(counts, dtype=np.int32).tobytes())
+        self._count_offsets.append(len(self._count_columns))
+
+    def add_outcome(self, rel_path: str, outcome: tuple) -> None:
+        """累加单个文件的审核结果 (读取错误信息, 无效标签, 各标签次数, 形状统计)。"""
+        read_error, file_invalid, row_counts, file_stats = outcome
+        if read_error is not None:
+            self.read_errors.append((rel_path, read_error))
+            return
+        self.add_counts(rel_path, *row_counts)
+        self.invalid_labels.extend((rel_path, label) for label in file_invalid)
+        for key, values in file_stats.items():
+            _merge_shape_stats(self.shape_stats, key, *values)
+
+    def count_matrix(self) -> SparseLabelCounts:
+        """读取成功的文件 × ordered_labels 的稀疏计数矩阵。"""
+        return SparseLabelCounts(
+            self.count_paths,
+            self.ordered_labels,
+            np.frombuffer(self._count_offsets, dtype=np.int64).copy(),
+            np.frombuffer(self._count_columns, dtype=np.int32).copy(),
+            np.frombuffer(self._count_values, dtype=np.int32).copy(),
+        )
+
+
+def audit_labels(
+    target_dir: str,
+    valid_labels: set[str] | None = None,
+    ordered_labels: list[str] | None = None,
+    progress: ProgressCallback | None = None,
+    cancel: CancelToken | None = None,
+    use_index: bool = True,
+    manifest: DatasetManifest | str | None = None,
+    processes: int | None = None,
+    chunk_size: int | None = None,
+    with_shape_stats: bool = True,
+) -> tuple[LabelAuditResult | None, str | None]:
+    """遍历一次目录，同时完成标签校验、标签计数与形状统计。
+
+    参数:
+        target_dir: 要审核的文件夹路径
+        valid_labels: 有效标签集合，为空时不做标签校验
+        ordered_labels: 需要逐文件计数的标签列表，保留原始顺序，为空时不计数
+        progress: 进度回调，扫描与审核阶段定期接收 ScanProgress 事件
+        cancel: 取消令牌，在文件之间检查；取消后结果只包含已处理的文件
+        use_index: 是否使用持久化标注索引，仅重新解析有变化的 JSON
+        manifest: 数据清单或清单文件路径，提供时只审核其中的 JSON，不再遍历目录
+        processes: 解析 JSON 所用的进程数，为空时使用 set_parse_processes 设置的默认值；
+            大于 1 时更新索引与解析不在索引中的文件都按块分发到进程池，结果按文件顺序合并，与串行结果一致
+        chunk_size: 多进程时每块的文件数，为空时使用 DEFAULT_CHUNK_SIZE
+        with_shape_stats: 是否统计各标签的形状类型与顶点数，只需校验或计数时可关闭
+
+    返回:
+        (审核结果, 错误信息) - 成功时 error 为 None
+    """
+    if not os.path.isdir(target_dir):
+        return None, "目标文件夹不存在或不是有效目录"
+
+    ordered_labels = list(ordered_labels or [])
+    partial = manifest is not None
+    try:
+        manifest = prepare_manifest(manifest, target_dir, TOOL_OUTPUT_EXCLUDES, progress=progress, cancel=cancel)
+    except Exception as e:
+        return None, f"数据清单读取失败: {str(e)}"
+    all_json_files = manifest.json_paths()
+
+    total_files = len(all_json_files)
+    if total_files == 0:
+        if is_cancelled(cancel):
+            return None, f"任务已中止（{cancel.reason}）"
+        return None, "目标文件夹内未找到 JSON 文件"
+
+    result = LabelAuditResult(target_dir, total_files, valid_labels, ordered_labels, manifest, with_shape_stats)
+    options = (valid_labels, {label: i for i, label in enumerate(ordered_labels)}, with_shape_stats)
+
+    annotation_index = None
+    invalid_by_file = {}
+    count_rows = None
+    indexed_ids = []
+    if use_index:
+        annotation_index = open_annotation_index(
+            target_dir, all_json_files, progress=progress, cancel=cancel, prune=not partial,
+            processes=processes, chunk_size=chunk_size,
+        )
+        if valid_labels is not None:
+            invalid_by_file = annotation_index.invalid_labels(valid_labels)
+        count_rows = annotation_index.label_count_rows(ordered_labels)
+
+    # 不在索引中的文件需要解析，结果与文件列表同序，主循环遇到这些文件时依次取用
+    unindexed_files = [
+        file_path for file_path in all_json_files
+        if annotation_index is None or annotation_index.file_id(file_path) is None
+    ]
+    if unindexed_files and (get_parse_processes() if processes is None else processes) > 1:
+        outcomes = iter_process_chunks(
+            unindexed_files, _audit_file_chunk, processes=processes, chunk_size=chunk_size, cancel=cancel,
+            initializer=_init_audit_worker,
+            initargs=(None if valid_labels is None else frozenset(valid_labels), tuple(ordered_labels), with_shape_stats),
+        )
+    else:
+        outcomes = (
+            (file_path, _audit_prefetched(prefetched, options), None)
+            for file_path, prefetched, _error in iter_read_ahead(unindexed_files, prefetch_labelme_shapes, cancel=cancel)
+        )
+
+    reporter = ProgressReporter(progress, "审核文件", total_files=total_files)
+    try:
+        for file_path in all_json_files:
+            if is_cancelled(cancel):
+                break
+            rel_path = os.path.relpath(file_path, target_dir)
+            file_id = None if annotation_index is None else annotation_index.file_id(file_path)
+
+            if file_id is None:
+                _file_path, outcome, chunk_error = next(outcomes, (None, None, None))
+                if _file_path is None:
+                    break
+                if chunk_error is not None:
+                    outcome = (str(chunk_error), [], None, {})
+                result.add_outcome(rel_path, outcome)
+            else:
+                read_error = annotation_index.file_error(file_id)
+                if read_error is not None:
+                    result.read_errors.append((rel_path, read_error))
+                else:
+                    offsets, columns, counts = count_rows
+                    start, end = offsets[file_id], offsets[file_id + 1]
+                    result.add_counts(rel_path, columns[start:end], counts[start:end])
+                    result.invalid_labels.extend((rel_path, label) for label in invalid_by_file.get(file_id, ()))
+                    indexed_ids.append(file_id)
+            reporter.advance(files=1)
+            result.processed_files += 1
+    finally:
+        outcomes.close()
+    reporter.finish()
+
+    # 索引中的文件按整列一次汇总形状统计
+    if indexed_ids and with_shape_stats:
+        for key, values in annotation_index.label_shape_stats(np.asarray(indexed_ids)).items():
+            _merge_shape_stats(result.shape_stats, key, *values)
+
+    return result, None
+
+
+def write_invalid_label_sheet(worksheet, result: LabelAuditResult, cancel: CancelToken | None = None) -> int:
+    """写出标签校验结果表，格式同标签校验报告，返回错误条目数。"""
+    error_list = [[rel_path, "", f"文件读取失败: {error}"] for rel_path, error in result.read_errors]
+    error_list.extend([rel_path, label, "不在标签列表中"] for rel_path, label in result.invalid_labels)
+
+    worksheet.append(["序号", "文件路径", "无效标签", "错误类型"])
+    for idx, (file_path, label, error_type) in enumerate(error_list, 1):
+        worksheet.append([idx, file_path, label, error_type])
+
+    if not error_list:
+        worksheet.append([1, "-", "-", "未发现错误"])
+
+    if is_cancelled(cancel):
+        worksheet.append(["-", "-", "-", format_cancel_note(cancel, result.processed_files, result.total_files)])
+    return len(error_list)
+
+
+def _group_rows(keys: list, order_key=None) -> tuple[np.ndarray, list]:
+    """将每行的分组键映射为分组编号，返回 (int64 分组编号, 排好序的分组键列表)。"""
+    unique_keys = list(dict.fromkeys(keys))
+    if order_key is not None:
+        unique_keys.sort(key=order_key)
+    positions = {key: i for i, key in enumerate(unique_keys)}
+    return np.array([positions[key] for key in keys], dtype=np.int64), unique_keys
+
+
+def _write_group_sheet(worksheet, headers: list[str], group_keys: list, row_groups: np.ndarray, matrix: SparseLabelCounts) -> None:
+    """写出按分组汇总的宽表，只保留至少出现过一次的标签列，列顺序与标签列表一致。"""
+    groups, columns, sums = matrix.group_sums(row_groups, len(group_keys))
+    active_columns = np.unique(columns)
+    positions = np.full(max(len(matrix.labels), 1), -1, dtype=np.int64)
+    positions[active_columns] = np.arange(len(active_columns))
+    starts = np.searchsorted(groups, np.arange(len(group_keys) + 1))
+    file_counts = np.bincount(row_groups, minlength=len(group_keys))
+
+    worksheet.append([*headers, "文件数", "合计", *[matrix.labels[column] for column in active_columns]])
+    for group, key in enumerate(group_keys):
+        start, end = starts[group], starts[group + 1]
+        values = np.zeros(len(active_columns), dtype=np.int64)
+        values[positions[columns[start:end]]] = sums[start:end]
+        worksheet.append([*key, int(file_counts[group]), int(values.sum()), *values.tolist()])
+
+
+def _submission_region_keys(result: LabelAuditResult, rel_dirs: list[str]) -> tuple[dict, dict]:
+    """按目录解析所属提交批次与行政区，返回 {相对目录: 提交批次} 与 {相对目录: (代码, 行政区)}。"""
+    submissions = {}
+    regions = {}
+    for rel_dir in rel_dirs:
+        submission_name, region_dir_name = _extract_submission_and_region(
+            result.target_dir, os.path.join(result.target_dir, rel_dir),
+        )
+        submissions[rel_dir] = submission_name or UNKNOWN_SUBMISSION
+        region = _resolve_region(region_dir_name) if region_dir_name else None
+        regions[rel_dir] = (region["code"], region["name"]) if region else ("-", UNKNOWN_REGION)
+    return submissions, regions
+
+
+def write_label_summary_sheets(workbook, result: LabelAuditResult, matrix: SparseLabelCounts | None = None) -> None:
+    """由稀疏计数矩阵向量化汇总，写出按目录、按提交批次、按行政区与总计四张表。"""
+    if matrix is None:
+        matrix = result.count_matrix()
+
+    rel_dirs = [os.path.dirname(rel_path) or "." for rel_path in matrix.paths]
+    dir_groups, dir_keys = _group_rows(rel_dirs)
+    _write_group_sheet(workbook.create_sheet("按目录汇总"), ["目录"], [(key,) for key in dir_keys], dir_groups, matrix)
+
+    submissions, regions = _submission_region_keys(result, dir_keys)
+    submission_groups, submission_keys = _group_rows(
+        [submissions[rel_dir] for rel_dir in rel_dirs], order_key=_submission_sort_key,
+    )
+    _write_group_sheet(
+        workbook.create_sheet("按提交汇总"), ["提交批次"], [(key,) for key in submission_keys], submission_groups, matrix,
+    )
+
+    region_groups, region_keys = _group_rows(
+        [regions[rel_dir] for rel_dir in rel_dirs],
+        order_key=lambda key: (REGION_ORDER.get(key[0], len(REGION_ORDER)), key[1]),
+    )
+    _write_group_sheet(workbook.create_sheet("按行政区汇总"), ["行政区代码", "行政区"], region_keys, region_groups, matrix)
+
+    totals, file_counts = matrix.label_totals()
+    total_ws = workbook.create_sheet("总计")
+    total_ws.append(["标签", "出现次数", "出现文件数"])
+    for label, total, file_count in zip(matrix.labels, totals.tolist(), file_counts.tolist()):
+        total_ws.append([label, total, file_count])
+    total_ws.append(["合计", int(totals.sum()), len(matrix)])
+
+
+def write_label_count_sheets(
+    workbook,
+    worksheet,
+    result: LabelAuditResult,
+    cancel: CancelToken | None = None,
+    per_file: bool = True,
+    summaries: bool = True,
+) -> None:
+    """写出标签计数结果，读取失败的文件另写“异常文件”表。
+
+    参数:
+        workbook: 目标工作簿
+        worksheet: 主表；per_file 为 True 时写出逐文件计数，格式同标签出现次数统计报告
+        result: 审核结果
+        cancel: 取消令牌，取消时在主表末尾写出说明
+        per_file: 是否写出逐文件计数表
+        summaries: 是否写出按目录、按提交批次、按行政区与总计的汇总表
+    """
+    matrix = result.count_matrix()
+    if per_file:
+        worksheet.append(["序号", "文件路径", *result.ordered_labels])
+        for row in range(len(matrix)):
+            worksheet.append([row + 1, matrix.paths[row], *matrix.dense_row(row).tolist()])
+
+    if summaries:
+        write_label_summary_sheets(workbook, result, matrix)
+        if not per_file:
+            # 不写逐文件表时以总计表作为主表
+            workbook.remove(worksheet)
+            worksheet = workbook["总计"]
+            workbook.move_sheet(worksheet, offset=-workbook.index(worksheet))
+            workbook.active = 0
+
+    if result.read_errors:
+        error_ws = workbook.create_sheet(title="异常文件")
+        error_ws.append(["序号", "文件路径", "错误信息"])
+        for index, (rel_path, error) in enumerate(result.read_errors, 1):
+            error_ws.append([index, rel_path, f"文件读取/解析失败: {error}"])
+
+    if is_cancelled(cancel):
+        worksheet.append(["-", format_cancel_note(cancel, result.processed_files, result.total_files)])
+
+
+def write_shape_stats_sheet(worksheet, result: LabelAuditResult) -> None:
+    """写出各标签按形状类型汇总的形状数与顶点数。"""
+    worksheet.append(["标签", "形状类型", "形状数", "顶点总数", "平均顶点数", "最少顶点数", "最多顶点数"])
+    for (label, shape_type), (count, total, minimum, maximum) in sorted(result.shape_stats.items()):
+        worksheet.append([label, shape_type, count, total, round(total / count, 2), minimum, maximum])
+
+
+def run_label_audit(
+    target_dir: str,
+    valid_labels: set[str] | None = None,
+    ordered_labels: list[str] | None = None,
+    progress: ProgressCallback | None = None,
+    cancel: CancelToken | None = None,
+    use_index: bool = True,
+    manifest: DatasetManifest | str | None = None,
+    separate_reports: bool = False,
+    processes: int | None = None,
+    chunk_size: int | None = None,
+) -> tuple[str | None, str | None, dict]:
+    """一次遍历完成标签校验、标签出现次数统计与形状统计。
+
+    参数:
+        target_dir: 要审核的文件夹路径
+        valid_labels: 有效标签集合，为空时不做标签校验
+        ordered_labels: 需要逐文件计数的标签列表，为空时不计数
+        progress: 进度回调
+        cancel: 取消令牌，取消后只为已处理的文件生成报告
+        use_index: 是否使用持久化标注索引
+        manifest: 数据清单或清单文件路径，提供时不再遍历目录
+        separate_reports: 为 True 时分别写出标签校验报告与标签出现次数统计报告，
+            否则写出包含全部结果的标签审核报告
+        processes: 解析 JSON 的进程数，为空时使用 set_parse_processes 设置的默认值
+        chunk_size: 多进程时每块的文件数
+
+    返回:
+        (output_path, error, stats)
+        - output_path: 报告路径；分别写出时为标签校验报告路径，两份报告路径另见 stats['report_paths']
+        - stats: {'total_files', 'checked_files', 'error_count', 'error_item_count', 'valid_count',
+                  'label_count', 'shape_group_count', 'report_paths', 'cancelled', 'manifest'}
+    """
+    if not valid_labels and not ordered_labels:
+        return None, "标签列表不能为空", {}
+
+    result, error = audit_labels(
+        target_dir, valid_labels or None, ordered_labels, progress=progress, cancel=cancel,
+        use_index=use_index, manifest=manifest, processes=processes, chunk_size=chunk_size,
+    )
+    if error:
+        return None, error, {}
+
+    report_paths = []
+    if separate_reports:
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "检查报告"
+        error_item_count = write_invalid_label_sheet(ws, result, cancel)
+        report_paths.append(os.path.join(target_dir, VALIDATOR_REPORT_FILE_NAME))
+        wb.save(report_paths[-1])
+
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "统计报告"
+        write_label_count_sheets(wb, ws, result, cancel)
+        report_paths.append(os.path.join(target_dir, COUNTER_REPORT_FILE_NAME))
+        wb.save(report_paths[-1])
+    else:
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "检查报告"
+        error_item_count = write_invalid_label_sheet(ws, result, cancel)
+        write_label_count_sheets(wb, wb.create_sheet("统计报告"), result, cancel)
+        write_shape_stats_sheet(wb.create_sheet("形状统计"), result)
+        report_paths.append(os.path.join(target_dir, REPORT_FILE_NAME))
+        wb.save(report_paths[-1])
+
+    invalid_files = result.invalid_files()
+    stats = {
+        'total_files': result.total_files,
+        'checked_files': result.processed_files,
+        'error_count': len(invalid_files),
+        'error_item_count': error_item_count,
+        'valid_count': result.processed_files - len(invalid_files),
+        'label_count': len(result.ordered_labels),
+        'shape_group_count': len(result.shape_stats),
+        'report_paths': report_paths,
+        'cancelled': is_cancelled(cancel),
+        'manifest': result.manifest,
+    }
+    return report_paths[0], None, stats
+
+
+if __name__ == "__main__":
+    import sys
+    import tkinter as tk
+    from tkinter import filedialog
+
+    from tools.label_counter import load_ordered_labels
+
+    root = tk.Tk()
+    root.withdraw()
+
+    target_dir = filedialog.askdirectory(title="选择 Labelme JSON 所在文件夹")
+    if not target_dir:
+        print("未选择文件夹")
+        sys.exit(1)
+
+    dict_file = filedialog.askopenfilename(
+        title="选择标签文件",
+        filetypes=[("标签文件", "*.csv *.txt *.xlsx *.xls")]
+    )
+    if not dict_file:
+        print("未选择标签文件")
+        sys.exit(1)
+
+    labels, load_error = load_ordered_labels(dict_file)
+    if load_error:
+        print(f"错误: {load_error}")
+        sys.exit(1)
+
+    output_path, error, stats = run_label_audit(target_dir, set(labels), labels)
+    if error:
+        print(f"错误: {error}")
+        sys.exit(1)
+
+    print(f"审核完成，报告已保存到: {output_path}")
+    print(f"JSON 文件: {stats['checked_files']} 个，存在问题 {stats['error_count']} 个，"
+          f"标签形状组合 {stats['shape_group_count']} 种")
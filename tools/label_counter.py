@@ -8,12 +8,15 @@
 """
 
 import csv
-import json
 import os
 
 from openpyxl import Workbook
 
-from core.file_scanner import scan_json_files
+from core.cancellation import CancelToken, is_cancelled
+from core.label_dictionary import load_excel_labels
+from core.manifest import DatasetManifest
+from core.progress import ProgressCallback
+from tools.label_audit import COUNTER_REPORT_FILE_NAME, audit_labels, write_label_count_sheets
 
 
 MANUAL_LABEL_SEPARATORS = (',', '，', ';', '；', '\n', '\r')
@@ -105,40 +108,42 @@ def _load_ordered_txt(file_path: str) -> list[str]:
 
 
 def _load_ordered_excel(file_path: str) -> list[str]:
-    """加载 Excel 标签文件并保留顺序。"""
-    try:
-        import openpyxl
-    except ImportError:
-        raise ImportError("需要安装 openpyxl 库来读取 Excel 文件")
-
-    labels = []
-    wb = openpyxl.load_workbook(file_path, data_only=True)
-    ws = wb.active
-
-    header = None
-    for row in ws.iter_rows(values_only=True):
-        if header is None:
-            header = row[0]
-            if str(header).strip().lower() != 'label':
-                raise ValueError("Excel 文件第一列列名必须为 'label'")
-            continue
-
-        if row[0] is not None and str(row[0]).strip():
-            labels.append(str(row[0]).strip())
-
-    wb.close()
-    return _deduplicate_labels(labels)
-
-
-def run_label_counter(target_dir: str, ordered_labels: list[str]) -> tuple[str | None, str | None, dict]:
+    """加载 Excel 标签文件并保留顺序，只读流式读取并按文件哈希缓存解析结果。"""
+    return load_excel_labels(file_path)
+
+
+def run_label_counter(
+    target_dir: str,
+    ordered_labels: list[str],
+    progress: ProgressCallback | None = None,
+    cancel: CancelToken | None = None,
+    use_index: bool = True,
+    manifest: DatasetManifest | str | None = None,
+    processes: int | None = None,
+    chunk_size: int | None = None,
+    per_file_sheet: bool = True,
+    summary_sheets: bool = True,
+) -> tuple[str | None, str | None, dict]:
     """执行标签出现次数统计。
 
     参数:
         target_dir: 要统计的文件夹路径
         ordered_labels: 标签列表，保留原始顺序
+        progress: 进度回调，扫描与统计阶段定期接收 ScanProgress 事件
+        cancel: 取消令牌，在文件之间检查；取消后只为已统计的文件生成报告
+        use_index: 是否使用持久化标注索引，仅重新解析有变化的 JSON
+        manifest: 数据清单或清单文件路径，提供时只统计其中的 JSON，不再遍历目录
+        processes: 解析 JSON 的进程数，为空时使用 set_parse_processes 设置的默认值；
+            大于 1 时更新标注索引与解析不在索引中的文件都按块分发到进程池，
+            后者由各进程返回 int32 计数向量，均按文件顺序合并，报告与串行统计一致
+        chunk_size: 多进程时每块的文件数，为空时使用 DEFAULT_CHUNK_SIZE
+        per_file_sheet: 是否写出逐文件计数表（“统计报告”）
+        summary_sheets: 是否写出按目录、按提交批次、按行政区与总计的汇总表，
+            只需汇总时可关闭 per_file_sheet，避免写出以文件数为行数的大表
 
     返回:
         (output_path, error, stats)
+        - stats['manifest']: 本次统计所用的清单
     """
     if not os.path.isdir(target_dir):
         return None, "目标文件夹不存在或不是有效目录", {}
@@ -146,56 +151,32 @@ def run_label_counter(target_dir: str, ordered_labels: list[str]) -> tuple[str |
     if not ordered_labels:
         return None, "标签列表不能为空", {}
 
-    exclude_dirs = ["重叠检查结果", "抽样结果", "照片检查+"]
-    all_json_files = list(scan_json_files(target_dir, exclude_dirs=exclude_dirs))
-
-    total_files = len(all_json_files)
-    if total_files == 0:
-        return None, "目标文件夹内未找到 JSON 文件", {}
-
-    label_set = set(ordered_labels)
-    report_rows = []
-    error_list = []
-
-    for file_path in all_json_files:
-        rel_path = os.path.relpath(file_path, target_dir)
-        row_counts = {label: 0 for label in ordered_labels}
+    if not per_file_sheet and not summary_sheets:
+        return None, "至少需要输出逐文件统计或汇总统计中的一项", {}
 
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-
-            for shape in data.get('shapes', []):
-                label = str(shape.get('label', '')).strip()
-                if label in label_set:
-                    row_counts[label] += 1
-
-            report_rows.append((rel_path, row_counts))
-        except Exception as e:
-            error_list.append([rel_path, f"文件读取/解析失败: {str(e)}"])
+    result, error = audit_labels(
+        target_dir, ordered_labels=ordered_labels, progress=progress, cancel=cancel,
+        use_index=use_index, manifest=manifest, processes=processes, chunk_size=chunk_size,
+        with_shape_stats=False,
+    )
+    if error:
+        return None, error, {}
 
     wb = Workbook()
     ws = wb.active
     ws.title = "统计报告"
-    ws.append(["序号", "文件路径", *ordered_labels])
-
-    for index, (rel_path, row_counts) in enumerate(report_rows, 1):
-        ws.append([index, rel_path, *[row_counts[label] for label in ordered_labels]])
-
-    if error_list:
-        error_ws = wb.create_sheet(title="异常文件")
-        error_ws.append(["序号", "文件路径", "错误信息"])
-        for index, (rel_path, error_message) in enumerate(error_list, 1):
-            error_ws.append([index, rel_path, error_message])
+    write_label_count_sheets(wb, ws, result, cancel, per_file=per_file_sheet, summaries=summary_sheets)
 
-    output_path = os.path.join(target_dir, "标签出现次数统计报告.xlsx")
+    output_path = os.path.join(target_dir, COUNTER_REPORT_FILE_NAME)
     wb.save(output_path)
 
     stats = {
-        'total_files': total_files,
-        'success_files': len(report_rows),
-        'error_files': len(error_list),
+        'total_files': result.total_files,
+        'success_files': len(result.count_paths),
+        'error_files': len(result.read_errors),
         'label_count': len(ordered_labels),
+        'cancelled': is_cancelled(cancel),
+        'manifest': result.manifest,
     }
 
     return output_path, None, stats
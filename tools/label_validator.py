@@ -13,11 +13,14 @@
 """
 
 import os
-import json
 import csv
 from openpyxl import Workbook
 
-from core.file_scanner import scan_json_files
+from core.cancellation import CancelToken, is_cancelled
+from core.label_dictionary import load_excel_labels
+from core.manifest import DatasetManifest
+from core.progress import ProgressCallback
+from tools.label_audit import VALIDATOR_REPORT_FILE_NAME, audit_labels, write_invalid_label_sheet
 
 
 MANUAL_LABEL_SEPARATORS = (',', '，', ';', '；', '\n', '\r')
@@ -96,100 +99,70 @@ def _load_txt(file_path: str) -> set[str]:
 
 
 def _load_excel(file_path: str) -> set[str]:
-    """加载 Excel 文件"""
-    try:
-        import openpyxl
-    except ImportError:
-        raise ImportError("需要安装 openpyxl 库来读取 Excel 文件")
-    
-    labels = set()
-    wb = openpyxl.load_workbook(file_path, data_only=True)
-    ws = wb.active
-    
-    header = None
-    for row in ws.iter_rows(values_only=True):
-        if header is None:
-            header = row[0]
-            if str(header).strip().lower() != 'label':
-                raise ValueError("Excel 文件第一列列名必须为 'label'")
-            continue
-        if row[0] is not None and str(row[0]).strip():
-            labels.add(str(row[0]).strip())
-    
-    wb.close()
-    return labels
-
-
-def run_validator(target_dir: str, valid_labels: set[str]) -> tuple[str | None, str | None, dict]:
+    """加载 Excel 文件，只读流式读取并按文件哈希缓存解析结果"""
+    return set(load_excel_labels(file_path))
+
+
+def run_validator(
+    target_dir: str,
+    valid_labels: set[str],
+    progress: ProgressCallback | None = None,
+    cancel: CancelToken | None = None,
+    use_index: bool = True,
+    manifest: DatasetManifest | str | None = None,
+    processes: int | None = None,
+    chunk_size: int | None = None,
+) -> tuple[str | None, str | None, dict]:
     """执行标签校验逻辑
     
     参数:
         target_dir: 要检查的文件夹路径
         valid_labels: 有效标签集合
+        progress: 进度回调，扫描与检查阶段定期接收 ScanProgress 事件
+        cancel: 取消令牌，在文件之间检查；取消后只为已检查的文件生成报告
+        use_index: 是否使用持久化标注索引，仅重新解析有变化的 JSON
+        manifest: 数据清单或清单文件路径，提供时只检查其中的 JSON，不再遍历目录
+        processes: 解析 JSON 的进程数，为空时使用 set_parse_processes 设置的默认值；
+            大于 1 时按块分发到进程池并按文件顺序合并，报告与串行检查一致
+        chunk_size: 多进程时每块的文件数，为空时使用 DEFAULT_CHUNK_SIZE
     
     返回:
         (output_path, error, stats)
         - output_path: 报告文件路径，成功时返回
         - error: 错误信息，无错误返回 None
-        - stats: {'total_files': int, 'error_count': int, 'valid_count': int}
+        - stats: {'total_files': int, 'checked_files': int, 'error_count': int, 'valid_count': int, 'cancelled': bool,
+                  'manifest': DatasetManifest}，manifest 为本次检查所用的清单
     """
     if not os.path.isdir(target_dir):
         return None, "目标文件夹不存在或不是有效目录", {}
 
     if not valid_labels:
         return None, "标签列表不能为空", {}
-    
-    exclude_dirs = ["重叠检查结果", "抽样结果", "照片检查+"]
-    all_json_files = list(scan_json_files(target_dir, exclude_dirs=exclude_dirs))
 
-    total_files = len(all_json_files)
-    if total_files == 0:
-        return None, "目标文件夹内未找到 JSON 文件", {}
+    result, error = audit_labels(
+        target_dir, valid_labels, progress=progress, cancel=cancel, use_index=use_index, manifest=manifest,
+        processes=processes, chunk_size=chunk_size, with_shape_stats=False,
+    )
+    if error:
+        return None, error, {}
 
-    error_list = []
-    error_files = set()
-    
-    for file_path in all_json_files:
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                shapes = data.get('shapes', [])
-                
-                file_errors = set()
-                for shape in shapes:
-                    label = str(shape.get('label', "")).strip()
-                    if label and label not in valid_labels:
-                        file_errors.add(label)
-                
-                for err_lab in file_errors:
-                    rel_path = os.path.relpath(file_path, target_dir)
-                    error_list.append([rel_path, err_lab, "不在标签列表中"])
-                    error_files.add(rel_path)
-                    
-        except Exception as e:
-            rel_path = os.path.relpath(file_path, target_dir)
-            error_list.append([rel_path, "", f"文件读取失败: {str(e)}"])
-            error_files.add(rel_path)
-    
     wb = Workbook()
     ws = wb.active
     ws.title = "检查报告"
-    ws.append(["序号", "文件路径", "无效标签", "错误类型"])
-    
-    for idx, (file_path, label, error_type) in enumerate(error_list, 1):
-        ws.append([idx, file_path, label, error_type])
-    
-    if not error_list:
-        ws.append([1, "-", "-", "未发现错误"])
-    
-    output_path = os.path.join(target_dir, "标签校验报告.xlsx")
+    error_item_count = write_invalid_label_sheet(ws, result, cancel)
+
+    output_path = os.path.join(target_dir, VALIDATOR_REPORT_FILE_NAME)
     wb.save(output_path)
-    
+
+    error_files = result.invalid_files()
     stats = {
-        'total_files': total_files,
+        'total_files': result.total_files,
+        'checked_files': result.processed_files,
         'error_count': len(error_files),
-        'error_item_count': len(error_list),
-        'valid_count': total_files - len(error_files)
+        'error_item_count': error_item_count,
+        'valid_count': result.processed_files - len(error_files),
+        'cancelled': is_cancelled(cancel),
+        'manifest': result.manifest,
     }
     
     return output_path, None, stats
@@ -6,6 +6,7 @@
 - 支持两种清理模式：删除孤立图片或删除孤立JSON
 - 自动清理处理过程中产生的空文件夹
 - 检测并报告特殊配对（同名多格式图片+JSON）
+- 支持持续监视模式，新数据到达时增量更新配对统计
 
 使用场景：
 - 数据集预处理和清洗
@@ -14,12 +15,20 @@
 """
 
 import os
+import sys
+import threading
+import time
 from pathlib import Path
+from typing import Callable
 
+from core.cancellation import CancelToken, is_cancelled
 from core.file_scanner import (
     IMAGE_EXTENSIONS,
-    find_all_orphans, scan_all_leaf_dirs
+    find_all_orphans, find_orphans_in_leaf, get_scan_processes, run_sharded_scan, scan_all_leaf_dirs
 )
+from core.manifest import DatasetManifest, prepare_directory_index, resolve_manifest
+from core.progress import ProgressCallback, ProgressReporter
+from core.scan_watch import PairingDelta, ScanWatcher
 
 
 def _cleanup_affected_empty_dirs(target_dir: str, files_to_delete: list[str]) -> None:
@@ -43,32 +52,117 @@ def _cleanup_affected_empty_dirs(target_dir: str, files_to_delete: list[str]) ->
             current_dir = current_dir.parent
 
 
-def run_scan(target_dir: str) -> tuple[dict | None, str | None]:
+def _iter_confirmed_orphans(files_to_delete, mode: str, skipped_files: list[str]):
+    """按目录重新列出文件，只产出删除前仍为孤立文件的路径。
+
+    待删除列表可能来自扫描缓存或数据清单，与磁盘现状不一定一致；
+    已补齐配对文件或已不存在的路径记入 skipped_files，不会被删除。
+    """
+    orphan_key = 'orphan_image_paths' if mode == 'image' else 'orphan_json_paths'
+    by_dir: dict[str, list[str]] = {}
+    for file_path in files_to_delete:
+        by_dir.setdefault(os.path.dirname(file_path), []).append(file_path)
+
+    for dir_path, file_paths in by_dir.items():
+        try:
+            current_orphans = set(find_orphans_in_leaf(dir_path)[orphan_key])
+        except OSError:
+            current_orphans = set()
+        for file_path in file_paths:
+            if file_path in current_orphans:
+                yield file_path
+            else:
+                skipped_files.append(file_path)
+
+
+def _scan_with_manifest(
+    target_dir: str,
+    manifest: DatasetManifest | None,
+    use_cache: bool,
+    progress: ProgressCallback | None,
+    processes: int | None,
+    cancel: CancelToken | None,
+    collect_orphans: bool = False,
+) -> tuple[dict, DatasetManifest]:
+    """扫描配对统计（collect_orphans 为 True 时含孤立文件），返回 (统计, 清单)。"""
+    scan = find_all_orphans if collect_orphans else scan_all_leaf_dirs
+    if manifest is None and (get_scan_processes() if processes is None else processes) > 1:
+        # 分片扫描同时回传各目录的文件列表，清单直接由分片结果生成，不再遍历一次目录树
+        totals = run_sharded_scan(
+            target_dir, collect_orphans=collect_orphans, processes=processes, use_cache=use_cache,
+            progress=progress, cancel=cancel, collect_files=True,
+        )
+        return totals.to_dict(), DatasetManifest.from_paths(target_dir, totals.file_paths)
+
+    index, manifest = prepare_directory_index(
+        manifest, target_dir, use_cache=use_cache, progress=progress, cancel=cancel,
+    )
+    return scan(target_dir, index=index, progress=progress, cancel=cancel), manifest
+
+
+def run_scan(
+    target_dir: str,
+    use_cache: bool = False,
+    progress: ProgressCallback | None = None,
+    processes: int | None = None,
+    cancel: CancelToken | None = None,
+    manifest: DatasetManifest | str | None = None,
+) -> tuple[dict | None, str | None]:
     """执行扫描逻辑
     
     参数:
         target_dir: 目标目录路径
+        use_cache: 是否使用持久化扫描缓存，仅重新列出有变化的目录；默认重新列出全部目录
+        progress: 进度回调，事件的 partial 字段为当前累计的配对统计
+        processes: 进程数，大于 1 时按一级子目录分片并行扫描，为空时使用默认值
+        cancel: 取消令牌，取消后返回已扫描部分的统计，stats['cancelled'] 为 True
+        manifest: 数据清单或清单文件路径，提供时按清单中的文件统计，不再遍历目录
     
     返回:
-        (stats, None) - 成功
+        (stats, None) - 成功，stats['manifest'] 为本次扫描所用的清单
         (None, error) - 失败
     """
     if not os.path.isdir(target_dir):
         return None, "目标文件夹不存在或不是有效目录"
+
+    try:
+        manifest = resolve_manifest(manifest, target_dir)
+    except Exception as e:
+        return None, f"数据清单读取失败: {str(e)}"
     
-    stats = scan_all_leaf_dirs(target_dir)
+    stats, manifest = _scan_with_manifest(target_dir, manifest, use_cache, progress, processes, cancel)
+    stats['cancelled'] = is_cancelled(cancel)
+    stats['manifest'] = manifest
     return stats, None
 
 
-def run_clean(target_dir: str, mode: str) -> tuple[dict | None, str | None]:
+def run_clean(
+    target_dir: str,
+    mode: str,
+    progress: ProgressCallback | None = None,
+    processes: int | None = None,
+    cancel: CancelToken | None = None,
+    manifest: DatasetManifest | str | None = None,
+    use_cache: bool = False,
+) -> tuple[dict | None, str | None]:
     """执行清理逻辑
     
     参数:
         target_dir: 目标目录路径
         mode: 'image' 删除孤立图片, 'json' 删除孤立JSON
+        progress: 进度回调，扫描与复查阶段定期接收 ScanProgress 事件
+        processes: 进程数，大于 1 时按一级子目录分片并行扫描，为空时使用默认值
+        cancel: 取消令牌，在文件之间检查；取消后不再删除剩余文件，也不做复查扫描，
+            返回清理前的扫描统计与已删除数量，stats['cancelled'] 为 True
+        manifest: 数据清单或清单文件路径，提供时只在清单中的文件里查找孤立文件，不再遍历目录
+        use_cache: 查找待删除文件与复查扫描时是否使用持久化扫描缓存；默认重新列出全部目录，
+            网络共享目录的 mtime 可能被客户端缓存，据缓存删除文件并不可靠
+    
+    每个待删除文件所在的目录在删除前都会重新列出一次，已补齐配对文件或已不存在的文件跳过不删，
+    记入 stats['skipped']；删除完成后重新扫描目录得到复查统计。
     
     返回:
-        (stats, None) - 成功
+        (stats, None) - 成功，stats['manifest'] 为移除已删除文件后的清单
         (None, error) - 失败
     """
     if not os.path.isdir(target_dir):
@@ -77,34 +171,97 @@ def run_clean(target_dir: str, mode: str) -> tuple[dict | None, str | None]:
     if mode not in ('image', 'json'):
         return None, "无效的清理模式"
     
-    orphan_result = find_all_orphans(target_dir)
+    try:
+        manifest = resolve_manifest(manifest, target_dir)
+    except Exception as e:
+        return None, f"数据清单读取失败: {str(e)}"
+
+    orphan_result, manifest = _scan_with_manifest(
+        target_dir, manifest, use_cache, progress, processes, cancel, collect_orphans=True,
+    )
     
     if mode == 'image':
         files_to_delete = orphan_result['orphan_image_paths']
     else:
         files_to_delete = orphan_result['orphan_json_paths']
     
-    deleted_count = 0
+    deleted_files = []
     failed_files = []
-    for file_path in files_to_delete:
+    skipped_files = []
+    reporter = ProgressReporter(progress, "删除文件", total_files=len(files_to_delete))
+    for file_path in _iter_confirmed_orphans(files_to_delete, mode, skipped_files):
+        if is_cancelled(cancel):
+            break
         try:
             os.remove(file_path)
-            deleted_count += 1
+            deleted_files.append(file_path)
         except Exception as exc:
             failed_files.append({
                 'path': file_path,
                 'reason': str(exc),
             })
+        reporter.advance(files=1)
+    reporter.finish()
 
-    _cleanup_affected_empty_dirs(target_dir, files_to_delete)
+    _cleanup_affected_empty_dirs(target_dir, deleted_files)
     
-    stats = scan_all_leaf_dirs(target_dir)
-    stats['deleted'] = deleted_count
+    manifest = manifest.without(deleted_files)
+    if is_cancelled(cancel):
+        stats = orphan_result
+    else:
+        stats = scan_all_leaf_dirs(target_dir, use_cache=use_cache, progress=progress, processes=processes)
+    stats['deleted'] = len(deleted_files)
     stats['failed'] = failed_files
+    stats['skipped'] = skipped_files
+    stats['cancelled'] = is_cancelled(cancel)
+    stats['manifest'] = manifest
     
     return stats, None
 
 
+def run_watch(
+    target_dir: str,
+    on_change: Callable[[PairingDelta], None],
+    stop_event: "CancelToken | threading.Event",
+    interval: float = 5.0,
+    on_snapshot: Callable[[dict], None] | None = None,
+    progress: ProgressCallback | None = None,
+) -> tuple[dict | None, str | None]:
+    """持续监视目录，配对统计变化时回调，直到 stop_event 被设置
+    
+    参数:
+        target_dir: 目标目录路径
+        on_change: 统计变化时的回调，接收 PairingDelta
+        stop_event: 停止信号，可以是 threading.Event 或 CancelToken
+        interval: 轮询间隔（秒）
+        on_snapshot: 首次完整扫描完成后的回调，接收结构同 run_scan 的统计
+        progress: 进度回调，首次完整扫描期间定期接收 ScanProgress 事件
+    
+    返回:
+        (stats, None) - 停止监视时的最终统计
+        (None, error) - 失败
+    """
+    if not os.path.isdir(target_dir):
+        return None, "目标文件夹不存在或不是有效目录"
+    
+    watcher = ScanWatcher(target_dir)
+    stats = watcher.snapshot(progress=progress, cancel=stop_event)
+    if on_snapshot is not None:
+        on_snapshot(stats)
+    
+    watcher.watch(on_change, stop_event, interval)
+    return watcher.stats(), None
+
+
+def _print_watch_delta(delta: PairingDelta) -> None:
+    totals = delta.totals
+    print(
+        f"[{time.strftime('%H:%M:%S')}] {delta.format()}\n"
+        f"    有效配对 {totals['paired']} 对，孤立图片 {totals['orphan_image']} 个，"
+        f"孤立JSON {totals['orphan_json']} 个，特殊配对 {totals['special_count']} 组"
+    )
+
+
 if __name__ == "__main__":
     import tkinter as tk
     from tkinter import filedialog, messagebox
@@ -119,6 +276,21 @@ if __name__ == "__main__":
     
     print(f"支持的图片格式: {', '.join(IMAGE_EXTENSIONS)}")
     
+    if "--watch" in sys.argv:
+        print("持续监视中，按 Ctrl+C 停止")
+        stop_event = threading.Event()
+        try:
+            run_watch(
+                target_dir, _print_watch_delta, stop_event,
+                on_snapshot=lambda stats: print(
+                    f"初始统计: 有效配对 {stats['paired']} 对，孤立图片 {stats['orphan_image']} 个，"
+                    f"孤立JSON {stats['orphan_json']} 个，特殊配对 {len(stats['special_pairs'])} 组"
+                ),
+            )
+        except KeyboardInterrupt:
+            stop_event.set()
+        exit()
+    
     stats, error = run_scan(target_dir)
     if error:
         messagebox.showerror("错误", error)
@@ -9,7 +9,6 @@
 - 生成 xlsx 格式的检查报告
 """
 
-import json
 import os
 import shutil
 from pathlib import Path
@@ -18,7 +17,18 @@ from openpyxl import Workbook
 from shapely.geometry import Polygon
 from shapely.strtree import STRtree
 
-from core.file_scanner import IMAGE_EXTENSIONS
+from core.annotation_index import open_annotation_index
+from core.cancellation import CancelToken, format_cancel_note, is_cancelled
+from core.file_scanner import IMAGE_EXTENSIONS, TOOL_OUTPUT_EXCLUDES
+from core.labelme import (
+    LabelmeWriter,
+    PrefetchedAnnotation,
+    prefetch_labelme_shapes,
+    read_cached_labelme_shapes,
+)
+from core.manifest import DatasetManifest, prepare_manifest
+from core.pipeline import iter_read_ahead
+from core.progress import ProgressCallback, ProgressReporter
 
 
 DEFAULT_OUTPUT_DIR_NAME = "重叠检查结果"
@@ -26,18 +36,17 @@ REPORT_FILE_NAME = "多边形重叠检查报告.xlsx"
 OVERLAP_LABEL_PREFIX = "[重叠] "
 
 
-def _iter_json_files(source_dir: Path, output_dir: Path) -> list[Path]:
-    """递归获取待检查的 JSON 文件，跳过结果目录。"""
-    json_files = []
-
-    for json_path in source_dir.rglob("*.json"):
-        try:
-            json_path.relative_to(output_dir)
-            continue
-        except ValueError:
-            json_files.append(json_path)
-
-    return json_files
+def _prepare_input_manifest(
+    source_dir: Path,
+    output_dir: Path,
+    manifest: DatasetManifest | str | None = None,
+    progress: ProgressCallback | None = None,
+    cancel: CancelToken | None = None,
+) -> DatasetManifest:
+    """获取待检查文件的清单，遍历时跳过结果目录；提供的清单中位于结果目录内的文件同样剔除。"""
+    exclude_dirs = [str(output_dir), *TOOL_OUTPUT_EXCLUDES]
+    manifest = prepare_manifest(manifest, str(source_dir), exclude_dirs, progress=progress, cancel=cancel)
+    return manifest.without_dir(output_dir)
 
 
 def _find_image_for_json(json_path: Path) -> Path | None:
@@ -96,8 +105,8 @@ def _format_overlap_pairs(polygons: list[dict], overlap_pairs: set[tuple[int, in
     return "；".join(pair_texts)
 
 
-def _write_report(output_path: Path, details: list[dict]) -> str:
-    """生成 xlsx 格式报告。"""
+def _write_report(output_path: Path, details: list[dict], note: str = "") -> str:
+    """生成 xlsx 格式报告，note 非空时追加到末行（如任务中止说明）。"""
     report_path = output_path / REPORT_FILE_NAME
 
     workbook = Workbook()
@@ -123,13 +132,15 @@ def _write_report(output_path: Path, details: list[dict]) -> str:
     if row_index == 1:
         worksheet.append([1, "-", 0, 0, "未发现重叠问题", ""])
 
+    if note:
+        worksheet.append(["-", "-", "-", "-", "-", note])
+
     workbook.save(report_path)
     return str(report_path)
 
 
-def analyze_overlap(json_path: str, threshold: float = 0.1) -> tuple[dict | None, dict]:
-    """分析单个 JSON 的多边形重叠情况。"""
-    detail = {
+def _empty_detail() -> dict:
+    return {
         "has_overlap": False,
         "overlap_shape_count": 0,
         "overlap_pair_count": 0,
@@ -137,9 +148,21 @@ def analyze_overlap(json_path: str, threshold: float = 0.1) -> tuple[dict | None
         "warning": "",
     }
 
+
+def analyze_overlap(
+    json_path: str,
+    threshold: float = 0.1,
+    prefetched: PrefetchedAnnotation | None = None,
+) -> tuple[dict | None, dict]:
+    """分析单个 JSON 的多边形重叠情况。
+
+    prefetched 为预读流水线已读取的内容，为空时直接读取 json_path。
+    返回的数据不含 imageData，写出时应使用 write_labelme_shapes 只替换原文件的 shapes。
+    """
+    detail = _empty_detail()
+
     try:
-        with open(json_path, "r", encoding="utf-8") as file:
-            data = json.load(file)
+        data = prefetched.parse() if prefetched is not None else read_cached_labelme_shapes(json_path)
     except Exception as exc:
         detail["warning"] = f"文件读取失败: {str(exc)}"
         return None, detail
@@ -233,8 +256,19 @@ def run_polygon_overlap_check(
     source_dir: str,
     threshold: float = 0.1,
     output_dir: str | None = None,
+    progress: ProgressCallback | None = None,
+    cancel: CancelToken | None = None,
+    use_index: bool = True,
+    manifest: DatasetManifest | str | None = None,
 ) -> tuple[str | None, str | None, dict]:
-    """批量执行多边形重叠检查。"""
+    """批量执行多边形重叠检查。
+
+    progress 为进度回调，扫描与检查阶段定期接收 ScanProgress 事件；
+    cancel 为取消令牌，在文件之间检查，取消后只为已检查的文件生成报告，stats['cancelled'] 为 True；
+    use_index 为 True 时先查询持久化标注索引，不含待计算 polygon 的文件直接跳过几何计算；
+    manifest 为数据清单或清单文件路径，提供时只检查其中的 JSON，不再遍历目录，
+    本次检查所用的清单放在 stats['manifest'] 中返回。
+    """
     empty_stats = {
         "total_files": 0,
         "checked_files": 0,
@@ -244,6 +278,7 @@ def run_polygon_overlap_check(
         "total_overlap_pairs": 0,
         "report_path": "",
         "details": [],
+        "cancelled": False,
     }
 
     if not source_dir:
@@ -261,10 +296,18 @@ def run_polygon_overlap_check(
     else:
         output_path = source_path / DEFAULT_OUTPUT_DIR_NAME
 
-    all_json_files = _iter_json_files(source_path, output_path)
+    partial = manifest is not None
+    try:
+        manifest = _prepare_input_manifest(source_path, output_path, manifest, progress, cancel)
+    except Exception as e:
+        return None, f"数据清单读取失败: {str(e)}", empty_stats
+    all_json_files = manifest.json_paths()
     empty_stats["total_files"] = len(all_json_files)
 
     if not all_json_files:
+        if is_cancelled(cancel):
+            empty_stats["cancelled"] = True
+            return None, f"任务已中止（{cancel.reason}）", empty_stats
         return None, "数据文件夹内未找到 JSON 文件", empty_stats
 
     output_path.mkdir(parents=True, exist_ok=True)
@@ -278,10 +321,40 @@ def run_polygon_overlap_check(
         "total_overlap_pairs": 0,
         "report_path": "",
         "details": [],
+        "cancelled": False,
+        "manifest": manifest,
     }
 
-    for json_file in all_json_files:
-        modified_data, detail = analyze_overlap(str(json_file), threshold)
+    annotation_index = None
+    candidates = None
+    if use_index:
+        annotation_index = open_annotation_index(
+            str(source_path), [str(json_file) for json_file in all_json_files], progress=progress, cancel=cancel,
+            prune=not partial,
+        )
+        candidates = annotation_index.polygon_candidates()
+
+    def prefetch_candidate(json_file):
+        if annotation_index is not None:
+            file_id = annotation_index.file_id(str(json_file))
+            if file_id is not None and not candidates[file_id]:
+                return None
+        return prefetch_labelme_shapes(json_file)
+
+    processed_files = 0
+    reporter = ProgressReporter(progress, "检查文件", total_files=len(all_json_files))
+    # 结果文件集中在少数子目录中，写入器对每个目录只创建一次
+    writer = LabelmeWriter()
+    for json_file, prefetched, _error in iter_read_ahead(all_json_files, prefetch_candidate, cancel=cancel):
+        if is_cancelled(cancel):
+            break
+        reporter.advance(files=1)
+        processed_files += 1
+
+        if prefetched is None:
+            modified_data, detail = None, _empty_detail()
+        else:
+            modified_data, detail = analyze_overlap(str(json_file), threshold, prefetched)
         relative_path = os.path.relpath(json_file, source_path)
 
         if detail["warning"].startswith("文件读取失败"):
@@ -311,10 +384,8 @@ def run_polygon_overlap_check(
             continue
 
         target_json_path = output_path / relative_path
-        target_json_path.parent.mkdir(parents=True, exist_ok=True)
 
-        with open(target_json_path, "w", encoding="utf-8") as file:
-            json.dump(modified_data, file, indent=2, ensure_ascii=False)
+        writer.write_shapes(json_file, target_json_path, modified_data["shapes"])
 
         image_path = _find_image_for_json(json_file)
         image_found = image_path is not None
@@ -339,5 +410,11 @@ def run_polygon_overlap_check(
             "warning": warning,
         })
 
-    stats["report_path"] = _write_report(output_path, stats["details"])
+    writer.close()
+    reporter.finish()
+    note = ""
+    if is_cancelled(cancel):
+        stats["cancelled"] = True
+        note = format_cancel_note(cancel, processed_files, len(all_json_files))
+    stats["report_path"] = _write_report(output_path, stats["details"], note)
     return str(output_path), None, stats
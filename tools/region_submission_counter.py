@@ -5,7 +5,10 @@ from pathlib import Path
 
 from openpyxl import Workbook
 
-from core.file_scanner import is_image_file, scan_leaf_dir
+from core.cancellation import CancelToken, format_cancel_note, is_cancelled
+from core.file_scanner import iter_scan_leaf_dirs
+from core.manifest import DatasetManifest, prepare_directory_index
+from core.progress import ProgressCallback
 
 
 CITY_BY_PREFIX = {
@@ -261,28 +264,27 @@ def _apply_basic_styles(worksheet, submission_names: list[str]) -> None:
         column_index += 1
 
 
-def _get_pairable_dirs(root_folder: str) -> list[str]:
-    """返回所有实际存放图片或 JSON 的目录，按目录内局部配对。"""
-    pairable_dirs = []
-    for current_root, _dirs, files in os.walk(root_folder):
-        has_candidate_files = any(is_image_file(file_name) or file_name.lower().endswith(".json") for file_name in files)
-        if has_candidate_files:
-            pairable_dirs.append(current_root)
-    return pairable_dirs
-
-
-def run_region_submission_count(root_folder: str) -> tuple[str | None, str | None, dict]:
-    """统计根目录下各行政区在不同提交批次中的配对成功数。"""
+def run_region_submission_count(
+    root_folder: str,
+    use_cache: bool = False,
+    progress: ProgressCallback | None = None,
+    cancel: CancelToken | None = None,
+    manifest: DatasetManifest | str | None = None,
+) -> tuple[str | None, str | None, dict]:
+    """统计根目录下各行政区在不同提交批次中的配对成功数。
+
+    use_cache 为 True 时使用持久化扫描缓存，仅重新列出有变化的目录，默认重新列出全部目录；
+    progress 为进度回调，扫描过程中定期接收 ScanProgress 事件；
+    cancel 为取消令牌，在目录之间检查，取消后只输出已扫描目录的统计；
+    manifest 为数据清单或清单文件路径，提供时按清单中的文件统计，不再遍历目录，
+    本次统计所用的清单放在 stats['manifest'] 中返回。
+    """
     if not root_folder:
         return None, "未选择文件夹", {}
 
     if not os.path.isdir(root_folder):
         return None, "文件夹路径无效", {}
 
-    pairable_dirs = _get_pairable_dirs(root_folder)
-    if not pairable_dirs:
-        return None, "未找到可扫描的图片或 JSON 所在目录", {}
-
     counts_by_region: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
     submission_names = set()
     invalid_structure_samples = []
@@ -291,8 +293,18 @@ def run_region_submission_count(root_folder: str) -> tuple[str | None, str | Non
     unmatched_region_count = 0
     counted_leaf_folders = 0
     total_matched = 0
+    pairable_dir_count = 0
 
-    for current_dir in pairable_dirs:
+    try:
+        index, manifest = prepare_directory_index(
+            manifest, root_folder, use_cache=use_cache, progress=progress, cancel=cancel,
+        )
+    except Exception as e:
+        return None, f"数据清单读取失败: {str(e)}", {}
+
+    scan_results = iter_scan_leaf_dirs(root_folder, index=index, cancel=cancel)
+    for current_dir, scan_result in scan_results:
+        pairable_dir_count += 1
         submission_name, region_dir_name = _extract_submission_and_region(root_folder, current_dir)
         if not submission_name or not region_dir_name:
             invalid_structure_count += 1
@@ -311,7 +323,6 @@ def run_region_submission_count(root_folder: str) -> tuple[str | None, str | Non
                 })
             continue
 
-        scan_result = scan_leaf_dir(current_dir)
         paired_count = scan_result["paired"]
         if paired_count <= 0:
             continue
@@ -320,6 +331,11 @@ def run_region_submission_count(root_folder: str) -> tuple[str | None, str | Non
         counted_leaf_folders += 1
         total_matched += paired_count
 
+    if pairable_dir_count == 0:
+        if is_cancelled(cancel):
+            return None, f"任务已中止（{cancel.reason}）", {}
+        return None, "未找到可扫描的图片或 JSON 所在目录", {}
+
     ordered_submissions = sorted(submission_names, key=_submission_sort_key)
     output_path = os.path.join(root_folder, OUTPUT_FILENAME)
 
@@ -340,11 +356,14 @@ def run_region_submission_count(root_folder: str) -> tuple[str | None, str | Non
 
         worksheet.append(row)
 
+    if is_cancelled(cancel):
+        worksheet.append([None, None, format_cancel_note(cancel, pairable_dir_count)])
+
     _apply_basic_styles(worksheet, ordered_submissions)
     workbook.save(output_path)
 
     stats = {
-        "total_pairable_dirs": len(pairable_dirs),
+        "total_pairable_dirs": pairable_dir_count,
         "counted_pairable_dirs": counted_leaf_folders,
         "submission_count": len(ordered_submissions),
         "region_count_with_data": sum(1 for value in counts_by_region.values() if value),
@@ -353,6 +372,8 @@ def run_region_submission_count(root_folder: str) -> tuple[str | None, str | Non
         "unmatched_region_count": unmatched_region_count,
         "invalid_structure_samples": invalid_structure_samples,
         "unmatched_region_samples": unmatched_region_samples,
+        "cancelled": is_cancelled(cancel),
+        "manifest": manifest,
     }
 
     return output_path, None, stats
@@ -0,0 +1,164 @@
+"""
+形状结构检查工具 (Shape Structure Checker)
+
+功能说明：
+- 递归扫描选定目录中的所有 Labelme JSON 文件
+- 对每个文件的全部 shapes 做一次向量化结构检查：非数值坐标、NaN/inf 坐标、相邻重复顶点、
+  零面积多边形、点数不符（如矩形不是 2 个点）、未知 shape_type
+- 生成 xlsx 报告，逐条列出问题所在的文件、shape 序号与标签
+
+使用场景：
+- 发现重叠检查等工具中被静默跳过的异常形状
+- 导入训练前的数据结构体检
+"""
+
+import os
+import sys
+
+from openpyxl import Workbook
+
+from core.cancellation import CancelToken, format_cancel_note, is_cancelled
+from core.file_scanner import TOOL_OUTPUT_EXCLUDES
+from core.labelme import SHAPE_ISSUE_TYPES, PrefetchedAnnotation, check_shape_structure, prefetch_labelme_shapes
+from core.manifest import DatasetManifest, prepare_manifest
+from core.pipeline import iter_read_ahead
+from core.progress import ProgressCallback, ProgressReporter
+
+
+REPORT_FILE_NAME = "形状结构检查报告.xlsx"
+
+ISSUE_READ_FAILED = "文件读取失败"
+
+
+def _check_file_shapes(prefetched: PrefetchedAnnotation) -> tuple[str | None, list[tuple]]:
+    """解析预读的 JSON 并检查形状结构，返回 (读取错误信息, [(shape 序号, 标签, shape_type, 问题类型, 说明)])。"""
+    try:
+        shapes = prefetched.parse().get('shapes', [])
+        if not isinstance(shapes, list):
+            return "shapes 不是列表", []
+        positions = [position for position, shape in enumerate(shapes) if isinstance(shape, dict)]
+        shapes = [shapes[position] for position in positions]
+        return None, [
+            (positions[index] + 1, str(shapes[index].get('label', '')), shapes[index].get('shape_type'), issue, detail)
+            for index, issue, detail in check_shape_structure(shapes)
+        ]
+    except Exception as e:
+        return str(e), []
+
+
+def run_shape_check(
+    target_dir: str,
+    progress: ProgressCallback | None = None,
+    cancel: CancelToken | None = None,
+    manifest: DatasetManifest | str | None = None,
+) -> tuple[str | None, str | None, dict]:
+    """检查目录下所有 Labelme JSON 的形状结构。
+
+    参数:
+        target_dir: 要检查的文件夹路径
+        progress: 进度回调，扫描与检查阶段定期接收 ScanProgress 事件
+        cancel: 取消令牌，在文件之间检查；取消后只为已检查的文件生成报告
+        manifest: 数据清单或清单文件路径，提供时只检查其中的 JSON，不再遍历目录
+
+    返回:
+        (output_path, error, stats)
+        - output_path: 报告文件路径，成功时返回
+        - error: 错误信息，无错误返回 None
+        - stats: {'total_files', 'checked_files', 'error_files', 'issue_count', 'issue_counts', 'cancelled', 'manifest'}
+          issue_counts 为 {问题类型: 条数}，含文件读取失败；manifest 为本次检查所用的清单
+    """
+    if not os.path.isdir(target_dir):
+        return None, "目标文件夹不存在或不是有效目录", {}
+
+    try:
+        manifest = prepare_manifest(manifest, target_dir, TOOL_OUTPUT_EXCLUDES, progress=progress, cancel=cancel)
+    except Exception as e:
+        return None, f"数据清单读取失败: {str(e)}", {}
+    all_json_files = manifest.json_paths()
+
+    total_files = len(all_json_files)
+    if total_files == 0:
+        if is_cancelled(cancel):
+            return None, f"任务已中止（{cancel.reason}）", {}
+        return None, "目标文件夹内未找到 JSON 文件", {}
+
+    issue_rows = []
+    issue_counts = {issue: 0 for issue in (*SHAPE_ISSUE_TYPES, ISSUE_READ_FAILED)}
+    error_files = 0
+    checked_files = 0
+    reporter = ProgressReporter(progress, "检查文件", total_files=total_files)
+
+    for file_path, prefetched, _error in iter_read_ahead(all_json_files, prefetch_labelme_shapes, cancel=cancel):
+        if is_cancelled(cancel):
+            break
+        reporter.advance(files=1)
+        checked_files += 1
+
+        read_error, file_issues = _check_file_shapes(prefetched)
+        rel_path = os.path.relpath(file_path, target_dir)
+        if read_error is not None:
+            file_issues = [("", "", "", ISSUE_READ_FAILED, read_error)]
+
+        if file_issues:
+            error_files += 1
+        for shape_index, label, shape_type, issue, detail in file_issues:
+            issue_rows.append([rel_path, shape_index, label, shape_type or "", issue, detail])
+            issue_counts[issue] += 1
+    reporter.finish()
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "形状结构检查"
+    ws.append(["序号", "文件路径", "shape序号", "标签", "shape_type", "问题类型", "说明"])
+
+    for idx, row in enumerate(issue_rows, 1):
+        ws.append([idx, *row])
+
+    if not issue_rows:
+        ws.append([1, "-", "-", "-", "-", "-", "未发现问题"])
+
+    if is_cancelled(cancel):
+        ws.append(["-", "-", "-", "-", "-", "-", format_cancel_note(cancel, checked_files, total_files)])
+
+    summary = wb.create_sheet("问题汇总")
+    summary.append(["问题类型", "条数"])
+    for issue, count in issue_counts.items():
+        summary.append([issue, count])
+
+    output_path = os.path.join(target_dir, REPORT_FILE_NAME)
+    wb.save(output_path)
+
+    stats = {
+        'total_files': total_files,
+        'checked_files': checked_files,
+        'error_files': error_files,
+        'issue_count': len(issue_rows),
+        'issue_counts': issue_counts,
+        'cancelled': is_cancelled(cancel),
+        'manifest': manifest,
+    }
+
+    return output_path, None, stats
+
+
+if __name__ == "__main__":
+    import tkinter as tk
+    from tkinter import filedialog
+
+    root = tk.Tk()
+    root.withdraw()
+    folder = filedialog.askdirectory(title="选择需要检查形状结构的文件夹")
+    if not folder:
+        print("未选择文件夹")
+        sys.exit(1)
+
+    report_path, error, stats = run_shape_check(folder)
+    if error:
+        print(f"错误: {error}")
+        sys.exit(1)
+
+    print(f"检查完成，报告已保存到: {report_path}")
+    print(f"JSON 文件: {stats['checked_files']} 个，有问题的文件 {stats['error_files']} 个，问题 {stats['issue_count']} 条")
+    for issue, count in stats['issue_counts'].items():
+        if count:
+            print(f"  {issue}: {count}")